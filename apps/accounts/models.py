@@ -6,7 +6,19 @@ class User(AbstractUser):
     first_name = models.CharField(max_length=30, blank=True)
     last_name = models.CharField(max_length=30, blank=True)
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    # Зменшені варіанти avatar (див. apps/core/renditions.py)
+    avatar_renditions = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.TextField(max_length=500, blank=True)
+    following = models.ManyToManyField(
+        'self',
+        through='Follow',
+        through_fields=('follower', 'author'),
+        symmetrical=False,
+        related_name='followers',
+        blank=True,
+    )
+    # Денормалізовано (сигнали Follow): визначає, чи розсилати пости автора по домашніх стрічках
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
@@ -18,6 +30,9 @@ class User(AbstractUser):
         db_table = 'user'
         verbose_name = 'user'
         verbose_name_plural = 'users'
+        indexes = [
+            models.Index(fields=['followers_count']),
+        ]
 
     def __str__(self):
         return self.email
@@ -25,3 +40,26 @@ class User(AbstractUser):
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}".strip()
+
+
+class Follow(models.Model):
+    '''Підписка читача на автора'''
+    follower = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'follows'
+        verbose_name = 'follow'
+        verbose_name_plural = 'follows'
+        constraints = [
+            models.UniqueConstraint(fields=['follower', 'author'], name='follows_unique_follower_author'),
+            models.CheckConstraint(condition=~models.Q(follower=models.F('author')), name='follows_not_self'),
+        ]
+        indexes = [
+            # Розсилка поста: всі підписники автора
+            models.Index(fields=['author', 'follower']),
+        ]
+
+    def __str__(self):
+        return f'{self.follower_id} -> {self.author_id}'
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from .models import User
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from apps.core.serializers import RenditionImageField
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -56,14 +57,15 @@ class UserLoginSerializer(serializers.ModelSerializer):
 
 class UserProfileSerializer(serializers.ModelSerializer):
     full_name = serializers.ReadOnlyField()
+    avatar = RenditionImageField('large', required=False, allow_null=True)
     posts_count = serializers.SerializerMethodField()
     comments_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'first_name', "last_name", 'full_name', 'avatar', 'bio', 'created_at',
-                  'updated_at', 'posts_count', 'comments_count')
-        read_only_fields = ('id', 'created_at', 'updated_at')
+                  'updated_at', 'posts_count', 'comments_count', 'followers_count')
+        read_only_fields = ('id', 'created_at', 'updated_at', 'followers_count')
 
     def get_posts_count(self, obj):
         try:
@@ -7,6 +7,7 @@ urlpatterns = [
     path('login/', views.LoginView.as_view(), name='login'),
     path('logout/', views.logout, name='logout'),
     path('profile/', views.ProfileView.as_view(), name='profile'),
+    path('users/<int:pk>/follow/', views.follow, name='user-follow'),
     path('change-password/', views.ChangePasswordView.as_view(), name='change_password'),
     path('token/refresh', TokenRefreshView.as_view(), name='token_refresh'),
 ]
\ No newline at end of file
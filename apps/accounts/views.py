@@ -4,8 +4,10 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import login
+from django.shortcuts import get_object_or_404
 
-from . models import User
+from . models import Follow, User
+from apps.core.conditional import ConditionalGetMixin
 from .serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
@@ -81,13 +83,17 @@ class LoginView(generics.GenericAPIView):
         tags=['Користувачі']
     )
 )
-class ProfileView(generics.RetrieveAPIView):
+class ProfileView(ConditionalGetMixin, generics.RetrieveAPIView):
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         return self.request.user
 
+    def get_validators(self, request, *args, **kwargs):
+        user = request.user
+        return (user.pk, user.updated_at, user.comments.count(), user.followers_count), user.updated_at
+
     def get_serializer_class(self):
         if self.request.method == 'PUT' or self.request.method == 'PATCH':
             return UserUpdateSerializer
@@ -133,4 +139,33 @@ def logout(request):
     except Exception:
         return Response({
             'message': 'Invalid token'
-        },status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        },status=status.HTTP_400_BAD_REQUEST)
+
+@extend_schema(
+    tags=['Користувачі'],
+    summary="Підписка на автора",
+    description="POST підписує поточного користувача на автора (його пости з'являться в домашній стрічці), "
+                "DELETE — відписує.",
+    responses={200: OpenApiTypes.OBJECT, 201: OpenApiTypes.OBJECT}
+)
+@api_view(['POST', 'DELETE'])
+@permission_classes([permissions.IsAuthenticated])
+def follow(request, pk):
+    author = get_object_or_404(User, pk=pk)
+    if author.pk == request.user.pk:
+        return Response({
+            'error': 'You cannot follow yourself'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if request.method == 'DELETE':
+        Follow.objects.filter(follower=request.user, author=author).delete()
+        return Response({
+            'message': 'Unfollowed successfully',
+            'is_following': False,
+        }, status=status.HTTP_200_OK)
+
+    _, created = Follow.objects.get_or_create(follower=request.user, author=author)
+    return Response({
+        'message': 'Followed successfully' if created else 'Already following',
+        'is_following': True,
+    }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
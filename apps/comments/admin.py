@@ -1,10 +1,11 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from apps.core.admin import EstimatedCountAdminMixin
 from .models import Comment
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'post_title', 'author', 'content_preview', 'created_at', 'parrent_comment', 'is_active')
     list_filter = ('is_active','created_at', 'updated_at')
     search_fields = ('content','author__username', 'post_title')
@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 
 from apps.main.models import Post
 
@@ -12,6 +14,12 @@ class Comment(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_vector = models.GeneratedField(
+        expression=SearchVector('content', config='simple'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
     class Meta:
         db_table = 'comments'
         verbose_name = 'Comment'
@@ -21,16 +29,20 @@ class Comment(models.Model):
             models.Index(fields=['post', '-created_at']),
             models.Index(fields=['author', '-created_at']),
             models.Index(fields=['parent', '-created_at']),
+            GinIndex(fields=['search_vector'], name='comments_search_vector_gin'),
             ]
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
 
     @property
     def replies_count(self):
+        # Дерева коментарів анотують кількість (active_replies_count), щоб не рахувати її на кожен коментар
+        if hasattr(self, 'active_replies_count'):
+            return self.active_replies_count
         return self.replies.filter(is_active=True).count()
 
     @property
     def is_reply(self):
-        return self.parent is not None
+        return self.parent_id is not None
 
 
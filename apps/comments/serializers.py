@@ -1,8 +1,12 @@
 from rest_framework import serializers
 from .models import Comment
 from apps.main.models import Post
+from apps.core.fieldsets import SparseFieldsetMixin
+from apps.core.loaders import BatchRelationsMixin
+from apps.core.renditions import ImageRenditionService
+from apps.core.serializers import CompiledRepresentationMixin
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetMixin, BatchRelationsMixin, CompiledRepresentationMixin, serializers.ModelSerializer):
     author_info = serializers.SerializerMethodField()
     replies_count = serializers.ReadOnlyField()
     is_reply = serializers.ReadOnlyField()
@@ -11,13 +15,18 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ['id', 'content','author_info','parent','is_active', 'created_at', 'updated_at','author', 'content', 'is_reply', 'replies_count']
         read_only_fields = ['author', 'is_active']
+        sparse_field_sources = {
+            'author_info': ('author',),
+            'is_reply': ('parent_id',),
+            'replies_count': (),
+        }
 
     def get_author_info(self, obj):
         return {
             'id' : obj.author.id,
             'username' : obj.author.username,
             'full_name' : obj.author.full_name,
-            'avatar' : obj.author.avatar.url if obj.author.avatar else None,
+            'avatar' : ImageRenditionService.url(obj.author.avatar, 'thumb'),
         }
 class CommentCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -47,18 +56,31 @@ class CommentUpdateSerializer(serializers.ModelSerializer):
         fields = ['content']
 
 
-class CommentDetailSerializer(serializers.ModelSerializer):
+class CommentDetailSerializer(CommentSerializer):
     replies = serializers.SerializerMethodField()
-    author_info = serializers.SerializerMethodField()
 
 
     class Meta(CommentSerializer.Meta):
         fields = CommentSerializer.Meta.fields + ['replies']
+        sparse_field_sources = {
+            **CommentSerializer.Meta.sparse_field_sources,
+            'replies': ('parent_id',),
+        }
+
 
+    def load_relations(self, instances):
+        super().load_relations(instances)
+        if 'replies' in self.fields:
+            # Автори відповідей усієї сторінки — одним запитом, а не на кожен коментар
+            replies = [reply for obj in instances for reply in getattr(obj, 'active_replies', ())]
+            self.relation_loader.prefetch(replies, 'author')
 
     def get_replies(self, obj):
-        if obj.parent is None:
-            replies = obj.replies.filter(is_active = True).order_by('created_at')
+        if obj.parent_id is None:
+            # post_comments підвантажує активні відповіді одним запитом (Prefetch у active_replies)
+            replies = getattr(obj, 'active_replies', None)
+            if replies is None:
+                replies = obj.replies.filter(is_active = True).order_by('created_at')
             return CommentSerializer(replies, many=True, context = self.context).data
         return []
 
@@ -3,16 +3,24 @@ from django.shortcuts import render
 from rest_framework import generics, permissions, status, filters
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
-from django.shortcuts import get_object_or_404
+from django.db.models import Count, Prefetch, Q
+from django.shortcuts import aget_object_or_404, get_object_or_404
 
 from .models import Comment
 from .serializers import (CommentSerializer, CommentCreateSerializer, CommentDetailSerializer, CommentUpdateSerializer)
 from .permissions import IsAuthorOrReadOnly
 from apps.main.models import Post
+from apps.core.asyncviews import async_api_view
+from apps.core.fieldsets import SparseFieldsetViewMixin
+from apps.core.filters import FullTextSearchFilter
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 
+def with_replies_count(queryset):
+    '''Анотує кількість активних відповідей (Comment.replies_count) одним запитом'''
+    return queryset.annotate(active_replies_count = Count('replies', filter = Q(replies__is_active = True)))
+
+
 @extend_schema_view(
     get=extend_schema(
         summary="Список усіх активних коментарів",
@@ -25,16 +33,15 @@ from drf_spectacular.types import OpenApiTypes
         tags=['Коментарі']
     )
 )
-class CommentListCreate(generics.ListCreateAPIView):
+class CommentListCreate(SparseFieldsetViewMixin, generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['post', 'author', 'parent']
-    search_fields = ['content']
     ordering_fields = ['created_at','updated_at']
     ordering = ['-created_at']
 
     def get_queryset(self):
-        return Comment.objects.filter(is_active=True).select_related('author','post','parent')
+        return Comment.objects.filter(is_active=True).select_related('author')
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -51,8 +58,8 @@ class CommentListCreate(generics.ListCreateAPIView):
         tags=['Коментарі']
     )
 )
-class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Comment.objects.filter(is_active=True).select_related('author','post')
+class CommentDetailView(SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Comment.objects.filter(is_active=True).select_related('author')
     serializer_class = CommentDetailSerializer
     permission_classes = [IsAuthorOrReadOnly]
 
@@ -69,19 +76,16 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
     summary="Мої коментарі",
     description="Повертає список усіх коментарів, залишених поточним авторизованим користувачем."
 )
-class MyCommentsView(generics.ListAPIView):
+class MyCommentsView(SparseFieldsetViewMixin, generics.ListAPIView):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['post', 'parent', 'is_active']
-    search_fields = ['content']
     ordering_fields = ['created_at','updated_at']
     ordering = ['-created_at']
 
     def get_queryset(self):
-        return Comment.objects.filter(author = self.request.user).select_related(
-            'post','parent'
-        )
+        return Comment.objects.filter(author = self.request.user).select_related('author')
 @extend_schema(
     tags=['Коментарі'],
     summary="Коментарі до конкретного поста",
@@ -90,20 +94,23 @@ class MyCommentsView(generics.ListAPIView):
         OpenApiParameter(name="post_id", type=int, location=OpenApiParameter.PATH, description="ID поста")
     ]
 )
-@api_view(['GET'])
+@async_api_view
 @permission_classes([permissions.AllowAny])
-def post_comments(request, post_id):
+async def post_comments(request, post_id):
 
-    post = get_object_or_404(Post, id = post_id, status = 'published')
+    post = await aget_object_or_404(Post.objects.only('id', 'title', 'slug'), id = post_id, status = 'published')
 
-    comments = Comment.objects.filter(
+    replies = with_replies_count(
+        Comment.objects.filter(is_active = True).select_related('author')
+    ).order_by('created_at')
+    comments = with_replies_count(Comment.objects.filter(
         post = post,
         parent = None,
         is_active = True
-    ).select_related('author').prefetch_related(
-        'replies__author'
+    ).select_related('author')).prefetch_related(
+        Prefetch('replies', queryset = replies, to_attr = 'active_replies')
     ).order_by('-created_at')
-    serializer = CommentDetailSerializer(comments, many = True, context = {'request': request})
+    serializer = CommentDetailSerializer([comment async for comment in comments], many = True, context = {'request': request})
     return Response({
         'post': {
             'id': post_id,
@@ -111,7 +118,7 @@ def post_comments(request, post_id):
             'slug': post.slug,
         },
         'comments': serializer.data,
-        'comments_count': post.comment.filter(is_active = True).count(),
+        'comments_count': await Comment.objects.filter(post = post, is_active = True).acount(),
 
     })
 
@@ -0,0 +1,12 @@
+from .pagination import EstimatedCountPaginator
+
+
+class EstimatedCountAdminMixin:
+    '''
+    Список адмінки без точного COUNT(*) на великих таблицях: кількість результатів —
+    оцінка планувальника (apps.core.pagination.EstimatedCountPaginator), а другий COUNT
+    по всій таблиці ("N total") вимкнено.
+    '''
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = 'admin/estimated_count_change_list.html'
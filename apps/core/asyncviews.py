@@ -0,0 +1,183 @@
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.exceptions import ValidationError
+from django.db import connections, transaction
+from django.http import Http404
+from django.utils.decorators import classonlymethod
+from rest_framework import exceptions, mixins
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+# Методи, які обробляються корутинами; решта йде у звичайний синхронний dispatch
+ASYNC_METHODS = ('GET', 'HEAD')
+
+
+def _make_atomic(view):
+    '''ATOMIC_REQUESTS для синхронної частини: Django не обгортає async-в'юшки в транзакцію'''
+    non_atomic_requests = getattr(view, '_non_atomic_requests', set())
+    for alias, settings_dict in connections.settings.items():
+        if settings_dict['ATOMIC_REQUESTS'] and alias not in non_atomic_requests:
+            view = transaction.atomic(using=alias)(view)
+    return view
+
+
+async def aprefetch_one(instance, name, *related):
+    '''
+    Завантажує зворотний one-to-one (user.subscription) async-запитом і кладе його в кеш об'єкта,
+    щоб серіалізатори читали його в event loop без запиту. Відсутній зв'язок теж кешується:
+    hasattr(user, 'subscription') поверне False.
+    '''
+    relation = getattr(type(instance), name).related
+    value = await relation.related_model._default_manager.select_related(*related).filter(
+        **{relation.field.name: instance}
+    ).afirst()
+    if value is not None:
+        relation.field.set_cached_value(value, instance)
+    relation.set_cached_value(instance, value)
+    return value
+
+
+class AsyncReadMixin:
+    '''
+    GET/HEAD generic-в'юшки DRF як корутина: аутентифікація, вибірка і пагінація
+    через async ORM, тож під ASGI (gunicorn + uvicorn worker) воркер не блокується,
+    поки запит чекає на БД чи зовнішній сервіс. Запис (POST/PUT/PATCH/DELETE)
+    іде звичайним синхронним шляхом у потоці, у транзакції, як з ATOMIC_REQUESTS.
+
+    Серіалізація виконується в event loop, тож queryset має заздалегідь містити все,
+    що читають серіалізатори (select_related / анотації): ліниве завантаження
+    в async-контексті Django забороняє (SynchronousOnlyOperation).
+    '''
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        sync_view = _make_atomic(super().as_view(**initkwargs))
+        delegate = sync_to_async(sync_view)
+
+        async def view(request, *args, **kwargs):
+            if request.method not in ASYNC_METHODS or request.method.lower() not in cls.http_method_names:
+                return await delegate(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            self.setup(request, *args, **kwargs)
+            return await self.async_dispatch(request, *args, **kwargs)
+
+        view.__name__ = cls.__name__
+        view.__module__ = cls.__module__
+        view.__doc__ = cls.__doc__
+        for attr in ('cls', 'initkwargs', 'view_class', 'view_initkwargs', 'csrf_exempt', 'login_required'):
+            if hasattr(sync_view, attr):
+                setattr(view, attr, getattr(sync_view, attr))
+        # Транзакції для запису відкриває delegate, а читання йде без них
+        view._non_atomic_requests = set(connections.settings)
+        return view
+
+    async def async_dispatch(self, request, *args, **kwargs):
+        '''APIView.dispatch для GET/HEAD з await на аутентифікацію і запити'''
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.aauthenticate(request)
+            self.initial(request, *args, **kwargs)
+            response = await self.aget(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aauthenticate(self, request):
+        '''
+        Request._authenticate з await: аутентифікатори з aauthenticate (apps.core.authentication)
+        читають користувача async ORM, решта викликається у потоці.
+        '''
+        for authenticator in request.authenticators:
+            authenticate = getattr(authenticator, 'aauthenticate', None)
+            if authenticate is None:
+                authenticate = sync_to_async(authenticator.authenticate)
+            try:
+                user_auth_tuple = await authenticate(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+    async def aget(self, request, *args, **kwargs):
+        if isinstance(self, mixins.ListModelMixin):
+            return await self.alist(request, *args, **kwargs)
+        return await self.aretrieve(request, *args, **kwargs)
+
+    async def afilter_queryset(self, queryset):
+        # Фільтри можуть робити власні запити (повнотекстовий пошук читає кеш ранжованих id)
+        return await sync_to_async(self.filter_queryset)(queryset)
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        paginate = getattr(self.paginator, 'apaginate_queryset', None)
+        if paginate is None:
+            return await sync_to_async(self.paginator.paginate_queryset)(queryset, self.request, view=self)
+        return await paginate(queryset, self.request, view=self)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer([obj async for obj in queryset], many=True)
+        return Response(serializer.data)
+
+    async def aget_object(self):
+        queryset = await self.afilter_queryset(self.get_queryset())
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+
+def async_api_view(func):
+    '''
+    @api_view(['GET']) для корутини: async def view(request, ...) з async ORM.
+    Декоратори політик (@permission_classes тощо) застосовуються до неї як до звичайної функції.
+    '''
+    async def handler(self, request, *args, **kwargs):
+        return await func(request, *args, **kwargs)
+
+    def sync_handler(self, request, *args, **kwargs):
+        # Для схеми OpenAPI і allowed_methods; запити обробляє handler
+        return async_to_sync(func)(request, *args, **kwargs)
+
+    WrappedAPIView = type(func.__name__, (AsyncReadMixin, APIView), {
+        '__doc__': func.__doc__,
+        '__module__': func.__module__,
+        'http_method_names': ['get', 'options'],
+        'get': sync_handler,
+        'aget': handler,
+    })
+    for attr in ('renderer_classes', 'parser_classes', 'authentication_classes',
+                 'throttle_classes', 'permission_classes', 'schema'):
+        if hasattr(func, attr):
+            setattr(WrappedAPIView, attr, getattr(func, attr))
+    return WrappedAPIView.as_view()
@@ -0,0 +1,81 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+
+class ResponseCache:
+    '''
+    Кеш відрендерених відповідей, згрупованих за "групами".
+    Кожна група має версію в кеші; інвалідація просто збільшує версію,
+    тож старі записи стають недосяжними і доживають свій TTL.
+    '''
+    prefix = 'resp'
+
+    @classmethod
+    def _version_key(cls, group):
+        return f'{cls.prefix}:{group}:version'
+
+    @classmethod
+    def get_version(cls, group):
+        return cache.get_or_set(cls._version_key(group), 1, None)
+
+    @classmethod
+    def versioned_key(cls, group, digest):
+        '''Ключ запису групи в її поточній версії'''
+        return f'{cls.prefix}:{group}:{cls.get_version(group)}:{digest}'
+
+    @classmethod
+    def make_key(cls, group, request):
+        digest = hashlib.md5(
+            f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}".encode('utf-8')
+        ).hexdigest()
+        return cls.versioned_key(group, digest)
+
+    @classmethod
+    def invalidate(cls, *groups):
+        '''Інвалідує групи після коміту поточної транзакції'''
+        def bump():
+            for group in groups:
+                try:
+                    cache.incr(cls._version_key(group))
+                except ValueError:
+                    cache.set(cls._version_key(group), 2, None)
+        transaction.on_commit(bump)
+
+
+def cache_response(group, timeout=None):
+    '''
+    Кешує відрендерену GET-відповідь в'юшки (однакову для всіх відвідувачів).
+    Ставиться над @api_view. TTL — страховка на випадок пропущеної інвалідації.
+    '''
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+
+            key = ResponseCache.make_key(group, request)
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                if hasattr(response, 'render'):
+                    response.render()
+                cache.set(
+                    key,
+                    (response.content, response['Content-Type']),
+                    timeout or settings.RESPONSE_CACHE['TIMEOUT'],
+                )
+                response['X-Cache'] = 'MISS'
+            return response
+        return wrapped
+    return decorator
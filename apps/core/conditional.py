@@ -0,0 +1,153 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.utils.cache import get_conditional_response, patch_vary_headers, quote_etag
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    '''
+    Умовний GET (ETag / Last-Modified) для generic-в'юшок DRF.
+    Валідатор рахується дешевим запитом до серіалізації; якщо клієнт
+    надіслав актуальний If-None-Match / If-Modified-Since — відповідаємо 304
+    без вибірки рядків і серіалізації.
+    '''
+    # Відповідь залежить від користувача (чернетки, can_pin, профіль)
+    conditional_vary_headers = ('Authorization',)
+
+    def get_validators(self, request, *args, **kwargs):
+        '''
+        Повертає (частини ETag, last_modified) або None, якщо валідатор
+        порахувати не можна (тоді запит обробляється як звичайно).
+        '''
+        return None
+
+    def on_not_modified(self, request, *args, **kwargs):
+        '''Викликається перед відповіддю 304'''
+
+    async def aon_not_modified(self, request, *args, **kwargs):
+        '''on_not_modified для async-в'юшок; за замовчуванням — синхронний у потоці'''
+        await sync_to_async(self.on_not_modified)(request, *args, **kwargs)
+
+    def make_etag(self, request, parts):
+        source = '|'.join(str(part) for part in (request.META.get('HTTP_ACCEPT', ''), *parts))
+        return quote_etag(hashlib.md5(source.encode('utf-8')).hexdigest())
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators(request, *args, **kwargs)
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+
+        etag, timestamp, response = self.evaluate_preconditions(request, validators, *args, **kwargs)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        elif response.status_code == 304:
+            self.on_not_modified(request, *args, **kwargs)
+        return self.set_validators(response, etag, timestamp)
+
+    async def aget_validators(self, request, *args, **kwargs):
+        '''get_validators для async-в'юшок (AsyncReadMixin); за замовчуванням — синхронний у потоці'''
+        return await sync_to_async(self.get_validators)(request, *args, **kwargs)
+
+    async def aget(self, request, *args, **kwargs):
+        validators = await self.aget_validators(request, *args, **kwargs)
+        if validators is None:
+            return await super().aget(request, *args, **kwargs)
+
+        etag, timestamp, response = self.evaluate_preconditions(request, validators, *args, **kwargs)
+        if response is None:
+            response = await super().aget(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        elif response.status_code == 304:
+            await self.aon_not_modified(request, *args, **kwargs)
+        return self.set_validators(response, etag, timestamp)
+
+    def evaluate_preconditions(self, request, validators, *args, **kwargs):
+        '''(etag, timestamp, відповідь 304/412 або None, якщо потрібна повна відповідь)'''
+        parts, last_modified = validators
+        etag = self.make_etag(request, parts)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        return etag, timestamp, response
+
+    def set_validators(self, response, etag, timestamp):
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        patch_vary_headers(response, self.conditional_vary_headers)
+        return response
+
+
+def page_state(objects):
+    '''
+    Завантажені значення рядків сторінки для ETag: колонки, анотації і закешовані FK
+    (author, category після select_related). Відкладені колонки у відповідь не потрапляють,
+    тож і у валідатор теж.
+    '''
+    return [_instance_state(obj, related=True) for obj in objects]
+
+
+def _instance_state(obj, related=False):
+    state = sorted((name, str(value)) for name, value in obj.__dict__.items() if not name.startswith('_'))
+    if related:
+        # Один рівень: зворотні one-to-one посилаються назад на об'єкт
+        state += sorted(
+            (name, _instance_state(value)) for name, value in obj._state.fields_cache.items() if value is not None
+        )
+    return state
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    '''
+    Умовний GET для списків: валідатор рахується з уже вибраної сторінки (get_page_validators),
+    а не агрегатом по всій вибірці, тож його ціна не росте з таблицею. Сторінка вибирається
+    завжди; 304 заощаджує серіалізацію і передачу. Last-Modified не ставиться: зникнення рядка
+    зі сторінки не видно з дат рядків, що лишились.
+    '''
+
+    def get_validators(self, request, *args, **kwargs):
+        return None
+
+    async def aget_validators(self, request, *args, **kwargs):
+        return None
+
+    def get_page_validators(self, request, objects):
+        '''(частини ETag, last_modified) для рядків сторінки'''
+        return (sorted(request.query_params.lists()), request.user.pk, page_state(objects)), None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        objects = list(queryset) if page is None else page
+        response = self.conditional_list_response(request, objects, page is not None, *args, **kwargs)
+        if response.status_code == 304:
+            self.on_not_modified(request, *args, **kwargs)
+        return response
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        objects = [obj async for obj in queryset] if page is None else page
+        response = self.conditional_list_response(request, objects, page is not None, *args, **kwargs)
+        if response.status_code == 304:
+            await self.aon_not_modified(request, *args, **kwargs)
+        return response
+
+    def conditional_list_response(self, request, objects, paginated, *args, **kwargs):
+        parts, last_modified = self.get_page_validators(request, objects)
+        if paginated:
+            # count і посилання next/previous — теж частина відповіді
+            meta = self.get_paginated_response([]).data
+            parts = (*parts, sorted((name, str(value)) for name, value in meta.items() if name != 'results'))
+
+        etag, timestamp, response = self.evaluate_preconditions(request, (parts, last_modified), *args, **kwargs)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(objects, many=True)
+        response = self.get_paginated_response(serializer.data) if paginated else Response(serializer.data)
+        return self.set_validators(response, etag, timestamp)
@@ -0,0 +1,102 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import PrimaryKeyRelatedField, RelatedField
+
+
+class SparseFieldsetMixin:
+    '''
+    Часткові відповіді: ?fields=id,title віддає лише перелічені поля, ?omit=content — всі, крім перелічених.
+    Непотрібні поля прибираються ще до серіалізації, тож SerializerMethodField-и не викликаються.
+    Невідомі назви ігноруються (ті самі параметри застосовуються і до вкладених серіалізаторів).
+
+    Meta.sparse_field_sources — що потрібно з queryset для полів, яких не видно з моделі
+    (методи, властивості): кортеж локальних полів (author_id — лише колонка) і зв'язків
+    для select_related (author, subscription__plan). Порожній кортеж — поле бере дані
+    з анотацій або робить власний запит.
+    '''
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.get_requested_fields(self.context.get('request'))
+        if requested is not None:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+    @classmethod
+    def _parse(cls, request, param):
+        value = request.query_params.get(param)
+        if value is None:
+            return None
+        return {name.strip() for name in value.split(',') if name.strip()}
+
+    @classmethod
+    def requested_field_names(cls, request, available):
+        '''Назви полів, які лишаються, або None, якщо часткову відповідь не запитано'''
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        only = cls._parse(request, cls.fields_query_param)
+        omit = cls._parse(request, cls.omit_query_param)
+        if only is None and omit is None:
+            return None
+
+        names = set(available)
+        if only is not None:
+            names &= only
+        if omit is not None:
+            names -= omit
+        return names
+
+    def get_requested_fields(self, request):
+        return self.requested_field_names(request, self.fields)
+
+    @classmethod
+    def sparse_queryset(cls, queryset, request):
+        '''
+        Звужує queryset під запитані поля: only() по потрібних колонках і select_related
+        лише для потрібних зв'язків. Якщо для якогось поля невідомо, що йому треба, queryset не змінюється.
+        '''
+        serializer = cls(context={'request': request})
+        if serializer.get_requested_fields(request) is None:
+            return queryset
+
+        model = queryset.model
+        sources = getattr(cls.Meta, 'sparse_field_sources', {})
+        columns = {model._meta.pk.name}
+        relations = set()
+
+        for name, field in serializer.fields.items():
+            if name in sources:
+                for path in sources[name]:
+                    local = model._meta.get_field(path.split('__')[0])
+                    if local.is_relation and path != local.attname:
+                        relations.add(path)
+                    columns.add(local.name)
+                continue
+
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                return queryset
+            if not model_field.concrete:
+                return queryset
+
+            columns.add(model_field.name)
+            if model_field.is_relation and isinstance(field, RelatedField) \
+                    and not isinstance(field, PrimaryKeyRelatedField):
+                # StringRelatedField і подібні потребують сам об'єкт
+                relations.add(model_field.name)
+
+        return queryset.select_related(None).select_related(*relations).only(*columns)
+
+
+class SparseFieldsetViewMixin:
+    '''Звужує queryset generic-в'юшки під ?fields= / ?omit= її серіалізатора'''
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, SparseFieldsetMixin):
+            queryset = serializer_class.sparse_queryset(queryset, self.request)
+        return queryset
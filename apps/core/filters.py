@@ -0,0 +1,114 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.cache import cache
+from django.db.models import BigIntegerField, F, Func, Value
+from rest_framework.filters import BaseFilterBackend
+
+from .cache import ResponseCache
+
+
+class ArrayPosition(Func):
+    function = 'array_position'
+    output_field = BigIntegerField()
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    '''
+    Повнотекстовий пошук PostgreSQL по колонці tsvector (GIN-індекс) замість ILIKE.
+    Результати ранжуються SearchRank, якщо клієнт не передав ?ordering= явно.
+    Для популярних запитів (>= CACHE_MIN_HITS за CACHE_TIMEOUT) повний ранжований список id
+    кешується в групі ResponseCache моделі (cache_group), і повторний запит читає сторінку по pk
+    без обчислення рангу. Список не обрізається — count точний; збереження чи видалення
+    рядка моделі інвалідує групу (apps.main.signals), тож нові збіги видно одразу.
+    Якщо збігів більше за CACHE_MAX_IDS, ранг рахується щоразу.
+    Бекенд має стояти після OrderingFilter, щоб сортування за релевантністю не перезаписувалось.
+    '''
+    search_param = 'search'
+    search_description = 'Повнотекстовий пошук (підтримує "фрази", OR та -виключення).'
+    rank_annotation = 'search_rank'
+    position_annotation = 'search_position'
+
+    @staticmethod
+    def cache_group(model):
+        return f'search:{model._meta.label_lower}'
+
+    def get_search_terms(self, request):
+        terms = request.query_params.get(self.search_param, '')
+        return ' '.join(terms.replace('\x00', '').split())
+
+    def get_search_vector_field(self, view):
+        return getattr(view, 'search_vector_field', 'search_vector')
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        vector = F(self.get_search_vector_field(view))
+        query = SearchQuery(terms, search_type='websearch', config=settings.FULL_TEXT_SEARCH['CONFIG'])
+        matches = queryset.filter(**{self.get_search_vector_field(view): query})
+
+        if 'ordering' in request.query_params:
+            return matches
+        ordering = list(queryset.query.order_by)
+        ranked = matches.annotate(
+            **{self.rank_annotation: SearchRank(vector, query)}
+        ).order_by(f'-{self.rank_annotation}', *ordering)
+
+        ranked_ids = self.get_ranked_ids(ranked, terms)
+        if ranked_ids is None:
+            return ranked
+        # Ранг з кешу: позиція id у збереженому списку
+        return queryset.filter(pk__in=ranked_ids).annotate(**{
+            self.position_annotation: ArrayPosition(Value(ranked_ids, ArrayField(BigIntegerField())), F('pk'))
+        }).order_by(self.position_annotation)
+
+    def get_ranked_ids(self, ranked, terms):
+        '''
+        Ранжований список id з кешу (або щойно збережений для популярного запиту).
+        None — ранг рахується запитом: запит ще не популярний, збігів немає або забагато для кешу.
+        '''
+        options = settings.FULL_TEXT_SEARCH
+        # SQL відфільтрованого queryset у ключі: кеш не змішує видимість різних користувачів
+        digest = hashlib.md5(f'{ranked.query}|{terms}'.encode('utf-8')).hexdigest()
+        # Версія читається до вибірки: інвалідація після неї не залишить старий список під новою версією
+        key = ResponseCache.versioned_key(self.cache_group(ranked.model), digest)
+        ranked_ids = cache.get(key)
+        if ranked_ids is not None:
+            return ranked_ids or None
+        if not self._is_popular(digest, options):
+            return None
+
+        ranked_ids = list(ranked.values_list('pk', flat=True)[:options['CACHE_MAX_IDS'] + 1])
+        if len(ranked_ids) > options['CACHE_MAX_IDS']:
+            # Порожній список у кеші: ранг і далі рахується запитом, без повторної вибірки id
+            ranked_ids = []
+        cache.set(key, ranked_ids, options['CACHE_TIMEOUT'])
+        return ranked_ids or None
+
+    def _is_popular(self, digest, options):
+        hits_key = f'fts:hits:{digest}'
+        if cache.add(hits_key, 1, options['CACHE_TIMEOUT']):
+            hits = 1
+        else:
+            try:
+                hits = cache.incr(hits_key)
+            except ValueError:
+                hits = 1
+        return hits >= options['CACHE_MIN_HITS']
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.search_param,
+                'required': False,
+                'in': 'query',
+                'description': self.search_description,
+                'schema': {
+                    'type': 'string',
+                },
+            },
+        ]
@@ -0,0 +1,165 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField, RelatedField
+
+
+class RelationLoader:
+    '''
+    Завантажувач зв'язків на час запиту (DataLoader). Ключі зв'язку збираються з усіх об'єктів
+    сторінки, і кожна модель добирається одним запитом WHERE key IN (...). Завантажене
+    запам'ятовується до кінця запиту і кладеться в кеш зв'язків Django, тож obj.author
+    у серіалізаторах запиту вже не робить. Автор, що прийшов з одним списком, вдруге не читається.
+    Підтримуються FK, прямий і зворотний one-to-one (user.subscription).
+    '''
+
+    def __init__(self):
+        # (модель, поле, значення) -> об'єкт; None — такого рядка немає
+        self._memo = {}
+
+    @classmethod
+    def for_context(cls, context):
+        '''Loader запиту з контексту серіалізатора; без запиту — на час серіалізації'''
+        request = context.get('request')
+        if request is None:
+            return context.setdefault('relation_loader', cls())
+        http_request = getattr(request, '_request', request)
+        loader = getattr(http_request, '_relation_loader', None)
+        if loader is None:
+            loader = http_request._relation_loader = cls()
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                # Поточний користувач уже завантажений аутентифікацією
+                loader.prime(user)
+        return loader
+
+    def prime(self, obj):
+        self._memo[(type(obj), obj._meta.pk.name, obj.pk)] = obj
+
+    def load_many(self, model, field_name, values):
+        '''{значення: об'єкт} для рядків model з field_name in values; бракує — одним запитом'''
+        values = set(values)
+        missing = [value for value in values if (model, field_name, value) not in self._memo]
+        if missing:
+            attname = model._meta.get_field(field_name).attname
+            # _base_manager — як у дескрипторів зв'язків Django
+            found = {
+                getattr(obj, attname): obj
+                for obj in model._base_manager.filter(**{f'{field_name}__in': missing})
+            }
+            for value in missing:
+                self._memo[(model, field_name, value)] = found.get(value)
+        return {value: self._memo[(model, field_name, value)] for value in values}
+
+    def prefetch(self, instances, *paths):
+        '''Завантажує зв'язки (author, subscription__plan) однотипних instances, яких ще немає в кеші'''
+        for path in paths:
+            level = [obj for obj in instances if obj is not None]
+            for name in path.split('__'):
+                if not level:
+                    break
+                level = self._load_relation(level, name)
+
+    def _load_relation(self, instances, name):
+        field = type(instances[0])._meta.get_field(name)
+        pending = [obj for obj in instances if not field.is_cached(obj)]
+
+        if field.concrete and (field.many_to_one or field.one_to_one):
+            if pending:
+                target = field.target_field
+                loaded = self.load_many(
+                    field.related_model, target.name,
+                    {value for value in (getattr(obj, field.attname) for obj in pending) if value is not None},
+                )
+                for obj in pending:
+                    value = getattr(obj, field.attname)
+                    field.set_cached_value(obj, None if value is None else loaded[value])
+        elif field.one_to_one:
+            if pending:
+                remote = field.field
+                loaded = self.load_many(field.related_model, remote.name, {obj.pk for obj in pending})
+                for obj in pending:
+                    related = loaded[obj.pk]
+                    field.set_cached_value(obj, related)
+                    if related is not None:
+                        remote.set_cached_value(related, obj)
+        else:
+            raise ValueError(f'{type(instances[0]).__name__}.{name}: підтримуються лише FK і one-to-one')
+
+        related = {}
+        for obj in instances:
+            value = field.get_cached_value(obj, default=None)
+            if value is not None:
+                related[id(value)] = value
+        return list(related.values())
+
+
+class BatchListSerializer(serializers.ListSerializer):
+    '''Перед серіалізацією сторінки добирає зв'язки всіх її об'єктів (BatchRelationsMixin.load_relations)'''
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.child.load_relations(items)
+        return [self.child.to_representation(item) for item in items]
+
+
+class BatchRelationsMixin:
+    '''
+    Зв'язки, які читають поля серіалізатора, беруться через RelationLoader запиту: для списку
+    (many=True) — пакетом на всю сторінку, тож кількість запитів не залежить від її розміру.
+    Що потрібно полям, береться з Meta.sparse_field_sources (як у SparseFieldsetMixin), вкладених
+    серіалізаторів і RelatedField-ів; прибрані ?fields= поля нічого не завантажують.
+    Якщо в'юшка вже зробила select_related, запитів немає. Для async-в'юшок (серіалізація в event loop)
+    queryset і далі має містити все потрібне: loader лише не робить запитів за вже завантаженим.
+    '''
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        meta = getattr(cls, 'Meta', None)
+        if meta is not None and not hasattr(meta, 'list_serializer_class'):
+            meta.list_serializer_class = BatchListSerializer
+
+    @property
+    def relation_loader(self):
+        return RelationLoader.for_context(self.context)
+
+    def get_relation_paths(self):
+        paths = getattr(self, '_relation_paths', None)
+        if paths is not None:
+            return paths
+
+        model = self.Meta.model
+        sources = getattr(self.Meta, 'sparse_field_sources', {})
+        paths = set()
+        for name, field in self.fields.items():
+            if name in sources:
+                for path in sources[name]:
+                    local = model._meta.get_field(path.split('__')[0])
+                    if local.is_relation and path != local.attname:
+                        paths.add(path)
+                continue
+            if field.source == '*' or len(field.source_attrs) != 1:
+                continue
+            try:
+                model_field = model._meta.get_field(field.source_attrs[0])
+            except FieldDoesNotExist:
+                continue
+            if not model_field.is_relation or model_field.many_to_many or model_field.one_to_many:
+                continue
+            if isinstance(field, serializers.BaseSerializer) or (
+                    isinstance(field, RelatedField) and not isinstance(field, PrimaryKeyRelatedField)):
+                paths.add(model_field.name)
+
+        self._relation_paths = paths = sorted(paths)
+        return paths
+
+    def load_relations(self, instances):
+        paths = self.get_relation_paths()
+        if paths and instances:
+            self.relation_loader.prefetch(instances, *paths)
+
+    def to_representation(self, instance):
+        # Окремий об'єкт — теж через loader: зв'язки запам'ятовуються до кінця запиту
+        if not isinstance(self.parent, BatchListSerializer):
+            self.load_relations([instance])
+        return super().to_representation(instance)
@@ -0,0 +1,124 @@
+import asyncio
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.accounts.models import User
+from apps.main.models import Category, Post
+from apps.payment.models import Payment
+from apps.payment.services import StripeService
+
+
+class Command(BaseCommand):
+    help = (
+        'Порівнює, скільки запитів один процес обслуговує одночасно: послідовно, як синхронний '
+        'WSGI-воркер, і конкурентно через ASGI на суміші стрічки, поста і статусу платежу з повільним Stripe'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=60, help='Кількість запитів у суміші')
+        parser.add_argument('--slow-share', type=float, default=0.5,
+                            help='Частка запитів статусу платежу (з викликом Stripe)')
+        parser.add_argument('--stripe-delay', type=int, default=200, help='Затримка відповіді Stripe, мс')
+        parser.add_argument('--concurrency', type=int, default=50,
+                            help='Скільки запитів ASGI-процес обробляє одночасно')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['slow_share'] <= 1:
+            raise CommandError('--slow-share має бути між 0 і 1')
+
+        delay = options['stripe_delay'] / 1000
+
+        def retrieve_session(session_id):
+            # Мережевий виклик до Stripe, що блокує потік
+            time.sleep(delay)
+            return {'status': 'unpaid'}
+
+        user, urls = self.create_fixtures(options['requests'], options['slow_share'])
+        auth = f'Bearer {RefreshToken.for_user(user).access_token}'
+        try:
+            # Тестові клієнти Django ходять на хост testserver
+            with mock.patch.object(StripeService, 'retrieve_session', staticmethod(retrieve_session)), \
+                    override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                self.run_sync(urls[:1], auth)  # прогрів: імпорти, з'єднання з БД
+                results = [
+                    ('sync (WSGI worker)', self.run_sync(urls, auth)),
+                    ('async (ASGI)', asyncio.run(self.run_async(urls, auth, options['concurrency']))),
+                ]
+        finally:
+            user.delete()
+
+        slow = sum(1 for url in urls if 'payments' in url)
+        self.stdout.write(
+            f'{len(urls)} запитів, з них {slow} зі Stripe ({options["stripe_delay"]} мс), один процес'
+        )
+        self.stdout.write(f'{"mode":<20}{"wall, s":>9}{"req/s":>9}{"p50, ms":>10}{"p95, ms":>10}{"concurrency":>13}')
+        for label, (wall, latencies) in results:
+            latencies = sorted(latencies)
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            self.stdout.write(
+                f'{label:<20}{wall:>9.2f}{len(latencies) / wall:>9.1f}{statistics.median(latencies) * 1000:>10.1f}'
+                f'{p95 * 1000:>10.1f}{sum(latencies) / wall:>13.1f}'
+            )
+        speedup = results[0][1][0] / results[1][1][0]
+        self.stdout.write(self.style.SUCCESS(f'ASGI: у {speedup:.1f}x швидше на тій самій суміші'))
+
+    def create_fixtures(self, count, slow_share):
+        '''Тимчасові користувач, пост і платіж; видаляються разом з користувачем'''
+        suffix = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(username=f'benchmark-{suffix}', email=f'benchmark-{suffix}@example.com')
+        category = Category.objects.order_by('pk').first() or Category.objects.create(name=f'Benchmark {suffix}')
+        post = Post.objects.create(
+            title=f'Benchmark {suffix}', content='Текст ' * 200, author=user, category=category, status='published'
+        )
+        payment = Payment.objects.create(
+            user=user, amount=Decimal('12.00'), status='pending', stripe_session_id=f'cs_benchmark_{suffix}'
+        )
+
+        slow_url = reverse('payment-status', kwargs={'payment_id': payment.pk})
+        fast_urls = [reverse('post-list'), reverse('post-detail', kwargs={'slug': post.slug})]
+        slow_every = round(1 / slow_share) if slow_share else 0
+        urls = [
+            slow_url if slow_every and i % slow_every == 0 else fast_urls[i % len(fast_urls)]
+            for i in range(count)
+        ]
+        return user, urls
+
+    def check_response(self, response, url):
+        if response.status_code != 200:
+            raise CommandError(f'{url}: HTTP {response.status_code}')
+
+    def run_sync(self, urls, auth):
+        client = Client(HTTP_AUTHORIZATION=auth)
+        latencies = []
+        started = time.perf_counter()
+        for url in urls:
+            request_started = time.perf_counter()
+            self.check_response(client.get(url), url)
+            latencies.append(time.perf_counter() - request_started)
+        return time.perf_counter() - started, latencies
+
+    async def run_async(self, urls, auth, concurrency):
+        # Stripe викликається через sync_to_async(thread_sensitive=False) — у пулі потоків
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(url):
+            async with semaphore:
+                request_started = time.perf_counter()
+                self.check_response(await client.get(url, headers={'Authorization': auth}), url)
+                return time.perf_counter() - request_started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(fetch(url) for url in urls))
+        return time.perf_counter() - started, latencies
@@ -0,0 +1,100 @@
+import copy
+import importlib.util
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.db.utils import load_backend
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from apps.core.postgresql.metrics import connection_acquired, connection_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Порівнює затримку запиту з новим з'єднанням з БД на кожен запит, з постійним з'єднанням "
+        "(CONN_MAX_AGE) і з пулом psycopg (якщо встановлено psycopg[pool])"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Кількість послідовних запитів на режим')
+        parser.add_argument('--url-name', default='category-list', help='В\'юшка, яку запитувати (url name)')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests має бути додатнім')
+        url = reverse(options['url_name'])
+        base_settings = connections.settings[DEFAULT_DB_ALIAS]
+
+        modes = [
+            ('new connection', {'CONN_MAX_AGE': 0, 'OPTIONS': self.options_without_pool(base_settings)}),
+            ('persistent', {'CONN_MAX_AGE': 600, 'OPTIONS': self.options_without_pool(base_settings)}),
+        ]
+        if importlib.util.find_spec('psycopg') and importlib.util.find_spec('psycopg_pool'):
+            pool_options = {**self.options_without_pool(base_settings), 'pool': {'min_size': 1, 'max_size': 4}}
+            modes.append(('pool', {'CONN_MAX_AGE': 0, 'OPTIONS': pool_options}))
+        else:
+            self.stdout.write(self.style.WARNING('psycopg[pool] не встановлено — режим pool пропущено'))
+
+        # Тестовий клієнт Django ходить на хост testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            results = [(label, *self.run_mode(base_settings, overrides, url, options['requests']))
+                       for label, overrides in modes]
+
+        self.stdout.write(f'{options["requests"]} послідовних GET {url}, один потік')
+        self.stdout.write(f'{"mode":<16}{"p50, ms":>10}{"p95, ms":>10}{"mean, ms":>10}{"created":>9}{"acquire, ms":>13}')
+        for label, latencies, stats in results:
+            latencies = sorted(latencies)
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            self.stdout.write(
+                f'{label:<16}{statistics.median(latencies) * 1000:>10.2f}{p95 * 1000:>10.2f}'
+                f'{statistics.fmean(latencies) * 1000:>10.2f}{stats["created"]:>9}{stats["acquire_ms"]:>13.3f}'
+            )
+
+    def options_without_pool(self, settings_dict):
+        return {key: value for key, value in settings_dict.get('OPTIONS', {}).items() if key != 'pool'}
+
+    def run_mode(self, base_settings, overrides, url, count):
+        '''Підміняє з'єднання default на час прогону; з'єднання рахуються через сигнал connection_acquired'''
+        settings_dict = {**copy.deepcopy(base_settings), **overrides}
+        original = connections[DEFAULT_DB_ALIAS]
+        wrapper = load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, DEFAULT_DB_ALIAS)
+        connections[DEFAULT_DB_ALIAS] = wrapper
+        client = Client()
+        acquired = []
+
+        def on_acquired(sender, alias, seconds, pooled, **kwargs):
+            acquired.append(seconds)
+
+        try:
+            self.fetch(client, url)  # прогрів: імпорти, перше з'єднання
+            connection_acquired.connect(on_acquired)
+            latencies = []
+            for _ in range(count):
+                started = time.perf_counter()
+                self.fetch(client, url)
+                latencies.append(time.perf_counter() - started)
+            stats = connection_stats()[DEFAULT_DB_ALIAS]
+        finally:
+            connection_acquired.disconnect(on_acquired)
+            wrapper.close()
+            if wrapper.pool is not None:
+                wrapper.close_pool()
+            connections[DEFAULT_DB_ALIAS] = original
+
+        return latencies, {
+            # З пулом фізичні з'єднання відкриває пул; без нього кожне взяте з'єднання — нове
+            'created': stats['pool']['connections_num'] if stats['pool'] else len(acquired),
+            'acquire_ms': statistics.fmean(acquired) * 1000 if acquired else 0.0,
+        }
+
+    def fetch(self, client, url):
+        # Тестовий клієнт не закриває з'єднання на request_started/request_finished, як WSGIHandler
+        close_old_connections()
+        response = client.get(url)
+        close_old_connections()
+        if response.status_code != 200:
+            raise CommandError(f'{url}: HTTP {response.status_code}')
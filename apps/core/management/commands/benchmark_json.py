@@ -0,0 +1,87 @@
+import timeit
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.accounts.models import User
+from apps.core.renderers import FastJSONRenderer, orjson
+from apps.main.models import Category, Post
+from apps.main.serializers import PostListSerializer
+from apps.payment.models import Payment
+from apps.payment.serializer import PaymentSerializer
+
+
+class Command(BaseCommand):
+    help = 'Порівнює час рендерингу JSON: стандартний JSONRenderer проти FastJSONRenderer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500, help='Кількість елементів у кожному payload')
+        parser.add_argument('--repeat', type=int, default=20, help='Скільки разів рендерити кожен payload')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson не встановлено: FastJSONRenderer працює через стандартний json'))
+
+        rows = options['rows']
+        payloads = self.build_payloads(rows)
+        renderers = [('stdlib', JSONRenderer()), ('fast', FastJSONRenderer())]
+
+        self.stdout.write(f'{"payload":<22}{"size, KB":>10}{"stdlib, ms":>13}{"fast, ms":>11}{"speedup":>10}')
+        for name, data in payloads.items():
+            expected = renderers[0][1].render(data)
+            timings = {}
+            for label, renderer in renderers:
+                best = min(timeit.repeat(lambda: renderer.render(data), number=options['repeat'], repeat=5))
+                timings[label] = best / options['repeat'] * 1000
+            same = FastJSONRenderer().render(data) == expected
+            self.stdout.write(
+                f'{name:<22}{len(expected) / 1024:>10.1f}{timings["stdlib"]:>13.3f}{timings["fast"]:>11.3f}'
+                f'{timings["stdlib"] / timings["fast"]:>9.1f}x' + ('' if same else '  (output differs)')
+            )
+
+    def build_payloads(self, rows):
+        '''Дані без БД: незбережені моделі, прогнані через реальні серіалізатори'''
+        now = timezone.now()
+        request = Request(APIRequestFactory().get('/api/v1/posts/', HTTP_HOST='localhost'))
+        author = User(id=1, username='author', email='author@example.com', first_name='Олена', last_name='Коваль')
+        category = Category(id=1, name='Технології', slug='tech')
+
+        posts = []
+        for i in range(rows):
+            post = Post(
+                id=i, title=f'Новина №{i}: огляд подій', slug=f'post-{i}', excerpt='Текст новини ' * 16,
+                author=author, category=category, status='published', image=f'posts/{i}.jpg' if i % 3 else '',
+                created_at=now - timedelta(hours=i), updated_at=now, views_count=i * 17,
+            )
+            post.comments_count = i % 7
+            post.pin_is_active = i < 3
+            post.pinned_at = now if i < 3 else None
+            post.pinned_by_id = author.id if i < 3 else None
+            post.pinned_by_username = author.username if i < 3 else None
+            posts.append(post)
+
+        payments = [
+            Payment(
+                id=i, user=author, amount=Decimal('12.00'), currency='usd', status='succeeded',
+                payment_method='stripe', description='Premium Monthly', created_at=now, updated_at=now,
+            )
+            for i in range(rows)
+        ]
+
+        return {
+            'post_list': PostListSerializer(posts, many=True, context={'request': request}).data,
+            'payment_history': {
+                'count': rows,
+                'results': PaymentSerializer(payments, many=True).data,
+            },
+            # Як у pinned_post_list/аналітиці: сирі datetime і Decimal без серіалізатора
+            'raw_values': [
+                {'id': i, 'amount': Decimal('12.50') * i, 'created_at': now - timedelta(minutes=i), 'title': f'Пост {i}'}
+                for i in range(rows)
+            ],
+        }
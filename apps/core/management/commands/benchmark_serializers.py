@@ -0,0 +1,114 @@
+import timeit
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.accounts.models import User
+from apps.core.renderers import FastJSONRenderer
+from apps.main.models import Category, Post
+from apps.main.serializers import PostListSerializer
+
+
+class StockPostListSerializer(PostListSerializer):
+    '''PostListSerializer зі стандартним ModelSerializer.to_representation замість скомпільованого'''
+    to_representation = serializers.ModelSerializer.to_representation
+
+
+class Command(BaseCommand):
+    help = (
+        'Порівнює серіалізацію сторінки /api/v1/posts/: стандартний ModelSerializer проти '
+        'CompiledRepresentationMixin, і скільки з цього часу займає побудова екземплярів моделі з рядків'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=settings.REST_FRAMEWORK['PAGE_SIZE'],
+                            help='Кількість постів на сторінці')
+        parser.add_argument('--repeat', type=int, default=200, help='Скільки разів обробляти сторінку в одному замірі')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['repeat'] < 1:
+            raise CommandError('--rows і --repeat мають бути додатніми')
+
+        rows = self.seed_rows(options['rows'])
+        page = self.from_rows(rows)
+        request = Request(APIRequestFactory().get('/api/v1/posts/', HTTP_HOST='localhost'))
+        renderer = FastJSONRenderer()
+
+        def serialize(serializer_class):
+            return renderer.render(serializer_class(page, many=True, context={'request': request}).data)
+
+        stock, compiled = serialize(StockPostListSerializer), serialize(PostListSerializer)
+        if stock != compiled:
+            raise CommandError('Скомпільований шлях дає інший JSON, ніж стандартний')
+
+        stages = [
+            ('рядки -> екземпляри', lambda: self.from_rows(rows)),
+            ('stock serializer', lambda: serialize(StockPostListSerializer)),
+            ('compiled serializer', lambda: serialize(PostListSerializer)),
+        ]
+        timings = {}
+        for label, stage in stages:
+            best = min(timeit.repeat(stage, number=options['repeat'], repeat=5))
+            timings[label] = best / options['repeat'] * 1000
+
+        self.stdout.write(f'Сторінка з {options["rows"]} постів, JSON {len(compiled) / 1024:.1f} KB (однаковий)')
+        self.stdout.write(f'{"етап":<24}{"ms/сторінку":>13}{"сторінок/с":>12}')
+        for label, ms in timings.items():
+            self.stdout.write(f'{label:<24}{ms:>13.3f}{1000 / ms:>12.0f}')
+        self.stdout.write(
+            f'compiled швидший у {timings["stock serializer"] / timings["compiled serializer"]:.1f}x; '
+            f'екземпляри моделі — {timings["рядки -> екземпляри"] / timings["compiled serializer"]:.0%} '
+            'від часу скомпільованої серіалізації'
+        )
+
+    def seed_rows(self, count):
+        '''Рядки, які повертає запит Post.objects.for_list(): колонки поста, автора, категорії та анотації'''
+        now = timezone.now()
+        author = {
+            'id': 1, 'username': 'author', 'email': 'author@example.com',
+            'first_name': 'Олена', 'last_name': 'Коваль', 'updated_at': now,
+        }
+        category = {'id': 1, 'name': 'Технології', 'slug': 'tech', 'updated_at': now}
+        rows = []
+        for i in range(count):
+            post = {
+                'id': i, 'title': f'Новина №{i}: огляд подій', 'slug': f'post-{i}', 'excerpt': 'Текст новини ' * 16,
+                'author_id': 1, 'category_id': 1, 'status': 'published',
+                'image': f'posts/{i}.jpg' if i % 3 else '', 'image_renditions': {},
+                'created_at': now - timedelta(hours=i), 'updated_at': now, 'views_count': i * 17,
+            }
+            annotations = {
+                'comments_count': i % 7,
+                'pin_is_active': i < 3,
+                'pinned_at': now if i < 3 else None,
+                'pinned_by_id': 1 if i < 3 else None,
+                'pinned_by_username': 'author' if i < 3 else None,
+            }
+            rows.append((
+                self.columns(Post, post), self.columns(User, author), self.columns(Category, category), annotations,
+            ))
+        return rows
+
+    @staticmethod
+    def columns(model, values):
+        '''(імена, значення) у порядку колонок моделі, як їх передає в from_db ORM; решта полів відкладені'''
+        names = [field.attname for field in model._meta.concrete_fields if field.attname in values]
+        return names, [values[name] for name in names]
+
+    @staticmethod
+    def from_rows(rows):
+        '''Те, що ModelIterable робить із рядком: Model.from_db для поста і select_related, потім анотації'''
+        page = []
+        for post_row, author_row, category_row, annotations in rows:
+            post = Post.from_db('default', *post_row)
+            post.author = User.from_db('default', *author_row)
+            post.category = Category.from_db('default', *category_row)
+            for name, value in annotations.items():
+                setattr(post, name, value)
+            page.append(post)
+        return page
@@ -0,0 +1,65 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.renditions import RENDITIONS_SUFFIX, ImageRenditionService, render_variants
+
+
+class Command(BaseCommand):
+    help = 'Генерує зменшені варіанти для зображень, завантажених до появи пайплайна (або для всіх з --all)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перегенерувати варіанти навіть для актуальних зображень',
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=settings.IMAGE_RENDITIONS['PROCESSES'],
+            help='Скільки процесів рендерять зображення паралельно',
+        )
+
+    def handle(self, *args, **options):
+        rendition_options = settings.IMAGE_RENDITIONS
+        processes = max(options['processes'], 1)
+        generated = 0
+
+        # Pillow рендерить у пулі процесів; читання оригіналів і запис у сховище/БД — у головному
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            for model, field_name, sizes in ImageRenditionService.configured_fields():
+                queryset = model._default_manager.exclude(**{field_name: ''}).exclude(
+                    **{f'{field_name}__isnull': True}
+                ).order_by('pk').only('pk', field_name, field_name + RENDITIONS_SUFFIX)
+
+                pending = []
+                for instance in queryset.iterator():
+                    if not options['all'] and ImageRenditionService.is_current(getattr(instance, field_name)):
+                        continue
+                    source = ImageRenditionService.read_source(model, instance.pk, field_name, force=True)
+                    if source is None:
+                        continue
+                    source_name, data = source
+                    future = pool.submit(render_variants, data, sizes, rendition_options['FORMATS'], rendition_options['QUALITY'])
+                    pending.append((instance.pk, source_name, future))
+                    # Не тримаємо в пам'яті більше оригіналів, ніж процеси встигають обробити
+                    if len(pending) >= processes * 2:
+                        generated += self._store(model, field_name, pending.pop(0))
+                while pending:
+                    generated += self._store(model, field_name, pending.pop(0))
+
+        self.stdout.write(self.style.SUCCESS(f'Готово: згенеровано варіанти для {generated} зображень'))
+
+    def _store(self, model, field_name, item):
+        pk, source_name, future = item
+        try:
+            variants = future.result()
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f'{model._meta.label} #{pk}: {e}'))
+            return 0
+        stored = ImageRenditionService.store(model, pk, field_name, source_name, variants)
+        if stored:
+            self.stdout.write(f'{model._meta.label} #{pk}: {source_name}')
+        return int(stored)
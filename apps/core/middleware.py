@@ -0,0 +1,104 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .authentication import JWTAuthentication
+from .routers import RequestRouting, _request_routing, choose_replica, is_sticky, stick_to_primary
+from .transactions import ATOMIC, call_view, view_policy
+
+
+class ReplicaRoutingMiddleware:
+    '''
+    Направляє читання безпечних запитів до в'юшок з DATABASE_ROUTING['REPLICA_VIEWS'] на репліку
+    (apps.core.routers.PrimaryReplicaRouter). Після запису (POST/PUT/PATCH/DELETE) автентифікованого
+    користувача його читання STICKY_SECONDS ідуть на primary. Без реплік нічого не робить.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.jwt = JWTAuthentication()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request_routing.set(RequestRouting())
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_routing.reset(token)
+        self.after_response(request)
+        return response
+
+    async def __acall__(self, request):
+        token = _request_routing.set(RequestRouting())
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_routing.reset(token)
+        await sync_to_async(self.after_response)(request)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        routing = _request_routing.get()
+        if routing is None or request.method not in SAFE_METHODS:
+            return None
+        if request.resolver_match.url_name not in settings.DATABASE_ROUTING.get('REPLICA_VIEWS', ()):
+            return None
+
+        user_id = self.token_user_id(request)
+        if user_id is not None and is_sticky(user_id):
+            return None
+        routing.read_alias = choose_replica()
+        return None
+
+    def token_user_id(self, request):
+        '''id користувача з JWT без запиту до БД; токен все одно перевіряє аутентифікація DRF'''
+        header = self.jwt.get_header(request)
+        raw_token = self.jwt.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None
+        try:
+            return self.jwt.get_validated_token(raw_token).get(jwt_settings.USER_ID_CLAIM)
+        except (InvalidToken, TokenError):
+            return None
+
+    def after_response(self, request):
+        if request.method in SAFE_METHODS or not settings.DATABASE_ROUTING.get('REPLICAS'):
+            return
+        # DRF записує автентифікованого користувача і в HttpRequest
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            stick_to_primary(user.pk)
+
+
+class RequestTransactionMiddleware:
+    '''
+    Транзакція запиту за методом (apps.core.transactions). POST/PUT/PATCH/DELETE, як і раніше,
+    загортає ATOMIC_REQUESTS. Синхронні в'юшки безпечних запитів з політикою read_only чи autocommit
+    (REQUEST_TRANSACTIONS['SAFE_METHODS'] або @request_transaction) викликає сам middleware,
+    тож він має стояти в MIDDLEWARE останнім. Async-в'юшки читають без транзакції і так.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in SAFE_METHODS or iscoroutinefunction(view_func):
+            return None
+        policy = view_policy(view_func)
+        if policy == ATOMIC:
+            return None
+        return call_view(policy, view_func, request, view_args, view_kwargs)
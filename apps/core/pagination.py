@@ -0,0 +1,385 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.core.paginator import EmptyPage, InvalidPage, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def planner_estimate(queryset):
+    '''
+    Оцінка кількості рядків від планувальника PostgreSQL: для таблиці без фільтрів —
+    pg_class.reltuples (статистика ANALYZE/autovacuum), інакше — Plan Rows з EXPLAIN.
+    None, якщо оцінки немає (не PostgreSQL, зріз).
+    '''
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or queryset.query.is_sliced:
+        return None
+
+    query = queryset.query
+    if not query.where and not query.distinct and not query.combinator and query.group_by is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+        # -1: таблицю ще не аналізували
+        if row is not None and row[0] >= 0:
+            return row[0]
+
+    # Лише відфільтровані рядки: анотації (підзапити) і select_related не впливають на кількість,
+    # а їхні JOIN-и спотворюють оцінку
+    plan = json.loads(queryset.order_by().values('pk').explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimate_count(queryset, threshold=None):
+    '''
+    (кількість, чи це оцінка). Точний COUNT(*) лише тоді, коли планувальник очікує
+    менше за threshold рядків: на великих таблицях він дорожчий за саму сторінку.
+    '''
+    if threshold is None:
+        threshold = settings.COUNT_ESTIMATES['THRESHOLD']
+    estimate = planner_estimate(queryset)
+    if estimate is None or estimate < threshold:
+        return queryset.count(), False
+    return estimate, True
+
+
+class EstimatedCountPaginator(Paginator):
+    '''
+    Paginator, у якого count великих вибірок — оцінка планувальника (approximate = True).
+    Сторінка вибирається з одним зайвим рядком: так відомо, чи є наступна, навіть якщо оцінка
+    занижена, а остання сторінка дає точну кількість. Номер сторінки за оцінкою не обмежується —
+    порожня сторінка (крім першої) дає EmptyPage, як і у звичайного Paginator.
+    '''
+    approximate = False
+
+    @cached_property
+    def count(self):
+        count, self.approximate = estimate_count(self.object_list)
+        return count
+
+    async def acount(self):
+        '''count для async-в'юшок: EXPLAIN і COUNT у потоці'''
+        if 'count' not in self.__dict__:
+            self.count, self.approximate = await sync_to_async(estimate_count)(self.object_list)
+        return self.count
+
+    def validate_number(self, number):
+        if not self.approximate:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return super().validate_number(number)
+        if number < 1:
+            return super().validate_number(number)
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.approximate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        return self.page_from_rows(number, list(self.object_list[bottom:bottom + self.per_page + 1]))
+
+    def page_bounds(self, number):
+        '''Зріз для page_from_rows (з зайвим рядком)'''
+        bottom = (number - 1) * self.per_page
+        return bottom, bottom + self.per_page + 1
+
+    def page_from_rows(self, number, rows):
+        bottom = (number - 1) * self.per_page
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+
+        if has_more:
+            self.count = max(self.count, bottom + len(rows) + 1)
+        else:
+            # Остання сторінка: кількість відома точно
+            self.count, self.approximate = bottom + len(rows), False
+        self.__dict__.pop('num_pages', None)
+        return self._get_page(rows, number, self)
+
+
+class KeysetPagination(PageNumberPagination):
+    '''
+    Пагінація з двома режимами.
+    Без параметра ?cursor= працює як звичайна PageNumberPagination (count + ?page=N).
+    З ?cursor= (для першої сторінки — порожнім) вмикається keyset-режим: сторінка
+    вибирається умовою WHERE по (поле сортування, id) замість OFFSET і без COUNT(*),
+    тому латентність не залежить від глибини. Якщо вибірка сортується за анотацією
+    (ранг повнотекстового пошуку), курсор неможливий, і ?cursor= дає звичайні сторінки.
+    '''
+    cursor_query_param = 'cursor'
+    cursor_query_description = 'Непрозорий курсор keyset-пагінації (порожній для першої сторінки).'
+    invalid_cursor_message = 'Invalid cursor'
+    tiebreaker = 'id'
+
+    django_paginator_class = EstimatedCountPaginator
+    keyset = False
+    view = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.view = view
+        if self.uses_keyset(queryset, request):
+            queryset, values = self.keyset_queryset(queryset, request, view)
+            if queryset is None:
+                return None
+            return self.keyset_page(self.get_slice(queryset, 0, self.page_size + 1), values)
+
+        paginator = self.page_paginator(queryset, request)
+        if paginator is None:
+            return None
+        paginator.count
+        number = self.page_number(request, paginator)
+        bottom, top = paginator.page_bounds(number)
+        return self.numbered_page(paginator, number, self.get_slice(queryset, bottom, top))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        '''paginate_queryset для async-в'юшок (apps.core.asyncviews): COUNT і вибірка через async ORM'''
+        self.view = view
+        if self.uses_keyset(queryset, request):
+            queryset, values = self.keyset_queryset(queryset, request, view)
+            if queryset is None:
+                return None
+            return self.keyset_page(await self.aget_slice(queryset, 0, self.page_size + 1), values)
+
+        paginator = self.page_paginator(queryset, request)
+        if paginator is None:
+            return None
+        # Paginator.count — cached_property, тож далі він уже не ходить у БД
+        await paginator.acount()
+        number = self.page_number(request, paginator)
+        bottom, top = paginator.page_bounds(number)
+        return self.numbered_page(paginator, number, await self.aget_slice(queryset, bottom, top))
+
+    def get_slice(self, queryset, low, high):
+        '''
+        Рядки queryset[low:high]. В'юшка може вибирати їх сама (get_page_slice / aget_page_slice),
+        наприклад, UNION ALL індексних сканів замість OR-умови.
+        '''
+        get_page_slice = getattr(self.view, 'get_page_slice', None)
+        if get_page_slice is not None:
+            return get_page_slice(queryset, low, high)
+        return list(queryset[low:high])
+
+    async def aget_slice(self, queryset, low, high):
+        aget_page_slice = getattr(self.view, 'aget_page_slice', None)
+        if aget_page_slice is not None:
+            return await aget_page_slice(queryset, low, high)
+        return [obj async for obj in queryset[low:high]]
+
+    def page_paginator(self, queryset, request):
+        self.keyset = False
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        return self.django_paginator_class(queryset, page_size)
+
+    def page_number(self, request, paginator):
+        page_number = self.get_page_number(request, paginator)
+        try:
+            return paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+    def numbered_page(self, paginator, number, rows):
+        '''Сторінка з рядків зрізу page_bounds (з одним зайвим)'''
+        try:
+            self.page = paginator.page_from_rows(number, rows)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=number, message=str(exc)))
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+    def uses_keyset(self, queryset, request):
+        if self.cursor_query_param not in request.query_params:
+            return False
+        # Значення анотації (search_rank) не відтворити в умові WHERE — лише номери сторінок
+        annotations = queryset.query.annotations
+        return not any(
+            isinstance(name, str) and name.lstrip('-') in annotations for name in queryset.query.order_by
+        )
+
+    def keyset_queryset(self, queryset, request, view=None):
+        '''(queryset сторінки без LIMIT, значення курсора) або (None, None), якщо пагінація вимкнена'''
+        self.keyset = True
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None, None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset, view)
+        self.fields = [self._get_field(queryset.model, name) for name in self.ordering]
+        values, self.reverse = self.decode_cursor(request)
+
+        order = [self._invert(name) for name in self.ordering] if self.reverse else self.ordering
+        queryset = queryset.order_by(*order)
+        if values is not None:
+            queryset = queryset.filter(self._keyset_filter(order, values))
+        return queryset, values
+
+    def keyset_page(self, results, values):
+        '''Обрізає вибірку з page_size + 1 рядків до сторінки і визначає сусідні сторінки'''
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next = bool(results)
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = values is not None and bool(results)
+
+        self.page_results = results
+        return results
+
+    def get_ordering(self, queryset, view):
+        '''Сортування від OrderingFilter (або Meta.ordering) + id для однозначності'''
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        if not ordering and view is not None:
+            ordering = list(getattr(view, 'ordering', None) or [])
+        if not all(isinstance(name, str) for name in ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        names = [name.lstrip('-') for name in ordering]
+        if self.tiebreaker not in names and 'pk' not in names:
+            descending = bool(ordering) and ordering[0].startswith('-')
+            ordering.append(('-' if descending else '') + self.tiebreaker)
+        return ordering
+
+    def _get_field(self, model, name):
+        name = name.lstrip('-')
+        try:
+            field = model._meta.get_field(model._meta.pk.name if name == 'pk' else name)
+        except FieldDoesNotExist:
+            raise NotFound(self.invalid_cursor_message)
+        if not field.concrete or field.is_relation or field.null:
+            # keyset можливий лише по не-null колонках
+            raise NotFound(self.invalid_cursor_message)
+        return field
+
+    @staticmethod
+    def _invert(name):
+        return name[1:] if name.startswith('-') else '-' + name
+
+    def _keyset_filter(self, order, values):
+        '''
+        Лексикографічне "після" для (f1, f2, ...):
+        f1 >= v1 AND (f1 > v1 OR (f1 = v1 AND f2 > v2) OR ...).
+        Зовнішня умова по f1 дає індексний range scan.
+        '''
+        condition = Q()
+        equal = Q()
+        for name, field, value in zip(order, self.fields, values):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{field.attname}__{lookup}': value})
+            equal &= Q(**{field.attname: value})
+
+        first = order[0]
+        lead_lookup = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{self.fields[0].attname}__{lead_lookup}': values[0]}) & condition
+
+    def decode_cursor(self, request):
+        '''Повертає (значення полів, напрямок) або (None, False) для першої сторінки'''
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+            if payload['o'] != self.ordering or len(payload['v']) != len(self.fields):
+                raise ValueError
+            values = [field.to_python(value) for field, value in zip(self.fields, payload['v'])]
+            return values, bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        payload = {
+            'o': self.ordering,
+            'v': [field.value_to_string(instance) for field in self.fields],
+        }
+        if reverse:
+            payload['r'] = 1
+        encoded = urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        ).decode('ascii').rstrip('=')
+        url = remove_query_param(self.base_url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return self._without_cursor(super().get_next_link())
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page_results[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return self._without_cursor(super().get_previous_link())
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.page_results[0], reverse=True)
+
+    def _without_cursor(self, url):
+        return url and remove_query_param(url, self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return Response({
+                'count': self.page.paginator.count,
+                'count_estimated': self.page.paginator.approximate,
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'results': data,
+            })
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['required'] = ['results']
+        response_schema['properties']['count']['description'] = (
+            'Відсутній у keyset-режимі (?cursor=). Для великих вибірок — оцінка планувальника PostgreSQL.'
+        )
+        response_schema['properties']['count_estimated'] = {
+            'type': 'boolean',
+            'description': 'count — оцінка, а не точний COUNT(*). Відсутній у keyset-режимі.',
+        }
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append({
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': self.cursor_query_description,
+            'schema': {
+                'type': 'string',
+            },
+        })
+        return parameters
@@ -0,0 +1,39 @@
+import os
+import time
+
+from django.db.backends.postgresql import base
+
+from .metrics import record_acquired, record_released
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    '''
+    PostgreSQL-бекенд Django з обліком з'єднань (apps.core.postgresql.metrics).
+    Пул psycopg (OPTIONS['pool']) безпечний до fork: пул, успадкований від батьківського процесу
+    (Celery prefork, gunicorn --preload), не використовується — дочірній процес відкриває власний.
+    '''
+    # Процес, що створив пул аліасу
+    _pool_pids = {}
+
+    @property
+    def pool(self):
+        pid = os.getpid()
+        if self._pool_pids.get(self.alias, pid) != pid:
+            # Потоки і сокети пулу належать батьківському процесу: не закриваємо їх, лише забуваємо пул
+            self._connection_pools.pop(self.alias, None)
+        pool = super().pool
+        if pool is not None:
+            self._pool_pids[self.alias] = pid
+        return pool
+
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        record_acquired(self.alias, time.perf_counter() - started, pooled=self.pool is not None)
+        return connection
+
+    def _close(self):
+        try:
+            super()._close()
+        finally:
+            record_released(self.alias)
@@ -0,0 +1,70 @@
+import os
+import threading
+from collections import defaultdict
+
+from django.dispatch import Signal
+
+# Надсилається щоразу, коли Django бере з'єднання: alias, seconds — рукостискання з PostgreSQL
+# або очікування вільного з'єднання в пулі, pooled — чи з'єднання з пулу
+connection_acquired = Signal()
+
+_lock = threading.Lock()
+_counters = defaultdict(lambda: {'acquired': 0, 'released': 0, 'created': 0, 'wait_total': 0.0, 'wait_max': 0.0})
+
+
+def _reset():
+    global _lock
+    # Замок міг бути захоплений іншим потоком батьківського процесу в момент fork
+    _lock = threading.Lock()
+    _counters.clear()
+
+
+# Лічильники — на процес: дочірній процес (Celery prefork) не успадковує історію батьківського
+os.register_at_fork(after_in_child=_reset)
+
+
+def record_acquired(alias, seconds, pooled):
+    with _lock:
+        counters = _counters[alias]
+        counters['acquired'] += 1
+        if not pooled:
+            counters['created'] += 1
+        counters['wait_total'] += seconds
+        counters['wait_max'] = max(counters['wait_max'], seconds)
+    connection_acquired.send(sender=None, alias=alias, seconds=seconds, pooled=pooled)
+
+
+def record_released(alias):
+    with _lock:
+        _counters[alias]['released'] += 1
+
+
+def connection_stats():
+    '''
+    Статистика з'єднань поточного процесу по аліасах: скільки взято, створено і зараз у роботі,
+    середнє і максимальне очікування в мс. Для пулу psycopg додається його get_stats()
+    '''
+    from django.db import connections
+
+    with _lock:
+        snapshot = {alias: dict(counters) for alias, counters in _counters.items()}
+
+    stats = {}
+    for alias, counters in snapshot.items():
+        acquired = counters['acquired']
+        entry = {
+            'acquired': acquired,
+            'created': counters['created'],
+            'in_use': acquired - counters['released'],
+            'wait_ms_avg': round(counters['wait_total'] / acquired * 1000, 3) if acquired else 0.0,
+            'wait_ms_max': round(counters['wait_max'] * 1000, 3),
+            'pool': None,
+        }
+        # Службові з'єднання (__no_db__ при створенні тестової бази) не мають налаштувань в DATABASES
+        pool = connections[alias].pool if alias in connections.settings else None
+        if pool is not None:
+            entry['pool'] = pool.get_stats()
+            # З пулом нові з'єднання відкриває сам пул
+            entry['created'] = entry['pool'].get('connections_num', 0)
+        stats[alias] = entry
+    return stats
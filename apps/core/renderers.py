@@ -0,0 +1,40 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - без orjson працює стандартний json
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    '''
+    JSONRenderer на orjson. Вихід побайтово збігається зі стандартним рендерером
+    (крім запису експоненти у дуже великих/малих float: 1e16 замість 1e+16):
+    datetime/Decimal/UUID/ліниві рядки віддаються енкодеру DRF через default,
+    U+2028/U+2029 екрануються так само. Якщо orjson немає, запитано відступи
+    (браузерний API, ?indent) або налаштування вимагають ASCII/некомпактний JSON —
+    рендерить стандартний json.
+    '''
+    encoder_default = encoders.JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or orjson is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            # Напр. цілі за межами 64 біт — стандартний енкодер їх вміє
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Як і JSONRenderer: ці символи валідні в JSON, але не в JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,217 @@
+import hashlib
+import io
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Метадані варіантів зберігаються поруч із полем: Post.image -> Post.image_renditions
+RENDITIONS_SUFFIX = '_renditions'
+
+
+def render_variants(data, sizes, formats, quality):
+    '''
+    Рендерить усі варіанти одного зображення. Працює лише з байтами, тож може виконуватись
+    в окремому процесі (manage.py generate_renditions). Оригінал декодується один раз;
+    EXIF-орієнтація застосовується до пікселів, а самі метадані (EXIF, GPS) у варіанти не пишуться.
+    '''
+    largest = max(max(spec['width'], spec['height']) for spec in sizes.values())
+    with Image.open(io.BytesIO(data)) as source:
+        # JPEG декодується одразу у зменшеному масштабі, не меншому за найбільший варіант
+        source.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    variants = {}
+    for name, spec in sizes.items():
+        box = (spec['width'], spec['height'])
+        if spec.get('crop'):
+            variant = ImageOps.fit(image, box, Image.Resampling.LANCZOS)
+        else:
+            variant = image.copy()
+            variant.thumbnail(box, Image.Resampling.LANCZOS)
+
+        files = {}
+        for file_format in formats:
+            output = io.BytesIO()
+            if file_format == 'jpeg':
+                flat = variant
+                if has_alpha:
+                    flat = Image.new('RGB', variant.size, 'white')
+                    flat.paste(variant, mask=variant.getchannel('A'))
+                flat.save(output, 'JPEG', quality=quality, optimize=True, progressive=True)
+            else:
+                variant.save(output, file_format.upper(), quality=quality)
+            files[file_format] = output.getvalue()
+        variants[name] = {'width': variant.width, 'height': variant.height, 'files': files}
+    return variants
+
+
+class ImageRenditionService:
+    '''
+    Зменшені варіанти завантажених зображень (IMAGE_RENDITIONS у settings).
+    Генеруються задачею Celery після коміту збереження моделі, тож запит не чекає на Pillow;
+    поки варіантів немає (або файл замінили), серіалізатори віддають URL оригіналу.
+    '''
+
+    @staticmethod
+    def configured_fields():
+        '''(модель, назва поля, розміри) для всіх налаштованих полів'''
+        for path, sizes in settings.IMAGE_RENDITIONS['FIELDS'].items():
+            label, field_name = path.rsplit('.', 1)
+            yield apps.get_model(label), field_name, sizes
+
+    @staticmethod
+    def sizes_for(model, field_name):
+        return settings.IMAGE_RENDITIONS['FIELDS'][f'{model._meta.label}.{field_name}']
+
+    @staticmethod
+    def metadata(fieldfile):
+        return getattr(fieldfile.instance, fieldfile.field.name + RENDITIONS_SUFFIX, None) or {}
+
+    @staticmethod
+    def is_current(fieldfile):
+        return bool(fieldfile) and ImageRenditionService.metadata(fieldfile).get('source') == fieldfile.name
+
+    @staticmethod
+    def url(fieldfile, size, file_format=None):
+        '''URL варіанта size; якщо варіанти ще не готові — URL оригіналу, без файлу — None'''
+        if not fieldfile:
+            return None
+        if ImageRenditionService.is_current(fieldfile):
+            variant = ImageRenditionService.metadata(fieldfile)['variants'].get(size)
+            name = variant and variant['files'].get(file_format or settings.IMAGE_RENDITIONS['FORMATS'][0])
+            if name:
+                return fieldfile.storage.url(name)
+        return fieldfile.url
+
+    @staticmethod
+    def variants(fieldfile):
+        '''Усі варіанти з URL-ами (для <picture>/srcset) або None, якщо їх ще немає'''
+        if not ImageRenditionService.is_current(fieldfile):
+            return None
+        return {
+            size: {
+                'width': variant['width'],
+                'height': variant['height'],
+                **{file_format: fieldfile.storage.url(name) for file_format, name in variant['files'].items()},
+            }
+            for size, variant in ImageRenditionService.metadata(fieldfile)['variants'].items()
+        }
+
+    @staticmethod
+    def read_source(model, pk, field_name, force=False):
+        '''(назва файлу, байти) для рендерингу або None, якщо робити нічого'''
+        meta_field = field_name + RENDITIONS_SUFFIX
+        instance = model._default_manager.filter(pk=pk).only('pk', field_name, meta_field).first()
+        if instance is None:
+            return None
+        fieldfile = getattr(instance, field_name)
+        if not fieldfile:
+            if getattr(instance, meta_field):
+                ImageRenditionService.store(model, pk, field_name, '', None)
+            return None
+        if not force and ImageRenditionService.is_current(fieldfile):
+            return None
+        with fieldfile.open('rb') as source:
+            return fieldfile.name, source.read()
+
+    @staticmethod
+    def render(model, field_name, data):
+        options = settings.IMAGE_RENDITIONS
+        return render_variants(data, ImageRenditionService.sizes_for(model, field_name),
+                               options['FORMATS'], options['QUALITY'])
+
+    @staticmethod
+    def store(model, pk, field_name, source_name, variants):
+        '''
+        Зберігає файли варіантів і метадані. Якщо поки рендерилось, файл на моделі замінили,
+        результат відкидається (нову версію згенерує задача, поставлена її збереженням).
+        '''
+        meta_field = field_name + RENDITIONS_SUFFIX
+        storage = model._meta.get_field(field_name).storage
+        metadata = {}
+        saved = []
+        if variants:
+            digest = hashlib.md5(source_name.encode('utf-8')).hexdigest()[:12]
+            directory = f'renditions/{model._meta.label_lower}.{field_name}/{pk}/{digest}'
+            metadata = {'source': source_name, 'variants': {}}
+            for size, variant in variants.items():
+                files = {}
+                for file_format, content in variant['files'].items():
+                    name = storage.save(f'{directory}/{size}.{file_format}', ContentFile(content))
+                    saved.append(name)
+                    files[file_format] = name
+                metadata['variants'][size] = {'width': variant['width'], 'height': variant['height'], 'files': files}
+
+        with transaction.atomic():
+            instance = model._default_manager.select_for_update().filter(pk=pk).only(
+                'pk', field_name, meta_field
+            ).first()
+            if instance is None or (getattr(instance, field_name).name or '') != source_name:
+                transaction.on_commit(lambda: ImageRenditionService._delete(storage, saved))
+                return False
+
+            previous = getattr(instance, meta_field) or {}
+            setattr(instance, meta_field, metadata)
+            update_fields = [meta_field]
+            if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+                # Варіанти змінюють представлення — ETag / Last-Modified мають це побачити
+                update_fields.append('updated_at')
+            instance.save(update_fields=update_fields)
+
+            stale = [
+                name for variant in previous.get('variants', {}).values()
+                for name in variant['files'].values() if name not in saved
+            ]
+            transaction.on_commit(lambda: ImageRenditionService._delete(storage, stale))
+        return True
+
+    @staticmethod
+    def _delete(storage, names):
+        for name in names:
+            try:
+                storage.delete(name)
+            except OSError:
+                logger.warning('Could not delete rendition %s', name)
+
+    @staticmethod
+    def generate(model, pk, field_name, force=False):
+        source = ImageRenditionService.read_source(model, pk, field_name, force=force)
+        if source is None:
+            return {'generated': False}
+        source_name, data = source
+        variants = ImageRenditionService.render(model, field_name, data)
+        stored = ImageRenditionService.store(model, pk, field_name, source_name, variants)
+        return {'generated': stored, 'source': source_name}
+
+
+def _schedule_renditions(field_name):
+    meta_field = field_name + RENDITIONS_SUFFIX
+
+    def receiver(sender, instance, update_fields=None, raw=False, **kwargs):
+        if raw or (update_fields is not None and field_name not in update_fields):
+            return
+        fieldfile = getattr(instance, field_name)
+        if ImageRenditionService.is_current(fieldfile) or (not fieldfile and not getattr(instance, meta_field)):
+            return
+
+        from .tasks import generate_image_renditions
+        label, pk = sender._meta.label, instance.pk
+        transaction.on_commit(lambda: generate_image_renditions.delay(label, pk, field_name))
+    return receiver
+
+
+def connect_rendition_signals():
+    for model, field_name, _ in ImageRenditionService.configured_fields():
+        post_save.connect(
+            _schedule_renditions(field_name), sender=model, weak=False,
+            dispatch_uid=f'renditions:{model._meta.label}.{field_name}',
+        )
@@ -0,0 +1,66 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+# Маршрутизація поточного запиту; ставиться ReplicaRoutingMiddleware. Поза запитом
+# (Celery, команди, shell) її немає — усе йде на primary
+_request_routing = ContextVar('request_routing', default=None)
+
+
+class RequestRouting:
+    '''Куди йдуть читання запиту: read_alias — репліка, None — primary'''
+    __slots__ = ('read_alias',)
+
+    def __init__(self):
+        self.read_alias = None
+
+
+def replica_aliases():
+    return list(settings.DATABASE_ROUTING.get('REPLICAS', ()))
+
+
+def choose_replica():
+    replicas = replica_aliases()
+    return random.choice(replicas) if replicas else None
+
+
+def _sticky_key(user_id):
+    return f'db:primary:{user_id}'
+
+
+def stick_to_primary(user_id):
+    '''Після запису читання користувача STICKY_SECONDS ідуть на primary: репліка могла ще не догнати'''
+    cache.set(_sticky_key(user_id), 1, settings.DATABASE_ROUTING.get('STICKY_SECONDS', 15))
+
+
+def is_sticky(user_id):
+    return cache.get(_sticky_key(user_id)) is not None
+
+
+class PrimaryReplicaRouter:
+    '''
+    Читання в запитах, які ReplicaRoutingMiddleware направило на репліку, — з неї;
+    усі записи і решта читань — primary (default), як без роутера. Моделі з PRIMARY_MODELS читаються
+    лише з primary: користувач, щойно створений при реєстрації, може ще не дійти до репліки.
+    '''
+
+    def db_for_read(self, model, **hints):
+        routing = _request_routing.get()
+        if routing is None or routing.read_alias is None:
+            return None
+        if model._meta.label_lower in settings.DATABASE_ROUTING.get('PRIMARY_MODELS', ()):
+            return DEFAULT_DB_ALIAS
+        return routing.read_alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Репліки — фізичні копії primary
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
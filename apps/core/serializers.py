@@ -0,0 +1,140 @@
+import datetime
+
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import ISO_8601
+from rest_framework import fields as drf_fields
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject, PrimaryKeyRelatedField, StringRelatedField
+from rest_framework.settings import api_settings
+
+from .renditions import ImageRenditionService
+
+
+class CompiledRepresentationMixin:
+    '''
+    Швидкий шлях серіалізації на читання для стрічок.
+    ModelSerializer на кожен рядок і кожне поле проходить get_attribute (з перевіркою
+    на callable), PKOnlyObject і to_representation. Тут для кожного поля один раз
+    будується функція instance -> значення, і рядок збирається простим проходом по них.
+    Вихід ідентичний ModelSerializer.to_representation; поля без швидкого варіанту
+    обробляються стандартною логікою DRF.
+    '''
+    # Для колонок моделі ці поля повертають значення без змін (str(str), int(int), ...)
+    passthrough_fields = (
+        drf_fields.CharField,
+        drf_fields.SlugField,
+        drf_fields.IntegerField,
+        drf_fields.BooleanField,
+        drf_fields.ReadOnlyField,
+    )
+
+    _compiled = None
+
+    def to_representation(self, instance):
+        compiled = self._compiled
+        if compiled is None:
+            compiled = self._compiled = [
+                (field.field_name, self._compile_field(field)) for field in self._readable_fields
+            ]
+
+        ret = {}
+        for name, accessor in compiled:
+            try:
+                ret[name] = accessor(instance)
+            except SkipField:
+                continue
+        return ret
+
+    def _compile_field(self, field):
+        if isinstance(field, drf_fields.SerializerMethodField):
+            return getattr(self, field.method_name)
+        if field.source == '*' or len(field.source_attrs) != 1:
+            return self._generic_accessor(field)
+
+        model = self.Meta.model
+        attr = field.source_attrs[0]
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            if not isinstance(getattr(model, attr, None), property):
+                # Методи моделі DRF викликає сам — лишаємо стандартний шлях
+                return self._generic_accessor(field)
+            return self._converting_accessor(attr, field.to_representation)
+
+        if model_field.is_relation:
+            if not model_field.concrete or model_field.many_to_many:
+                return self._generic_accessor(field)
+            if isinstance(field, PrimaryKeyRelatedField) and field.use_pk_only_optimization():
+                attname = model_field.attname
+                return lambda instance: getattr(instance, attname)
+            if isinstance(field, StringRelatedField):
+                return self._converting_accessor(attr, str)
+            return self._generic_accessor(field)
+
+        if type(field) in self.passthrough_fields:
+            return lambda instance: getattr(instance, attr)
+        if type(field) is drf_fields.DateTimeField:
+            return self._converting_accessor(attr, self._compile_datetime(field))
+        return self._converting_accessor(attr, field.to_representation)
+
+    @staticmethod
+    def _compile_datetime(field):
+        '''
+        DateTimeField.to_representation з часовим поясом, визначеним один раз:
+        DRF шукає поточний пояс (asgiref Local) для кожного значення.
+        '''
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        if output_format is None or output_format.lower() != ISO_8601:
+            return field.to_representation
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if field_timezone is None:
+            return field.to_representation
+
+        def to_iso(value):
+            if not isinstance(value, datetime.datetime) or not timezone.is_aware(value):
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return to_iso
+
+    @staticmethod
+    def _converting_accessor(attr, convert):
+        def accessor(instance):
+            value = getattr(instance, attr)
+            return None if value is None else convert(value)
+        return accessor
+
+    @staticmethod
+    def _generic_accessor(field):
+        '''Те саме, що робить Serializer.to_representation для одного поля'''
+        def accessor(instance):
+            attribute = field.get_attribute(instance)
+            check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            if check_for_none is None:
+                return None
+            return field.to_representation(attribute)
+        return accessor
+
+
+class RenditionImageField(drf_fields.ImageField):
+    '''
+    ImageField, що на читання віддає URL зменшеного варіанта (thumb для стрічок, large для деталей)
+    замість оригіналу; поки варіанти не згенеровані — URL оригіналу. Запис — як у звичайного ImageField.
+    '''
+    def __init__(self, rendition, **kwargs):
+        self.rendition = rendition
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        if not getattr(self, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+            return value.name
+        url = ImageRenditionService.url(value, self.rendition)
+        request = self.context.get('request', None)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
@@ -0,0 +1,10 @@
+from celery import shared_task
+from django.apps import apps
+
+from .renditions import ImageRenditionService
+
+
+@shared_task
+def generate_image_renditions(model_label, pk, field_name):
+    '''Генерує зменшені варіанти зображення поза запитом (черга images)'''
+    return ImageRenditionService.generate(apps.get_model(model_label), pk, field_name)
@@ -0,0 +1,55 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections, transaction
+
+ATOMIC = 'atomic'
+READ_ONLY = 'read_only'
+AUTOCOMMIT = 'autocommit'
+POLICIES = (ATOMIC, READ_ONLY, AUTOCOMMIT)
+
+
+def request_transaction(policy):
+    '''
+    Політика транзакції безпечних запитів (GET/HEAD/OPTIONS) окремої в'юшки замість
+    REQUEST_TRANSACTIONS['SAFE_METHODS']: ставиться над класом в'юшки або над @api_view.
+    Небезпечні методи завжди атомарні (ATOMIC_REQUESTS).
+    '''
+    if policy not in POLICIES:
+        raise ValueError(f'Невідома політика транзакції {policy!r}, очікується одна з {", ".join(POLICIES)}')
+
+    def decorator(view):
+        view.request_transaction = policy
+        return view
+    return decorator
+
+
+def view_policy(view_func):
+    for view in (view_func, getattr(view_func, 'view_class', None)):
+        policy = getattr(view, 'request_transaction', None)
+        if policy is not None:
+            return policy
+    return settings.REQUEST_TRANSACTIONS.get('SAFE_METHODS', ATOMIC)
+
+
+def call_view(policy, view_func, request, args, kwargs):
+    '''
+    Викликає в'юшку безпечного запиту за політикою read_only або autocommit для баз з ATOMIC_REQUESTS.
+    read_only — транзакція READ ONLY на READ COMMITTED: знімок на кожен запит до БД, а не на весь запит,
+    запис — помилка PostgreSQL. autocommit — без BEGIN/COMMIT. Якщо транзакція вже відкрита (тести),
+    в'юшка виконується в точці збереження, як з ATOMIC_REQUESTS.
+    '''
+    non_atomic_requests = getattr(view_func, '_non_atomic_requests', set())
+    with ExitStack() as stack:
+        for alias, settings_dict in connections.settings.items():
+            if not settings_dict['ATOMIC_REQUESTS'] or alias in non_atomic_requests:
+                continue
+            connection = connections[alias]
+            outermost = not connection.in_atomic_block
+            if policy == AUTOCOMMIT and outermost:
+                continue
+            stack.enter_context(transaction.atomic(using=alias))
+            if policy == READ_ONLY and outermost:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET TRANSACTION ISOLATION LEVEL READ COMMITTED, READ ONLY')
+        return view_func(request, *args, **kwargs)
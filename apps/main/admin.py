@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Category, Post
+from apps.core.admin import EstimatedCountAdminMixin
+from .models import Category, ImportJob, Post
 
 
 @admin.register(Category)
@@ -18,7 +19,7 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = (
         'title', 'author', 'category', 'status',
         'views_count', 'comments_count', 'created_at'
@@ -48,4 +49,19 @@ class PostAdmin(admin.ModelAdmin):
     comments_count.short_description = 'Comments'
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('author', 'category')
\ No newline at end of file
+        return super().get_queryset(request).select_related('author', 'category')
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'source', 'format', 'status', 'processed_records',
+        'posts_created', 'comments_created', 'skipped', 'created_at'
+    )
+    list_filter = ('status', 'format', 'created_at')
+    search_fields = ('source',)
+    readonly_fields = (
+        'status', 'processed_records', 'posts_created', 'comments_created',
+        'skipped', 'errors', 'created_at', 'started_at', 'finished_at'
+    )
+    raw_id_fields = ('default_author', 'created_by')
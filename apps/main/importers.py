@@ -0,0 +1,550 @@
+import csv
+import io
+import json
+import logging
+from datetime import timezone as dt_timezone
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+from apps.comments.models import Comment
+from apps.core.cache import ResponseCache
+from .models import Category, ImportedObject, ImportJob, Post
+from .signals import FEED_CACHE_GROUPS
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+# Читачі файлів: потоково віддають записи-словники {'type': 'post' | 'comment', 'id': ..., ...}.
+# Коментар посилається на пост полем post (id поста у файлі) і на батьківський коментар полем parent.
+
+def read_jsonl(stream):
+    '''JSON Lines: один запис на рядок'''
+    for number, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8-sig'), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f'Рядок {number}: некоректний JSON ({e.msg})')
+
+
+def read_json(stream, chunk_size=64 * 1024):
+    '''
+    JSON-масив записів. Файл читається шматками, і записи декодуються по одному,
+    тож у пам'яті одночасно лише поточний запис, а не весь архів.
+    '''
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig')
+    decoder = json.JSONDecoder()
+    buffer, opened, eof = '', False, False
+    while True:
+        buffer = buffer.lstrip()
+        if buffer:
+            if not opened:
+                if buffer[0] != '[':
+                    raise ValueError('JSON-файл імпорту має містити масив записів')
+                opened, buffer = True, buffer[1:]
+                continue
+            if buffer[0] == ']':
+                return
+            if buffer[0] == ',':
+                buffer = buffer[1:]
+                continue
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ValueError(f'Некоректний JSON ({e.msg})')
+            else:
+                yield record
+                buffer = buffer[end:]
+                continue
+        elif eof:
+            raise ValueError('Неочікуваний кінець JSON-файлу')
+
+        chunk = text.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+
+def read_csv(stream):
+    '''CSV з заголовком; колонка type необов'язкова (за замовчуванням — пост)'''
+    yield from csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+
+
+WXR_NAMESPACE_PREFIX = '{http://wordpress.org/export/'
+WXR_CONTENT_TAG = '{http://purl.org/rss/1.0/modules/content/}encoded'
+WXR_CREATOR_TAG = '{http://purl.org/dc/elements/1.1/}creator'
+
+WXR_POST_STATUSES = {'publish': 'published'}
+WXR_SKIPPED_COMMENTS = {'spam', 'trash'}
+
+
+def _wxr_value(element, name):
+    # Простір імен wp: містить версію формату (export/1.1/, export/1.2/), тому порівнюємо лише локальне ім'я
+    for child in element:
+        if child.tag.startswith(WXR_NAMESPACE_PREFIX) and child.tag.endswith('}' + name):
+            return child.text or ''
+    return ''
+
+
+def _wxr_comment(element, post_id):
+    if _wxr_value(element, 'comment_type') not in ('', 'comment'):
+        return None  # pingback / trackback
+    approved = _wxr_value(element, 'comment_approved').strip()
+    if approved in WXR_SKIPPED_COMMENTS:
+        return None
+    parent = _wxr_value(element, 'comment_parent').strip()
+    return {
+        'type': 'comment',
+        'id': _wxr_value(element, 'comment_id').strip(),
+        'post': post_id,
+        'parent': '' if parent == '0' else parent,
+        'author': _wxr_value(element, 'comment_author'),
+        'author_email': _wxr_value(element, 'comment_author_email'),
+        'content': _wxr_value(element, 'comment_content'),
+        'is_active': approved == '1',
+        'created_at': _wxr_value(element, 'comment_date_gmt'),
+    }
+
+
+def read_wxr(stream):
+    '''
+    Експорт WordPress (WXR) через iterparse: кожен <item> обробляється, щойно закривається,
+    і одразу видаляється з дерева, тож пам'ять не росте з розміром файлу.
+    Імпортуються лише записи типу post; сторінки, вкладення, пінгбеки і спам пропускаються.
+    '''
+    author_emails = {}
+    channel = None
+    depth = 0
+    for event, element in ElementTree.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            if depth == 2 and element.tag == 'channel':
+                channel = element
+            continue
+
+        depth -= 1
+        if depth != 2 or channel is None:
+            continue
+
+        if element.tag.startswith(WXR_NAMESPACE_PREFIX) and element.tag.endswith('}author'):
+            author_emails[_wxr_value(element, 'author_login')] = _wxr_value(element, 'author_email')
+        elif element.tag == 'item' and _wxr_value(element, 'post_type') == 'post':
+            post_id = _wxr_value(element, 'post_id').strip()
+            author = element.findtext(WXR_CREATOR_TAG, '')
+            category = next(
+                (c for c in element.iterfind('category') if c.get('domain') == 'category'), None
+            )
+            yield {
+                'type': 'post',
+                'id': post_id,
+                'title': element.findtext('title', ''),
+                'slug': _wxr_value(element, 'post_name'),
+                'content': element.findtext(WXR_CONTENT_TAG, ''),
+                'status': WXR_POST_STATUSES.get(_wxr_value(element, 'status'), 'draft'),
+                'author': author,
+                'author_email': author_emails.get(author, ''),
+                'category': category.text if category is not None else '',
+                'category_slug': category.get('nicename', '') if category is not None else '',
+                'created_at': _wxr_value(element, 'post_date_gmt'),
+            }
+            for child in element:
+                if child.tag.startswith(WXR_NAMESPACE_PREFIX) and child.tag.endswith('}comment'):
+                    comment = _wxr_comment(child, post_id)
+                    if comment is not None:
+                        yield comment
+        # Прочитані елементи каналу більше не потрібні
+        channel.clear()
+
+
+READERS = {
+    'json': read_json,
+    'jsonl': read_jsonl,
+    'csv': read_csv,
+    'wxr': read_wxr,
+}
+
+
+def _text(raw, key):
+    value = raw.get(key)
+    return '' if value is None else str(value)
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    value = '' if value is None else str(value).strip().lower()
+    if value in ('', '1', 'true', 'yes'):
+        return True
+    if value in ('0', 'false', 'no'):
+        return False
+    raise ValueError(f'некоректне булеве значення "{value}"')
+
+
+def _parse_date(value):
+    '''Дата з файлу; без часового поясу вважається UTC. Порожня або нульова (0000-00-00) — None'''
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        return None
+    if parsed is None:
+        raise ValueError(f'некоректна дата "{value}"')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def normalize_record(raw):
+    '''Приводить запис будь-якого формату до спільного вигляду; ValueError — запис некоректний'''
+    kind = _text(raw, 'type').strip().lower() or 'post'
+    if kind not in ('post', 'comment'):
+        raise ValueError(f'невідомий тип запису "{kind}"')
+    source_id = _text(raw, 'id').strip()
+    if not source_id:
+        raise ValueError('запис без id')
+
+    record = {
+        'type': kind,
+        'id': source_id,
+        'content': _text(raw, 'content'),
+        'author': _text(raw, 'author').strip(),
+        'author_email': _text(raw, 'author_email').strip().lower(),
+        'created_at': _parse_date(_text(raw, 'created_at')),
+    }
+    if kind == 'post':
+        status = _text(raw, 'status').strip() or 'published'
+        if status not in dict(Post.STATUS_CHOICES):
+            raise ValueError(f'невідомий статус "{status}"')
+        record.update(
+            title=_text(raw, 'title').strip(),
+            slug=_text(raw, 'slug').strip(),
+            status=status,
+            category=_text(raw, 'category').strip(),
+            category_slug=_text(raw, 'category_slug').strip(),
+        )
+        if not record['title']:
+            raise ValueError('пост без заголовка')
+    else:
+        record.update(
+            post=_text(raw, 'post').strip(),
+            parent=_text(raw, 'parent').strip(),
+            is_active=_parse_bool(raw.get('is_active')),
+        )
+        if not record['post']:
+            raise ValueError('коментар без post')
+    return record
+
+
+class ContentImporter:
+    '''
+    Масовий імпорт постів і коментарів для ImportJob.
+
+    Записи читаються потоково і пишуться шматками по CHUNK_SIZE через bulk_create:
+    автори і категорії шукаються в словниках, завантажених один раз, унікальні slug-и
+    розподіляються в пам'яті (без запиту на кожен пост). Кожен шматок разом із
+    відповідностями id (ImportedObject) і лічильником processed_records комітиться однією
+    транзакцією, тож перерваний імпорт продовжується з останнього записаного шматка.
+
+    bulk_create не викликає Post.save() і сигнали, тому excerpt рахується тут,
+    а кеш стрічок скидається один раз наприкінці.
+    '''
+    SLUG_BASE_LENGTH = 190
+    SLUG_RETRIES = 3
+
+    def __init__(self, job, chunk_size=None, progress=None):
+        options = settings.CONTENT_IMPORT
+        self.job = job
+        self.chunk_size = chunk_size or options['CHUNK_SIZE']
+        self.max_errors = options['MAX_ERRORS']
+        self.progress = progress
+
+    def run(self):
+        job = self.job
+        # Рядок імпорту блокується на час переходу в running: другий запуск (повторний resume)
+        # бачить running і не пише ті самі шматки паралельно
+        with transaction.atomic():
+            current = ImportJob.objects.select_for_update().values_list('status', flat=True).get(pk=job.pk)
+            if current == 'completed':
+                raise ValueError(f'Імпорт #{job.pk} уже завершено')
+            if current == 'running':
+                raise ValueError(f'Імпорт #{job.pk} уже виконується')
+            job.status = 'running'
+            job.started_at = job.started_at or timezone.now()
+            job.finished_at = None
+            job.save(update_fields=['status', 'started_at', 'finished_at'])
+        self._load_maps()
+
+        try:
+            with job.open_source() as stream:
+                chunk = []
+                for index, raw in enumerate(READERS[job.format](stream)):
+                    if index < job.processed_records:
+                        continue
+                    chunk.append((index, raw))
+                    if len(chunk) >= self.chunk_size:
+                        self._write_chunk(chunk)
+                        chunk = []
+                if chunk:
+                    self._write_chunk(chunk)
+            self._link_pending_replies()
+        except Exception as e:
+            logger.exception('Import job %s failed', job.pk)
+            job.status = 'failed'
+            self._add_error(None, str(e))
+            job.save(update_fields=['status', 'errors'])
+            raise
+
+        job.status = 'completed'
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'finished_at'])
+        ResponseCache.invalidate(*FEED_CACHE_GROUPS)
+        logger.info(
+            'Import job %s completed: %s posts, %s comments, %s skipped',
+            job.pk, job.posts_created, job.comments_created, job.skipped,
+        )
+        return {
+            'job': job.pk,
+            'posts_created': job.posts_created,
+            'comments_created': job.comments_created,
+            'skipped': job.skipped,
+        }
+
+    def _load_maps(self):
+        self.users_by_name = {}
+        self.users_by_email = {}
+        for user_id, username, email in User.objects.values_list('id', 'username', 'email').iterator():
+            self.users_by_name[username] = user_id
+            if email:
+                self.users_by_email.setdefault(email.lower(), user_id)
+
+        self.categories_by_slug = {}
+        self.categories_by_name = {}
+        for category_id, slug, name in Category.objects.values_list('id', 'slug', 'name'):
+            self.categories_by_slug.setdefault(slug, category_id)
+            self.categories_by_name.setdefault(name.lower(), category_id)
+
+        self.slugs = set(Post.objects.values_list('slug', flat=True).iterator())
+        self.slug_counters = {}
+
+        # Відповідності з попереднього запуску цієї ж задачі
+        self.imported = {'post': {}, 'comment': {}}
+        for kind, source_id, object_id in ImportedObject.objects.filter(job=self.job).values_list(
+            'kind', 'source_id', 'object_id'
+        ).iterator():
+            self.imported[kind][source_id] = object_id
+
+    def _add_error(self, index, message):
+        self.job.errors.append(message if index is None else f'Запис {index + 1}: {message}')
+        del self.job.errors[:-self.max_errors]
+
+    def _write_chunk(self, chunk):
+        job = self.job
+        posts, comments = [], []
+        skipped = 0
+        for index, raw in chunk:
+            try:
+                record = normalize_record(raw)
+            except ValueError as e:
+                self._add_error(index, str(e))
+                skipped += 1
+                continue
+            (posts if record['type'] == 'post' else comments).append((index, record))
+
+        with transaction.atomic():
+            posts_created, posts_skipped = self._create_posts(posts)
+            comments_created, comments_skipped = self._create_comments(comments)
+            job.processed_records += len(chunk)
+            job.posts_created += posts_created
+            job.comments_created += comments_created
+            job.skipped += skipped + posts_skipped + comments_skipped
+            job.save(update_fields=[
+                'processed_records', 'posts_created', 'comments_created', 'skipped', 'errors',
+            ])
+
+        if self.progress is not None:
+            self.progress(job)
+
+    def _resolve_author(self, record):
+        author_id = self.users_by_name.get(record['author'])
+        if author_id is None and record['author_email']:
+            author_id = self.users_by_email.get(record['author_email'])
+        return author_id if author_id is not None else self.job.default_author_id
+
+    def _resolve_category(self, record):
+        if not record['category'] and not record['category_slug']:
+            return None
+        category_id = self.categories_by_slug.get(record['category_slug']) \
+            or self.categories_by_name.get(record['category'].lower())
+        if category_id is None:
+            name = record['category'] or record['category_slug']
+            category = Category.objects.create(
+                name=name, slug=record['category_slug'] or slugify(name), description='',
+            )
+            category_id = category.pk
+            self.categories_by_slug.setdefault(category.slug, category_id)
+            self.categories_by_name.setdefault(name.lower(), category_id)
+        return category_id
+
+    def _allocate_slug(self, record):
+        base = (slugify(record['slug']) or slugify(record['title']) or 'post')[:self.SLUG_BASE_LENGTH]
+        slug = base
+        while slug in self.slugs:
+            self.slug_counters[base] = self.slug_counters.get(base, 1) + 1
+            slug = f'{base}-{self.slug_counters[base]}'
+        self.slugs.add(slug)
+        return slug
+
+    def _create_posts(self, records):
+        created_ids = self.imported['post']
+        rows = []
+        skipped = 0
+        seen = set()
+        for index, record in records:
+            if record['id'] in created_ids or record['id'] in seen:
+                skipped += 1
+                continue
+            author_id = self._resolve_author(record)
+            if author_id is None:
+                self._add_error(index, f'автор "{record["author"]}" не знайдений')
+                skipped += 1
+                continue
+            seen.add(record['id'])
+            rows.append((record, Post(
+                title=record['title'][:200],
+                slug=self._allocate_slug(record),
+                content=record['content'],
+                excerpt=Post.make_excerpt(record['content']),
+                status=record['status'],
+                author_id=author_id,
+                category_id=self._resolve_category(record),
+            )))
+        if not rows:
+            return 0, skipped
+
+        posts = [post for _, post in rows]
+        self._bulk_create_posts(posts)
+        self._restore_dates(Post, rows)
+
+        for record, post in rows:
+            created_ids[record['id']] = post.pk
+        ImportedObject.objects.bulk_create([
+            ImportedObject(job=self.job, kind='post', source_id=record['id'], object_id=post.pk)
+            for record, post in rows
+        ])
+        return len(rows), skipped
+
+    def _bulk_create_posts(self, posts):
+        # slug-и розподілені за знімком таблиці; якщо хтось паралельно зайняв slug — розподіляємо заново
+        for attempt in range(self.SLUG_RETRIES):
+            try:
+                with transaction.atomic():
+                    Post.objects.bulk_create(posts)
+                return
+            except IntegrityError:
+                if attempt == self.SLUG_RETRIES - 1:
+                    raise
+                taken = set(Post.objects.filter(slug__in=[p.slug for p in posts]).values_list('slug', flat=True))
+                self.slugs |= taken
+                for post in posts:
+                    post.pk = None
+                    if post.slug in taken:
+                        post.slug = self._allocate_slug({'slug': post.slug, 'title': post.title})
+
+    def _restore_dates(self, model, rows):
+        # created_at має auto_now_add, тож bulk_create ставить поточний час — повертаємо дату з архіву
+        dated = []
+        for record, obj in rows:
+            if record['created_at'] is not None:
+                obj.created_at = obj.updated_at = record['created_at']
+                dated.append(obj)
+        if dated:
+            model.objects.bulk_update(dated, ['created_at', 'updated_at'])
+
+    def _create_comments(self, records):
+        post_ids = self.imported['post']
+        created_ids = self.imported['comment']
+        rows = []
+        skipped = 0
+        seen = set()
+        for index, record in records:
+            if record['id'] in created_ids or record['id'] in seen:
+                skipped += 1
+                continue
+            post_id = post_ids.get(record['post'])
+            if post_id is None:
+                self._add_error(index, f'пост "{record["post"]}" коментаря не імпортований')
+                skipped += 1
+                continue
+            author_id = self._resolve_author(record)
+            if author_id is None:
+                self._add_error(index, f'автор "{record["author"]}" не знайдений')
+                skipped += 1
+                continue
+            seen.add(record['id'])
+            rows.append((record, Comment(
+                post_id=post_id,
+                author_id=author_id,
+                content=record['content'],
+                is_active=record['is_active'],
+            )))
+        if not rows:
+            return 0, skipped
+
+        Comment.objects.bulk_create([comment for _, comment in rows])
+        for record, comment in rows:
+            created_ids[record['id']] = comment.pk
+
+        # Батьківські коментарі з попередніх шматків і з цього ж шматка вже мають id;
+        # ті, що йдуть у файлі пізніше, зв'язуються в _link_pending_replies
+        mappings = []
+        for record, comment in rows:
+            pending = ''
+            if record['parent']:
+                comment.parent_id = created_ids.get(record['parent'])
+                if comment.parent_id is None:
+                    pending = record['parent']
+            if record['created_at'] is not None:
+                comment.created_at = comment.updated_at = record['created_at']
+            mappings.append(ImportedObject(
+                job=self.job, kind='comment', source_id=record['id'], object_id=comment.pk,
+                pending_parent=pending,
+            ))
+
+        Comment.objects.bulk_update(
+            [comment for record, comment in rows if record['parent'] or record['created_at'] is not None],
+            ['parent', 'created_at', 'updated_at'],
+        )
+        ImportedObject.objects.bulk_create(mappings)
+        return len(rows), skipped
+
+    def _link_pending_replies(self):
+        pending = ImportedObject.objects.filter(job=self.job, kind='comment').exclude(pending_parent='')
+        created_ids = self.imported['comment']
+        while True:
+            batch = list(pending.order_by('pk')[:self.chunk_size])
+            if not batch:
+                return
+            with transaction.atomic():
+                replies = []
+                for mapping in batch:
+                    parent_id = created_ids.get(mapping.pending_parent)
+                    if parent_id is None:
+                        self._add_error(None, f'батьківський коментар "{mapping.pending_parent}" '
+                                              f'для "{mapping.source_id}" не знайдений')
+                    else:
+                        replies.append(Comment(pk=mapping.object_id, parent_id=parent_id))
+                    mapping.pending_parent = ''
+                Comment.objects.bulk_update(replies, ['parent'])
+                ImportedObject.objects.bulk_update(batch, ['pending_parent'])
+                self.job.save(update_fields=['errors'])
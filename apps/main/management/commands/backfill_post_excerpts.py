@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.main.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Заповнює posts.excerpt для постів, створених до появи колонки'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Скільки постів оновлювати одним UPDATE',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перерахувати excerpt для всіх постів, а не лише порожні',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Post.objects.all() if options['all'] else Post.objects.filter(
+            Q(excerpt='') & ~Q(content='')
+        )
+
+        # Keyset по id: кожен батч — окремий короткий UPDATE, content рахується в БД
+        last_id = 0
+        updated = 0
+        while True:
+            ids = list(
+                queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            updated += Post.objects.filter(id__in=ids).update(excerpt=Post.excerpt_expression())
+            last_id = ids[-1]
+            self.stdout.write(f'Оновлено {updated} постів (до id={last_id})')
+
+        self.stdout.write(self.style.SUCCESS(f'Готово: оновлено {updated} постів'))
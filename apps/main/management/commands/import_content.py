@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.main.importers import ContentImporter
+from apps.main.models import ImportJob
+
+
+class Command(BaseCommand):
+    help = 'Масово імпортує пости і коментарі з файлу JSON, JSON Lines, CSV або WordPress WXR'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            help='Шлях до файлу імпорту',
+        )
+        parser.add_argument(
+            '--format',
+            choices=[value for value, _ in ImportJob.FORMAT_CHOICES],
+            help='Формат файлу (за замовчуванням — за розширенням)',
+        )
+        parser.add_argument(
+            '--default-author',
+            help='Username автора для записів, чий автор не знайдений',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Скільки записів писати однією транзакцією',
+        )
+        parser.add_argument(
+            '--resume',
+            type=int,
+            metavar='JOB_ID',
+            help='Продовжити перерваний імпорт з останнього записаного шматка',
+        )
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            try:
+                job = ImportJob.objects.get(pk=options['resume'])
+            except ImportJob.DoesNotExist:
+                raise CommandError(f"Імпорт #{options['resume']} не знайдений")
+            if job.status == 'completed':
+                raise CommandError(f'Імпорт #{job.pk} уже завершено')
+            if job.status == 'running':
+                raise CommandError(f'Імпорт #{job.pk} уже виконується')
+            self.stdout.write(f'Продовжуємо імпорт #{job.pk} з запису {job.processed_records + 1}')
+        else:
+            job = self._create_job(options)
+            self.stdout.write(f'Імпорт #{job.pk}: {job.source} ({job.format})')
+
+        try:
+            ContentImporter(job, chunk_size=options['chunk_size'], progress=self._report).run()
+        except Exception as e:
+            raise CommandError(
+                f'Імпорт #{job.pk} перервано: {e}. Продовжити: manage.py import_content --resume {job.pk}'
+            )
+
+        for error in job.errors:
+            self.stdout.write(self.style.WARNING(error))
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {job.posts_created} постів, {job.comments_created} коментарів, пропущено {job.skipped}'
+        ))
+
+    def _create_job(self, options):
+        path = options['path']
+        if not path:
+            raise CommandError('Вкажіть файл імпорту або --resume JOB_ID')
+        file_format = options['format'] or ImportJob.detect_format(path)
+        if not file_format:
+            raise CommandError('Не вдалося визначити формат файлу, вкажіть --format')
+
+        default_author = None
+        if options['default_author']:
+            try:
+                default_author = get_user_model().objects.get(username=options['default_author'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Користувач {options['default_author']} не знайдений")
+
+        try:
+            open(path, 'rb').close()
+        except OSError as e:
+            raise CommandError(f'Не вдалося відкрити {path}: {e}')
+
+        return ImportJob.objects.create(source=path, format=file_format, default_author=default_author)
+
+    def _report(self, job):
+        self.stdout.write(
+            f'Оброблено {job.processed_records} записів: {job.posts_created} постів, '
+            f'{job.comments_created} коментарів, пропущено {job.skipped}'
+        )
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.11 on 2026-10-17 08:54
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_related_posts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'rollup_checkpoints',
+            },
+        ),
+        migrations.CreateModel(
+            name='PostDailyViews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('post', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='main.post')),
+            ],
+            options={
+                'db_table': 'post_daily_views',
+                'indexes': [models.Index(fields=['day'], name='post_daily_views_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'day'), name='post_daily_views_unique_day')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostViewEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('viewed_at', models.DateTimeField()),
+                ('post', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='main.post')),
+            ],
+            options={
+                'db_table': 'post_view_events',
+                'indexes': [django.contrib.postgres.indexes.BrinIndex(fields=['viewed_at'], name='post_view_events_at_brin')],
+            },
+        ),
+    ]
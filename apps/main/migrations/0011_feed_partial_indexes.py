@@ -0,0 +1,47 @@
+# Generated by Django 5.2.11 on 2026-10-17 09:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_post_view_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='posts_created_2e2442_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='posts_status_ecf387_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='posts_categor_4138d2_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='posts_author__f2f966_idx',
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-created_at', '-id'], include=('updated_at', 'views_count'), name='posts_published_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['category', '-created_at', '-id'], name='posts_published_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-views_count', '-id'], name='posts_published_views_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-created_at', '-id'], name='posts_author_created_idx'),
+        ),
+    ]
@@ -1,5 +1,11 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import BrinIndex, GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Concat, Left, Length, Now
+from django.db.models.lookups import GreaterThan
 from django.utils.text import slugify
 from django.urls import reverse
 
@@ -9,6 +15,7 @@ class Category(models.Model):
     slug = models.SlugField(max_length=200)
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'categories'
@@ -23,22 +30,126 @@ class Category(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
-class PostManager(models.Manager):
-    #Менеджер для Post
+class PostQuerySet(models.QuerySet):
+    #QuerySet для Post (методи доступні і через Post.objects)
     def published(self):
         return self.filter(status='published')
 
+    def visible_to(self, user):
+        '''Опубліковані пости і власні чернетки користувача'''
+        if not user.is_authenticated:
+            return self.published()
+        return self.filter(Q(status='published') | Q(author=user))
+
+    def visible_branches(self, user):
+        '''
+        Диз'юнктні гілки visible_to. OR по різних колонках планувальник не зводить до одного
+        індексу і сортує всі опубліковані пости заради сторінки, тому сторінку стрічки
+        вибирає slice_by_union — окремим індексним сканом на гілку.
+        '''
+        published = Q(status='published')
+        if not user.is_authenticated:
+            return (published,)
+        return (published, Q(author=user) & ~published)
+
+    def slice_by_union(self, branches, low, high):
+        '''
+        Рядки [low:high] відсортованого queryset, у якому branches — диз'юнктні частини його умови.
+        Ключі сторінки — UNION ALL гілок, кожна з LIMIT high по своєму індексу; потім повні рядки
+        (з анотаціями стрічки) одним запитом по pk у порядку ключів. Якщо гілка одна або сортування
+        не повторити на UNION — звичайний зріз.
+        '''
+        keys = self._union_keys(branches, low, high)
+        if keys is None:
+            return list(self[low:high])
+        ids = [row[0] for row in keys]
+        by_id = self.order_by().in_bulk(ids)
+        return [by_id[pk] for pk in ids if pk in by_id]
+
+    async def aslice_by_union(self, branches, low, high):
+        keys = self._union_keys(branches, low, high)
+        if keys is None:
+            return [obj async for obj in self[low:high]]
+        ids = [row[0] async for row in keys]
+        by_id = await self.order_by().ain_bulk(ids)
+        return [by_id[pk] for pk in ids if pk in by_id]
+
+    def _union_keys(self, branches, low, high):
+        ordering = self._union_ordering() if len(branches) > 1 else None
+        if ordering is None:
+            return None
+        pk_name = self.model._meta.pk.attname
+        columns = [pk_name, *(name.lstrip('-') for name in ordering if name.lstrip('-') != pk_name)]
+        parts = [
+            self.filter(condition).order_by(*ordering).values_list(*columns)[:high]
+            for condition in branches
+        ]
+        return parts[0].union(*parts[1:], all=True).order_by(*ordering)[low:high]
+
+    def _union_ordering(self):
+        '''Сортування, якщо його можна повторити на UNION: лише прості колонки posts'''
+        query = self.query
+        if (query.is_sliced or query.is_empty() or query.combinator or query.distinct
+                or self._iterable_class is not models.query.ModelIterable):
+            return None
+        ordering = query.order_by or (self.model._meta.ordering if query.default_ordering else ())
+        if not ordering:
+            return None
+
+        opts = self.model._meta
+        resolved = []
+        for name in ordering:
+            if not isinstance(name, str):
+                return None
+            bare = name.lstrip('-')
+            bare = opts.pk.attname if bare == 'pk' else bare
+            try:
+                field = opts.get_field(bare)
+            except FieldDoesNotExist:
+                return None
+            if not field.concrete or field.is_relation or bare in query.annotations:
+                return None
+            resolved.append(('-' if name.startswith('-') else '') + field.attname)
+        return resolved
+
     def pinned_posts(self):
-        return self.filter(pin_info__isnull=False,
-                           pin_info__user__subscription__status ='active',
-                           pin_info__user__subscription__end_date__gt=models.functions.Now,
-                           status='published').select_related('pin_info', 'pin_info__user', 'pin_info__user__subscription').order_by('pin_info__pinned_at')
+        return self.filter(pin_info__active_until__gt=Now(),
+                           status='published').select_related('pin_info', 'pin_info__user').order_by('pin_info__pinned_at')
     def regular_posts(self):
         return self.filter(pin_info__isnull=True,status ='published')
 
+    def for_list(self):
+        '''Для стрічок: без повного тексту і tsvector — серіалізатори читають excerpt'''
+        return self.with_feed_info().defer('content', 'search_vector')
+
     def with_subscription_info(self):
         return self.select_related('author', 'author__subscription', 'category').prefetch_related('pin_info')
 
+    def with_feed_info(self):
+        '''Анотує все, що потрібно картці поста, щоб сторінка рендерилась фіксованою кількістю запитів'''
+        comment_model = self.model._meta.get_field('comments').related_model
+
+        active_comments = comment_model.objects.filter(
+            post=OuterRef('pk'), is_active=True
+        ).order_by().values('post').annotate(total=Count('pk')).values('total')
+
+        return self.select_related('author', 'category').annotate(
+            comments_count=Coalesce(Subquery(active_comments, output_field=models.IntegerField()), 0),
+            pin_is_active=Case(
+                When(pin_info__active_until__gt=Now(), then=Value(True)),
+                default=Value(False),
+                output_field=models.BooleanField(),
+            ),
+            pinned_at=F('pin_info__pinned_at'),
+            pinned_by_id=F('pin_info__user_id'),
+            pinned_by_username=F('pin_info__user__username'),
+        )
+
+
+class PostManager(models.Manager.from_queryset(PostQuerySet)):
+    #Менеджер для Post
+    pass
+
 
 class Post(models.Model):
     STATUS_CHOICES = (
@@ -46,16 +157,28 @@ class Post(models.Model):
         ('published', 'Published'),
     )
 
+    EXCERPT_LENGTH = 200
+
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True, blank=True)
     content = models.TextField()
+    # Початок content для стрічок, щоб не тягнути весь текст
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH + 3, blank=True, editable=False)
     image = models.ImageField(upload_to='posts/', blank=True)
+    # Зменшені варіанти image (див. apps/core/renditions.py)
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='posts')
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, related_name='author_posts')
     status = models.CharField(choices=STATUS_CHOICES, max_length=200, default='published')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     views_count = models.PositiveIntegerField(default=0)
+    # Підтримується самою БД: заголовок важить більше за текст
+    search_vector = models.GeneratedField(
+        expression=SearchVector('title', weight='A', config='simple') + SearchVector('content', weight='B', config='simple'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     objects = PostManager()
 
@@ -65,29 +188,80 @@ class Post(models.Model):
         verbose_name_plural = 'posts'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['-created_at']),
-            models.Index(fields=['status','-created_at']),
-            models.Index(fields=['category','-created_at']),
-            models.Index(fields=['author','-created_at']),
+            # Стрічки читають лише опубліковані пости: часткові індекси у порядку keyset-пагінації (created_at, id).
+            # Загального індексу по created_at немає — планувальник обирав його замість часткового з фільтром і сортуванням.
+            # INCLUDE — для валідатора стрічки (COUNT, MAX(updated_at), SUM(views_count)) скануванням лише індексу
+            models.Index(
+                fields=['-created_at', '-id'], include=['updated_at', 'views_count'],
+                condition=Q(status='published'), name='posts_published_feed_idx',
+            ),
+            models.Index(
+                fields=['category', '-created_at', '-id'],
+                condition=Q(status='published'), name='posts_published_category_idx',
+            ),
+            models.Index(
+                fields=['-views_count', '-id'],
+                condition=Q(status='published'), name='posts_published_views_idx',
+            ),
+            # Мої пости і гілка власних чернеток у visible_to
+            models.Index(fields=['author', '-created_at', '-id'], name='posts_author_created_idx'),
+            GinIndex(fields=['search_vector'], name='posts_search_vector_gin'),
         ]
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Статус з БД: сигнали відрізняють публікацію від редагування вже опублікованого поста
+        instance.loaded_status = instance.__dict__.get('status')
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        if 'content' not in self.get_deferred_fields():
+            self.excerpt = self.make_excerpt(self.content)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'content' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
         super().save(*args, **kwargs)
 
+    @classmethod
+    def make_excerpt(cls, content):
+        if len(content) > cls.EXCERPT_LENGTH:
+            return content[:cls.EXCERPT_LENGTH] + '...'
+        return content
+
+    @classmethod
+    def excerpt_expression(cls):
+        '''Те саме, що make_excerpt, але в SQL (для масового оновлення без читання content)'''
+        return Case(
+            When(
+                GreaterThan(Length('content'), cls.EXCERPT_LENGTH),
+                then=Concat(Left('content', cls.EXCERPT_LENGTH), Value('...')),
+            ),
+            default=F('content'),
+            output_field=models.CharField(),
+        )
+
     def get_absolute_url(self):
         return reverse('post-detail', kwargs={'slug': self.slug})
 
     @property
     def comment_count(self):
-        return self.comment_filter(is_active=True).count()
+        if hasattr(self, 'comments_count'):
+            # анотовано в PostQuerySet.with_feed_info()
+            return self.comments_count
+        return self.comments.filter(is_active=True).count()
 
     @property
     def is_pinned(self):
-        return hasattr(self, 'pin_info') and self.pin_info is not None
+        '''Пост закріплений і підписка автора закріплення ще діє'''
+        if hasattr(self, 'pin_is_active'):
+            return self.pin_is_active
+        pin_info = getattr(self, 'pin_info', None)
+        return pin_info is not None and pin_info.is_effective
 
     @property
     def can_be_pinned_by_user(self):
@@ -113,10 +287,27 @@ class Post(models.Model):
 
 
     def increment_views(self):
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+        '''Реєструє перегляд у буфері, в БД він потрапить через задачу flush_post_views'''
+        from .services import ViewCounterService
+        ViewCounterService.record_view(self.pk)
+
+    async def aincrement_views(self):
+        from .services import ViewCounterService
+        await ViewCounterService.arecord_view(self.pk)
 
     def get_pinned_info(self):
+        if hasattr(self, 'pin_is_active'):
+            if not self.pin_is_active:
+                return {'is_pinned' : False}
+            return {
+                'is_pinned': True,
+                'pinned_at' : self.pinned_at,
+                'pinned_by' : {
+                    'id' : self.pinned_by_id,
+                    'username' : self.pinned_by_username,
+                    'has_active_subscription' : True,
+                }
+            }
         if self.is_pinned:
             return {
                 'is_pinned': True,
@@ -124,7 +315,153 @@ class Post(models.Model):
                 'pinned_by' : {
                     'id' : self.pin_info.user.id,
                     'username' : self.pin_info.user.username,
-                    'has_active_subscription' : self.pin_info.user.subscription.is_active,
+                    'has_active_subscription' : self.pin_info.is_effective,
                 }
             }
         return {'is_pinned' : False}
+
+
+class ImportJob(models.Model):
+    '''Масовий імпорт постів і коментарів з файлу (див. apps/main/importers.py)'''
+    FORMAT_CHOICES = [
+        ('json', 'JSON'),
+        ('jsonl', 'JSON Lines'),
+        ('csv', 'CSV'),
+        ('wxr', 'WordPress WXR'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    source = models.CharField(max_length=500)
+    file = models.FileField(upload_to='imports/', blank=True)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    default_author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='import_jobs'
+    )
+    # Контрольна точка: стільки записів файлу вже записано (разом з ними в одній транзакції)
+    processed_records = models.PositiveIntegerField(default=0)
+    posts_created = models.PositiveIntegerField(default=0)
+    comments_created = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'import_jobs'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Import #{self.pk} ({self.format}) - {self.status}"
+
+    @classmethod
+    def detect_format(cls, name):
+        extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+        return {
+            'json': 'json',
+            'jsonl': 'jsonl',
+            'ndjson': 'jsonl',
+            'csv': 'csv',
+            'xml': 'wxr',
+            'wxr': 'wxr',
+        }.get(extension)
+
+    def open_source(self):
+        if self.file:
+            return self.file.open('rb')
+        return open(self.source, 'rb')
+
+
+class ImportedObject(models.Model):
+    '''Відповідність id з файлу імпорту створеному об'єкту; з неї імпорт відновлюється після переривання'''
+    KIND_CHOICES = [
+        ('post', 'Post'),
+        ('comment', 'Comment'),
+    ]
+
+    job = models.ForeignKey(ImportJob, on_delete=models.CASCADE, related_name='imported_objects')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    source_id = models.CharField(max_length=255)
+    object_id = models.PositiveBigIntegerField()
+    # id батьківського коментаря з файлу, якщо він ще не імпортований на момент запису відповіді
+    pending_parent = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        db_table = 'imported_objects'
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'kind', 'source_id'], name='imported_object_unique_source'),
+        ]
+
+
+class RelatedPost(models.Model):
+    '''Схожий пост на місці rank у списку post (див. apps/main/related.py)'''
+    # Пошук списку йде по унікальному індексу (post, rank), окремий індекс по post не потрібен
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+', db_index=False)
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_to')
+    rank = models.PositiveSmallIntegerField()
+    # Косинусна подібність TF-IDF з бонусом за спільну категорію
+    score = models.FloatField()
+
+    class Meta:
+        db_table = 'related_posts'
+        ordering = ['post', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'rank'], name='related_posts_unique_rank'),
+        ]
+
+
+class PostViewEvent(models.Model):
+    '''
+    Сирий журнал переглядів (лише додавання): пишеться пачками задачею flush_view_events,
+    згортається у PostDailyViews задачею rollup_post_views і чиститься після VIEW_EVENTS['RETENTION_DAYS'].
+    Без зовнішнього ключа й індексу по post: вставка дешева, видалення поста журнал не сканує.
+    '''
+    post = models.ForeignKey(Post, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+')
+    viewed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'post_view_events'
+        indexes = [
+            # Журнал росте за часом, BRIN на кілька сторінок замість B-tree для очищення за датою
+            BrinIndex(fields=['viewed_at'], name='post_view_events_at_brin'),
+        ]
+
+
+class PostDailyViews(models.Model):
+    '''Перегляди поста за добу (UTC), згорнуті з PostViewEvent'''
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='daily_views', db_index=False)
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'post_daily_views'
+        constraints = [
+            # Також індекс для часового ряду поста
+            models.UniqueConstraint(fields=['post', 'day'], name='post_daily_views_unique_day'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='post_daily_views_day_idx'),
+        ]
+
+
+class RollupCheckpoint(models.Model):
+    '''Останній згорнутий id журналу; рядок блокується на час згортання і запису пачки подій'''
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rollup_checkpoints'
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
@@ -0,0 +1,70 @@
+from rest_framework.settings import api_settings
+
+from apps.core.filters import FullTextSearchFilter
+from apps.core.pagination import KeysetPagination
+from .services import PinnedFeedService
+
+
+class PinnedFirstPagination(KeysetPagination):
+    '''
+    KeysetPagination стрічки постів, у якій пости з чинним закріпленням стоять першими.
+    Сторінки — це основний потік без закріплених (PinnedFeedService.regular), тож курсори й номери
+    сторінок ті самі, що й без закріплень. Не більше PINNED_FEED['MAX_PINNED'] найновіших закріплених
+    серед тих, що проходять фільтри стрічки, додаються один раз, на початок першої сторінки, понад
+    page_size — тож перша сторінка довша за решту. count їх враховує і тому не дорівнює сумі
+    page_size по сторінках. З явним ?ordering= чи пошуком закріплені нічим не виділяються.
+    '''
+    pinned = ()
+    pinned_count = 0
+
+    def pinned_first(self, request):
+        return not any(
+            request.query_params.get(param)
+            for param in (api_settings.ORDERING_PARAM, FullTextSearchFilter.search_param)
+        )
+
+    def is_first_page(self):
+        if self.keyset:
+            return not self.has_previous
+        return not self.page.has_previous()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.pinned, self.pinned_count = [], 0
+        if not self.pinned_first(request):
+            return super().paginate_queryset(queryset, request, view)
+
+        pinned = PinnedFeedService.pinned(queryset)
+        page = super().paginate_queryset(PinnedFeedService.regular(queryset, pinned), request, view)
+        return self.with_pinned(page, pinned)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.pinned, self.pinned_count = [], 0
+        if not self.pinned_first(request):
+            return await super().apaginate_queryset(queryset, request, view)
+
+        pinned = await PinnedFeedService.apinned(queryset)
+        page = await super().apaginate_queryset(PinnedFeedService.regular(queryset, pinned), request, view)
+        return self.with_pinned(page, pinned)
+
+    def with_pinned(self, page, pinned):
+        if page is None or not pinned:
+            return page
+        if self.is_first_page():
+            self.pinned = pinned
+        if self.pinned or not self.keyset:
+            # count сторінкового режиму включає закріплені на кожній сторінці
+            self.pinned_count = len(pinned)
+        return [*self.pinned, *page]
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if 'count' in response.data:
+            response.data['count'] += self.pinned_count
+        return response
+
+    def get_paginated_data(self, data):
+        '''Поля пагінації без results — для відповідей, де список лежить під іншим ключем'''
+        paginated = dict(self.get_paginated_response(data).data)
+        paginated.pop('results')
+        return paginated
+
@@ -0,0 +1,317 @@
+import logging
+import os
+import re
+import tempfile
+import zlib
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from scipy import sparse
+
+from .models import Post, RelatedPost
+
+logger = logging.getLogger(__name__)
+
+# Слова з літер (будь-якої мови), не коротші за 2 символи; числа не несуть теми
+TOKEN_RE = re.compile(r'[^\W\d_]{2,}')
+
+
+def count_terms(rows, n_features, title_weight):
+    '''
+    (title, content) -> CSR-матриця кількостей термів (float32).
+    Колонка терміну — crc32(термін) mod n_features: словник не зберігається, і нові пости
+    потрапляють у той самий простір, що й проіндексовані раніше. Колізії сумуються.
+    '''
+    indptr, indices, data = [0], [], []
+    for title, content in rows:
+        counts = Counter(TOKEN_RE.findall(content.lower()))
+        for term in TOKEN_RE.findall(title.lower()):
+            counts[term] += title_weight
+        indices.extend(zlib.crc32(term.encode()) % n_features for term in counts)
+        data.extend(counts.values())
+        indptr.append(len(indices))
+    matrix = sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(indptr) - 1, n_features),
+    )
+    matrix.sum_duplicates()
+    return matrix
+
+
+def inverse_document_frequency(counts, min_df, max_df):
+    '''
+    Згладжений idf; терміни, що трапляються рідше за min_df документів (не зв'язують пости)
+    або частіше за частку max_df (службові слова), отримують 0 і випадають з векторів.
+    '''
+    n_docs = counts.shape[0]
+    df = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = (np.log((1.0 + n_docs) / (1.0 + df)) + 1.0).astype(np.float32)
+    idf[(df < min_df) | (df > max_df * n_docs)] = 0
+    return idf
+
+
+def tfidf_vectors(counts, idf, max_terms):
+    '''
+    Сублінійний tf * idf, у кожного поста лишаються max_terms найвагоміших термів, рядки L2-нормовані,
+    тож добуток рядків — косинусна подібність. Обрізання тримає матрицю і добутки розрідженими.
+    '''
+    vectors = counts.copy()
+    vectors.data = (1.0 + np.log(vectors.data)) * idf[vectors.indices]
+    vectors.eliminate_zeros()
+
+    rows = np.repeat(np.arange(vectors.shape[0]), np.diff(vectors.indptr))
+    order = np.lexsort((-vectors.data, rows))
+    rank = np.arange(len(order)) - vectors.indptr[rows[order]]
+    keep = np.sort(order[rank < max_terms])
+    vectors = sparse.csr_matrix(
+        (vectors.data[keep], vectors.indices[keep], np.searchsorted(keep, vectors.indptr)),
+        shape=vectors.shape,
+    )
+
+    norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    vectors.data /= np.repeat(norms, np.diff(vectors.indptr)).astype(np.float32)
+    return vectors
+
+
+def boost_same_category(similarities, row_categories, column_categories, boost):
+    '''Множить подібність пар з однієї категорії на (1 + boost), на місці'''
+    rows = np.repeat(np.arange(similarities.shape[0]), np.diff(similarities.indptr))
+    same = (row_categories[rows] == column_categories[similarities.indices]) & (row_categories[rows] > 0)
+    similarities.data[same] *= 1 + boost
+    return similarities
+
+
+def top_neighbours(similarities, top_k, min_score, exclude=None):
+    '''
+    Для кожного рядка CSR-матриці подібностей — (колонки, scores) до top_k найбільших, спершу найбільші.
+    exclude[i] — колонка, яку слід пропустити в рядку i (сам пост).
+    '''
+    result = []
+    for row in range(similarities.shape[0]):
+        start, end = similarities.indptr[row], similarities.indptr[row + 1]
+        columns = similarities.indices[start:end]
+        scores = similarities.data[start:end]
+        mask = scores >= min_score
+        if exclude is not None:
+            mask &= columns != exclude[row]
+        columns, scores = columns[mask], scores[mask]
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            columns, scores = columns[best], scores[best]
+        order = np.argsort(-scores, kind='stable')
+        result.append((columns[order], scores[order]))
+    return result
+
+
+class RelatedPostsIndex:
+    '''
+    Стан для інкрементальних оновлень: id проіндексованих постів, їх категорії і TF-IDF вектори,
+    idf останньої повної збірки і floors — найменший score у збереженому списку кожного поста
+    (0, якщо список неповний): новий пост потрапляє у список, лише якщо перевищує його.
+    '''
+
+    def __init__(self, ids, categories, vectors, idf, floors):
+        self.ids = ids
+        self.categories = categories
+        self.vectors = vectors
+        self.idf = idf
+        self.floors = floors
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            vectors = sparse.csr_matrix(
+                (data['data'], data['indices'], data['indptr']), shape=tuple(data['shape'])
+            )
+            return cls(data['ids'], data['categories'], vectors, data['idf'], data['floors'])
+
+    def save(self, path):
+        '''Пише у тимчасовий файл і атомарно підміняє: паралельне читання бачить цілий індекс'''
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, suffix='.npz', delete=False) as output:
+            np.savez(
+                output,
+                ids=self.ids, categories=self.categories, idf=self.idf, floors=self.floors,
+                data=self.vectors.data, indices=self.vectors.indices, indptr=self.vectors.indptr,
+                shape=np.asarray(self.vectors.shape),
+            )
+        os.replace(output.name, path)
+
+    def select(self, mask):
+        return RelatedPostsIndex(
+            self.ids[mask], self.categories[mask], self.vectors[mask], self.idf, self.floors[mask]
+        )
+
+
+class RelatedPostsService:
+    '''
+    Схожі пости: TF-IDF по title/content, top-k найближчих сусідів за косинусною подібністю
+    з бонусом за спільну категорію. Рахується задачами Celery (щоночі повністю, між ними —
+    лише нові пости), результат лежить у related_posts, і ендпоінт читає його одним запитом по індексу.
+    '''
+
+    @staticmethod
+    def options():
+        return settings.RELATED_POSTS
+
+    @staticmethod
+    def _published_rows(ids=None):
+        '''(id, category_id, title, content) опублікованих постів шматками по BATCH_SIZE'''
+        batch_size = RelatedPostsService.options()['BATCH_SIZE']
+        queryset = Post.objects.filter(status='published').order_by('pk')
+        if ids is not None:
+            for start in range(0, len(ids), batch_size):
+                chunk = [int(pk) for pk in ids[start:start + batch_size]]
+                yield list(queryset.filter(pk__in=chunk).values_list('pk', 'category_id', 'title', 'content'))
+            return
+        last_pk = 0
+        while True:
+            chunk = list(
+                queryset.filter(pk__gt=last_pk).values_list('pk', 'category_id', 'title', 'content')[:batch_size]
+            )
+            if not chunk:
+                return
+            yield chunk
+            last_pk = chunk[-1][0]
+
+    @staticmethod
+    def _count(chunks):
+        '''Кількості термів для шматків постів -> (ids, categories, counts)'''
+        options = RelatedPostsService.options()
+        ids, categories, blocks = [], [], []
+        for chunk in chunks:
+            ids.extend(row[0] for row in chunk)
+            categories.extend(row[1] or 0 for row in chunk)
+            blocks.append(count_terms(
+                ((row[2], row[3]) for row in chunk), options['N_FEATURES'], options['TITLE_WEIGHT']
+            ))
+        counts = sparse.vstack(blocks, format='csr') if blocks else sparse.csr_matrix(
+            (0, options['N_FEATURES']), dtype=np.float32
+        )
+        return np.asarray(ids, dtype=np.int64), np.asarray(categories, dtype=np.int64), counts
+
+    @staticmethod
+    def _store(post_ids, neighbours):
+        '''Замінює списки схожих для post_ids: neighbours[i] — [(related_id, score), ...]'''
+        rows = [
+            RelatedPost(post_id=int(post_id), related_id=int(related_id), rank=rank, score=float(score))
+            for post_id, items in zip(post_ids, neighbours)
+            for rank, (related_id, score) in enumerate(items)
+        ]
+        with transaction.atomic():
+            RelatedPost.objects.filter(post_id__in=[int(post_id) for post_id in post_ids]).delete()
+            RelatedPost.objects.bulk_create(rows, batch_size=5000)
+
+    @staticmethod
+    def _floor(scores):
+        return float(scores[-1]) if len(scores) >= RelatedPostsService.options()['TOP_K'] else 0.0
+
+    @staticmethod
+    def rebuild() -> dict:
+        '''Повна збірка: idf з усього корпусу, сусіди для кожного опублікованого поста'''
+        options = RelatedPostsService.options()
+        ids, categories, counts = RelatedPostsService._count(RelatedPostsService._published_rows())
+        idf = inverse_document_frequency(counts, options['MIN_DF'], options['MAX_DF'])
+        # Блоками: тимчасові масиви сортування не ростуть з корпусом
+        vectors = sparse.vstack([
+            tfidf_vectors(counts[start:start + options['BATCH_SIZE']], idf, options['MAX_TERMS'])
+            for start in range(0, max(len(ids), 1), options['BATCH_SIZE'])
+        ], format='csr')
+        del counts
+
+        # Добуток блоками рядків: у пам'яті лише BLOCK_SIZE x N подібностей
+        transposed = vectors.T.tocsr()
+        floors = np.zeros(len(ids), dtype=np.float32)
+        for start in range(0, len(ids), options['BLOCK_SIZE']):
+            end = min(start + options['BLOCK_SIZE'], len(ids))
+            similarities = boost_same_category(
+                vectors[start:end] @ transposed, categories[start:end], categories, options['CATEGORY_BOOST']
+            )
+            neighbours = top_neighbours(
+                similarities, options['TOP_K'], options['MIN_SCORE'], exclude=np.arange(start, end)
+            )
+            RelatedPostsService._store(
+                ids[start:end], [list(zip(ids[columns], scores)) for columns, scores in neighbours]
+            )
+            floors[start:end] = [RelatedPostsService._floor(scores) for _, scores in neighbours]
+
+        # Списки постів, знятих з публікації
+        RelatedPost.objects.exclude(post__status='published').delete()
+        RelatedPostsIndex(ids, categories, vectors, idf, floors).save(options['INDEX_PATH'])
+        logger.info('Related posts rebuilt for %d posts', len(ids))
+        return {'posts': len(ids)}
+
+    @staticmethod
+    def update() -> dict:
+        '''
+        Інкрементальне оновлення: вектори нових постів (з idf останньої повної збірки), їх сусіди
+        і вставка нових постів у списки старих, де вони кращі за найгірший елемент.
+        Зміни тексту вже проіндексованих постів і нові терміни підхоплює нічна повна збірка.
+        '''
+        options = RelatedPostsService.options()
+        index = RelatedPostsIndex.load(options['INDEX_PATH'])
+        if index is None:
+            return RelatedPostsService.rebuild()
+
+        published = np.fromiter(
+            Post.objects.filter(status='published').values_list('pk', flat=True).iterator(chunk_size=10000),
+            dtype=np.int64,
+        )
+        index = index.select(np.isin(index.ids, published))
+        new_ids, new_categories, counts = RelatedPostsService._count(
+            RelatedPostsService._published_rows(np.setdiff1d(published, index.ids))
+        )
+        if not len(new_ids):
+            index.save(options['INDEX_PATH'])
+            return {'posts': 0, 'updated': 0}
+
+        new_vectors = tfidf_vectors(counts, index.idf, options['MAX_TERMS'])
+        old_count = len(index.ids)
+        ids = np.concatenate([index.ids, new_ids])
+        categories = np.concatenate([index.categories, new_categories])
+        vectors = sparse.vstack([index.vectors, new_vectors], format='csr')
+
+        # Подібність усіх постів до нових: N x m, транспонується лише маленька матриця нових
+        similarities = boost_same_category(
+            (vectors @ new_vectors.T.tocsr()).tocsr(), categories, new_categories, options['CATEGORY_BOOST']
+        )
+
+        neighbours = top_neighbours(
+            similarities.T.tocsr(), options['TOP_K'], options['MIN_SCORE'],
+            exclude=np.arange(old_count, len(ids)),
+        )
+        RelatedPostsService._store(new_ids, [list(zip(ids[columns], scores)) for columns, scores in neighbours])
+        floors = np.concatenate([
+            index.floors,
+            np.asarray([RelatedPostsService._floor(scores) for _, scores in neighbours], dtype=np.float32),
+        ])
+
+        # Старі пости, для яких хоч один новий кращий за найгірший елемент списку
+        candidates = top_neighbours(similarities[:old_count], options['TOP_K'], options['MIN_SCORE'])
+        affected = [
+            row for row, (_, scores) in enumerate(candidates)
+            if len(scores) and scores[0] > index.floors[row]
+        ]
+        if affected:
+            current = {}
+            for post_id, related_id, score in RelatedPost.objects.filter(
+                post_id__in=[int(ids[row]) for row in affected]
+            ).values_list('post_id', 'related_id', 'score'):
+                current.setdefault(post_id, []).append((related_id, score))
+            merged = []
+            for row in affected:
+                columns, scores = candidates[row]
+                items = current.get(int(ids[row]), []) + list(zip(new_ids[columns], scores))
+                items = sorted(items, key=lambda item: item[1], reverse=True)[:options['TOP_K']]
+                merged.append(items)
+                floors[row] = RelatedPostsService._floor([score for _, score in items])
+            RelatedPostsService._store(ids[affected], merged)
+
+        RelatedPostsIndex(ids, categories, vectors, index.idf, floors).save(options['INDEX_PATH'])
+        return {'posts': len(new_ids), 'updated': len(affected)}
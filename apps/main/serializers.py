@@ -1,28 +1,39 @@
 from rest_framework import serializers
+from django.contrib.auth import get_user_model
 from django.utils.text import slugify
-from .models import Category, Post
+from .models import Category, ImportJob, Post
+from apps.core.fieldsets import SparseFieldsetMixin
+from apps.core.loaders import BatchRelationsMixin
+from apps.core.renditions import ImageRenditionService
+from apps.core.serializers import CompiledRepresentationMixin, RenditionImageField
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     posts_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Category
         fields = ('id', 'name', 'slug', 'description','posts_count')
         read_only_fields = ('slug', 'created_at')
+        sparse_field_sources = {'posts_count': ()}
 
     def get_posts_count(self, obj):
+        if hasattr(obj, 'published_posts_count'):
+            return obj.published_posts_count
         return obj.posts.filter(status='published').count()
 
     def create(self, validated_data):
         validated_data['slug'] = slugify(validated_data['name'])
         return super().create(validated_data)
 
-class PostListSerializer(serializers.ModelSerializer):
+class PostListSerializer(SparseFieldsetMixin, BatchRelationsMixin, CompiledRepresentationMixin, serializers.ModelSerializer):
     author = serializers.StringRelatedField()
     category = serializers.StringRelatedField()
-    comments_count = serializers.ReadOnlyField()
-    is_pinned = serializers.ReadOnlyField()
+    # У стрічці — збережений уривок, повний текст не завантажується
+    content = serializers.CharField(source='excerpt', read_only=True)
+    image = RenditionImageField('thumb', required=False)
+    comments_count = serializers.IntegerField(source='comment_count', read_only=True)
+    is_pinned = serializers.BooleanField(read_only=True)
     pinned_info = serializers.SerializerMethodField()
 
 
@@ -32,30 +43,43 @@ class PostListSerializer(serializers.ModelSerializer):
                   'category' ,'author' , 'status', 'created_at',
                   'updated_at', 'views_count','comments_count','is_pinned', 'pinned_info']
         read_only_fields = ('slug', 'author', 'views_count', )
+        # comments_count / is_pinned / pinned_info беруться з анотацій with_feed_info()
+        sparse_field_sources = {
+            'comments_count': (),
+            'is_pinned': (),
+            'pinned_info': (),
+            'image': ('image', 'image_renditions'),
+        }
 
     def get_pinned_info(self, obj):
         return obj.get_pinned_info()
 
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        if len(data['content']) > 200:
-            data['content'] = data['content'][:200] + '...'
-        return data
-
-class PostDetailSerializer(serializers.ModelSerializer):
+class PostDetailSerializer(SparseFieldsetMixin, BatchRelationsMixin, serializers.ModelSerializer):
+    image = RenditionImageField('large', required=False)
+    image_renditions = serializers.SerializerMethodField()
     author_info = serializers.SerializerMethodField()
     category_info = serializers.SerializerMethodField()
-    comments_count = serializers.ReadOnlyField()
-    is_pinned = serializers.ReadOnlyField()
+    comments_count = serializers.IntegerField(source='comment_count', read_only=True)
+    is_pinned = serializers.BooleanField(read_only=True)
     pinned_info = serializers.SerializerMethodField()
     can_pin = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
-        fields = ['id', 'title', 'slug', 'content', 'image',
+        fields = ['id', 'title', 'slug', 'content', 'image', 'image_renditions',
                   'category', 'author', 'status', 'created_at',
                   'updated_at', 'views_count', 'comments_count','author_info', 'category_info', 'is_pinned', 'pinned_info', 'can_pin']
         read_only_fields = ('slug', 'author', 'views_count')
+        sparse_field_sources = {
+            'comments_count': (),
+            'is_pinned': (),
+            'pinned_info': (),
+            'image': ('image', 'image_renditions'),
+            'image_renditions': ('image', 'image_renditions'),
+            'author_info': ('author',),
+            'category_info': ('category',),
+            'can_pin': ('author', 'status'),
+        }
 
     def get_author_info(self, obj):
         author = obj.author
@@ -63,8 +87,12 @@ class PostDetailSerializer(serializers.ModelSerializer):
             'id': author.id,
             'username': author.username,
             'full_name': author.full_name,
-            'avatar' : author.avatar if author.avatar else None
+            'avatar' : ImageRenditionService.url(author.avatar, 'thumb'),
         }
+
+    def get_image_renditions(self, obj):
+        return ImageRenditionService.variants(obj.image)
+
     def get_category_info(self, obj):
         if obj.category:
             return {
@@ -81,6 +109,9 @@ class PostDetailSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
+        if obj.author_id == request.user.pk:
+            # Підписка автора читається раз на запит, хоч би скільки його постів серіалізувалось
+            self.relation_loader.prefetch([request.user], 'subscription')
         return obj.can_be_pinned_by(request.user)
 
 class PostCreateSerializer(serializers.ModelSerializer):
@@ -96,4 +127,31 @@ class PostCreateSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         if 'title' in validated_data:
             validated_data['title'] = slugify(validated_data['title'])
-        return super().update(instance, validated_data)
\ No newline at end of file
+        return super().update(instance, validated_data)
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    file = serializers.FileField(write_only=True)
+    default_author = serializers.SlugRelatedField(
+        slug_field='username', queryset=get_user_model().objects.all(), required=False, allow_null=True,
+        help_text='Автор для записів, чий автор не знайдений серед користувачів',
+    )
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'file', 'source', 'format', 'status', 'default_author',
+            'processed_records', 'posts_created', 'comments_created', 'skipped', 'errors',
+            'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = [
+            'source', 'status', 'processed_records', 'posts_created', 'comments_created',
+            'skipped', 'errors', 'created_at', 'started_at', 'finished_at',
+        ]
+        extra_kwargs = {'format': {'required': False}}
+
+    def validate(self, attrs):
+        attrs['source'] = attrs['file'].name
+        attrs['format'] = attrs.get('format') or ImportJob.detect_format(attrs['file'].name)
+        if not attrs['format']:
+            raise serializers.ValidationError({'format': 'Cannot detect file format, pass it explicitly'})
+        return attrs
@@ -0,0 +1,855 @@
+import threading
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.accounts.models import Follow, User
+from apps.subscribe.models import PinnedPost
+from .models import Post, PostDailyViews, PostViewEvent, RollupCheckpoint
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class BaseViewBuffer:
+    '''Буфер переглядів: збирає дельти post_id -> кількість між скиданнями в БД'''
+
+    def record(self, post_id: int, count: int = 1) -> None:
+        raise NotImplementedError
+
+    def record_many(self, deltas: Dict[int, int]) -> None:
+        for post_id, count in deltas.items():
+            self.record(post_id, count)
+
+    def drain(self) -> Dict[int, int]:
+        '''Атомарно забирає всі накопичені дельти і очищає буфер'''
+        raise NotImplementedError
+
+    def pending(self, post_id: int) -> int:
+        raise NotImplementedError
+
+
+class InMemoryViewBuffer(BaseViewBuffer):
+    '''Буфер у пам'яті процесу (для тестів та локальної розробки)'''
+
+    def __init__(self, **options):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def record(self, post_id: int, count: int = 1) -> None:
+        with self._lock:
+            self._counts[int(post_id)] += count
+
+    def drain(self) -> Dict[int, int]:
+        with self._lock:
+            deltas, self._counts = dict(self._counts), Counter()
+        return deltas
+
+    def pending(self, post_id: int) -> int:
+        with self._lock:
+            return self._counts.get(int(post_id), 0)
+
+
+class RedisViewBuffer(BaseViewBuffer):
+    '''Буфер у Redis hash: HINCRBY на перегляд, HGETALL + DEL в одній транзакції на скидання'''
+
+    def __init__(self, location: Optional[str] = None, key: str = 'posts:views:pending', **options):
+        import redis
+
+        self.key = key
+        self.location = location or settings.REDIS_URL
+        self.client = redis.Redis.from_url(self.location)
+
+    def record(self, post_id: int, count: int = 1, client=None) -> None:
+        # client — pipeline, якщо запис іде разом з іншими командами
+        (client or self.client).hincrby(self.key, int(post_id), count)
+
+    def record_many(self, deltas: Dict[int, int]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for post_id, count in deltas.items():
+            pipe.hincrby(self.key, int(post_id), count)
+        pipe.execute()
+
+    def drain(self) -> Dict[int, int]:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hgetall(self.key)
+        pipe.delete(self.key)
+        raw, _ = pipe.execute()
+        return {int(post_id): int(count) for post_id, count in raw.items()}
+
+    def pending(self, post_id: int) -> int:
+        return int(self.client.hget(self.key, int(post_id)) or 0)
+
+
+_view_buffer = None
+
+
+def get_view_buffer() -> BaseViewBuffer:
+    '''Повертає буфер переглядів, налаштований у settings.VIEW_COUNTER'''
+    global _view_buffer
+    if _view_buffer is None:
+        backend = settings.VIEW_COUNTER.get('BACKEND', 'apps.main.services.RedisViewBuffer')
+        _view_buffer = import_string(backend)(**settings.VIEW_COUNTER.get('OPTIONS', {}))
+    return _view_buffer
+
+
+class ViewCounterService:
+    '''Лічильник переглядів постів без запису в БД на кожен GET'''
+
+    @staticmethod
+    def record_view(post_id: int) -> None:
+        buffer, events = get_view_buffer(), get_view_event_log()
+        timestamp = int(timezone.now().timestamp())
+        if (isinstance(buffer, RedisViewBuffer) and isinstance(events, RedisViewEventLog)
+                and buffer.location == events.location):
+            # Дельта і подія — одним походом у Redis
+            pipe = buffer.client.pipeline(transaction=False)
+            buffer.record(post_id, client=pipe)
+            events.append(post_id, timestamp, client=pipe)
+            pipe.execute()
+            return
+        buffer.record(post_id)
+        events.append(post_id, timestamp)
+
+    @staticmethod
+    async def arecord_view(post_id: int) -> None:
+        '''record_view для async-в'юшок: мережевий виклик Redis — у потоці, не в event loop'''
+        await sync_to_async(ViewCounterService.record_view, thread_sensitive=False)(post_id)
+
+    @staticmethod
+    def flush(batch_size: Optional[int] = None) -> Dict[str, int]:
+        '''Скидає накопичені дельти в posts.views_count set-based UPDATE-ами'''
+        buffer = get_view_buffer()
+        deltas = buffer.drain()
+        if not deltas:
+            return {'flushed_posts': 0, 'flushed_views': 0}
+
+        batch_size = batch_size or settings.VIEW_COUNTER.get('BATCH_SIZE', 1000)
+
+        # Групуєм пости з однаковою дельтою — один UPDATE на групу замість одного на пост
+        by_delta = defaultdict(list)
+        for post_id, delta in deltas.items():
+            by_delta[delta].append(post_id)
+
+        try:
+            with transaction.atomic():
+                for delta, post_ids in by_delta.items():
+                    for start in range(0, len(post_ids), batch_size):
+                        Post.objects.filter(id__in=post_ids[start:start + batch_size]).update(
+                            views_count=F('views_count') + delta
+                        )
+        except Exception:
+            # Повертаєм дельти в буфер, щоб не втратити перегляди
+            buffer.record_many(deltas)
+            logger.exception('Error flushing post views, deltas restored')
+            raise
+
+        return {'flushed_posts': len(deltas), 'flushed_views': sum(deltas.values())}
+
+
+class BaseViewEventLog:
+    '''Черга подій переглядів (post_id, unix-час) між записами в журнал post_view_events'''
+
+    def append(self, post_id: int, timestamp: int) -> None:
+        raise NotImplementedError
+
+    def drain(self, limit: int) -> List[Tuple[int, int]]:
+        '''Атомарно забирає до limit найстаріших подій'''
+        raise NotImplementedError
+
+    def restore(self, events: List[Tuple[int, int]]) -> None:
+        '''Повертає забрані події на початок черги (запис у БД не вдався)'''
+        raise NotImplementedError
+
+
+class InMemoryViewEventLog(BaseViewEventLog):
+    '''Черга у пам'яті процесу (для тестів та локальної розробки)'''
+
+    def __init__(self, **options):
+        self._lock = threading.Lock()
+        self._events = []
+
+    def append(self, post_id: int, timestamp: int) -> None:
+        with self._lock:
+            self._events.append((int(post_id), int(timestamp)))
+
+    def drain(self, limit: int) -> List[Tuple[int, int]]:
+        with self._lock:
+            events, self._events = self._events[:limit], self._events[limit:]
+        return events
+
+    def restore(self, events: List[Tuple[int, int]]) -> None:
+        with self._lock:
+            self._events[:0] = events
+
+
+class RedisViewEventLog(BaseViewEventLog):
+    '''Черга у Redis list: RPUSH на перегляд, LRANGE + LTRIM в одній транзакції на скидання'''
+
+    def __init__(self, location: Optional[str] = None, key: str = 'posts:views:events', **options):
+        import redis
+
+        self.key = key
+        self.location = location or settings.REDIS_URL
+        self.client = redis.Redis.from_url(self.location)
+
+    def append(self, post_id: int, timestamp: int, client=None) -> None:
+        (client or self.client).rpush(self.key, f'{int(post_id)}:{int(timestamp)}')
+
+    def drain(self, limit: int) -> List[Tuple[int, int]]:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.lrange(self.key, 0, limit - 1)
+        pipe.ltrim(self.key, limit, -1)
+        raw, _ = pipe.execute()
+        return [tuple(int(part) for part in item.split(b':')) for item in raw]
+
+    def restore(self, events: List[Tuple[int, int]]) -> None:
+        if events:
+            # LPUSH додає по одному на початок — у зворотному порядку, щоб зберегти черговість
+            self.client.lpush(self.key, *(f'{post_id}:{timestamp}' for post_id, timestamp in reversed(events)))
+
+
+_view_event_log = None
+
+
+def get_view_event_log() -> BaseViewEventLog:
+    '''Повертає чергу подій переглядів, налаштовану у settings.VIEW_EVENTS'''
+    global _view_event_log
+    if _view_event_log is None:
+        backend = settings.VIEW_EVENTS.get('BACKEND', 'apps.main.services.RedisViewEventLog')
+        _view_event_log = import_string(backend)(**settings.VIEW_EVENTS.get('OPTIONS', {}))
+    return _view_event_log
+
+
+class ViewStatsService:
+    '''
+    Перегляди в часі: події з черги пишуться пачками в журнал post_view_events (flush_events),
+    а щогодини журнал згортається в денні лічильники post_daily_views (rollup).
+    Статистика і тижневі вибірки читають лише post_daily_views.
+    '''
+    CHECKPOINT = 'post_daily_views'
+
+    @staticmethod
+    def _lock_checkpoint() -> RollupCheckpoint:
+        '''
+        Рядок контрольної точки блокується і записом пачки подій, і згортанням: id журналу
+        стають видимими строго по зростанню, тож згортання по id > last_id нічого не пропускає.
+        '''
+        checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(name=ViewStatsService.CHECKPOINT)
+        return checkpoint
+
+    @staticmethod
+    def flush_events(batch_size: Optional[int] = None) -> Dict[str, int]:
+        '''Переносить події з черги в журнал bulk INSERT-ами по batch_size'''
+        batch_size = batch_size or settings.VIEW_EVENTS.get('BATCH_SIZE', 5000)
+        log = get_view_event_log()
+        flushed = 0
+        while True:
+            events = log.drain(batch_size)
+            if not events:
+                break
+            try:
+                with transaction.atomic():
+                    ViewStatsService._lock_checkpoint()
+                    PostViewEvent.objects.bulk_create([
+                        PostViewEvent(post_id=post_id, viewed_at=EPOCH + timedelta(seconds=timestamp))
+                        for post_id, timestamp in events
+                    ])
+            except Exception:
+                log.restore(events)
+                logger.exception('Error writing post view events, events restored')
+                raise
+            flushed += len(events)
+            if len(events) < batch_size:
+                break
+        return {'flushed_events': flushed}
+
+    @staticmethod
+    def aggregate(post_ids, timestamps) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''Кількість подій на (пост, день UTC): масиви post_id, номер дня від EPOCH, перегляди'''
+        post_ids = np.asarray(post_ids, dtype=np.int64)
+        days = np.asarray(timestamps, dtype=np.int64) // 86400
+        # День вміщається в 20 біт (до 4840 року), id поста — у решту 43
+        keys, counts = np.unique((post_ids << 20) | days, return_counts=True)
+        return keys >> 20, keys & ((1 << 20) - 1), counts
+
+    @staticmethod
+    def _upsert(post_ids, days, counts) -> None:
+        '''Додає перегляди до денних лічильників одним INSERT ... ON CONFLICT'''
+        epoch_day = EPOCH.date()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'''
+                INSERT INTO {PostDailyViews._meta.db_table} (post_id, day, views)
+                SELECT * FROM unnest(%s::bigint[], %s::date[], %s::integer[])
+                ON CONFLICT (post_id, day) DO UPDATE
+                SET views = {PostDailyViews._meta.db_table}.views + EXCLUDED.views
+                ''',
+                [
+                    post_ids.tolist(),
+                    [epoch_day + timedelta(days=int(day)) for day in days],
+                    counts.tolist(),
+                ],
+            )
+
+    @staticmethod
+    def rollup(batch_size: Optional[int] = None) -> Dict[str, int]:
+        '''Згортає нові події журналу в post_daily_views; кожна пачка — окрема транзакція'''
+        options = settings.VIEW_EVENTS
+        batch_size = batch_size or options.get('ROLLUP_BATCH_SIZE', 50000)
+        events = buckets = 0
+        while True:
+            with transaction.atomic():
+                checkpoint = ViewStatsService._lock_checkpoint()
+                rows = list(
+                    PostViewEvent.objects.filter(id__gt=checkpoint.last_id).order_by('id')
+                    .values_list('id', 'post_id', 'viewed_at')[:batch_size]
+                )
+                if not rows:
+                    break
+
+                ids, post_ids, viewed = zip(*rows)
+                timestamps = np.fromiter(
+                    (int(viewed_at.timestamp()) for viewed_at in viewed), dtype=np.int64, count=len(rows)
+                )
+                post_ids, days, counts = ViewStatsService.aggregate(post_ids, timestamps)
+
+                # Журнал без зовнішнього ключа: перегляди видалених постів відкидаються
+                unique_posts = np.unique(post_ids)
+                existing = np.fromiter(
+                    Post.objects.filter(id__in=unique_posts.tolist()).values_list('id', flat=True), dtype=np.int64
+                )
+                keep = np.isin(post_ids, existing)
+                if keep.any():
+                    ViewStatsService._upsert(post_ids[keep], days[keep], counts[keep])
+
+                checkpoint.last_id = ids[-1]
+                checkpoint.save(update_fields=['last_id', 'updated_at'])
+
+            events += len(rows)
+            buckets += int(keep.sum())
+            if len(rows) < batch_size:
+                break
+
+        return {'rolled_up_events': events, 'updated_buckets': buckets, 'purged_events': ViewStatsService.purge()}
+
+    @staticmethod
+    def purge() -> int:
+        '''Видаляє вже згорнуті події, старші за RETENTION_DAYS'''
+        retention_days = settings.VIEW_EVENTS.get('RETENTION_DAYS')
+        if not retention_days:
+            return 0
+        checkpoint = RollupCheckpoint.objects.filter(name=ViewStatsService.CHECKPOINT).first()
+        if checkpoint is None:
+            return 0
+        deleted, _ = PostViewEvent.objects.filter(
+            id__lte=checkpoint.last_id, viewed_at__lt=timezone.now() - timedelta(days=retention_days)
+        ).delete()
+        return deleted
+
+    @staticmethod
+    def daily_series(post, days: int) -> List[Dict]:
+        '''Перегляди поста за останні days днів (UTC), включно з сьогоднішнім; дні без переглядів — нулі'''
+        today = timezone.now().date()
+        start = today - timedelta(days=days - 1)
+        views = dict(post.daily_views.filter(day__gte=start).values_list('day', 'views'))
+        return [
+            {'day': day, 'views': views.get(day, 0)}
+            for day in (start + timedelta(days=offset) for offset in range(days))
+        ]
+
+    @staticmethod
+    def top_post_ids(days: int = 7, limit: int = 10, exclude_ids=()) -> List[int]:
+        '''Опубліковані пости з найбільшою кількістю переглядів за останні days днів'''
+        start = timezone.now().date() - timedelta(days=days - 1)
+        return list(
+            PostDailyViews.objects.filter(day__gte=start, post__status='published')
+            .exclude(post_id__in=exclude_ids)
+            .values('post_id').annotate(total=Sum('views'))
+            .order_by('-total', '-post_id')
+            .values_list('post_id', flat=True)[:limit]
+        )
+
+
+class BaseTrendingStore:
+    '''Сховище топів трендових постів: scope ('global' або 'category:<id>') -> [(post_id, score)]'''
+
+    def replace(self, scopes: Dict[str, Dict[int, float]]) -> None:
+        '''Атомарно підміняє всі топи новим розрахунком'''
+        raise NotImplementedError
+
+    def top(self, scope: str, limit: int) -> List[int]:
+        raise NotImplementedError
+
+
+class InMemoryTrendingStore(BaseTrendingStore):
+    '''Топи у пам'яті процесу (для тестів та локальної розробки)'''
+
+    def __init__(self, **options):
+        self._lock = threading.Lock()
+        self._scopes = {}
+
+    def replace(self, scopes: Dict[str, Dict[int, float]]) -> None:
+        ranked = {
+            scope: [post_id for post_id, _ in sorted(scores.items(), key=lambda item: (-item[1], -item[0]))]
+            for scope, scores in scopes.items()
+        }
+        with self._lock:
+            self._scopes = ranked
+
+    def top(self, scope: str, limit: int) -> List[int]:
+        with self._lock:
+            return list(self._scopes.get(scope, [])[:limit])
+
+
+class RedisTrendingStore(BaseTrendingStore):
+    '''Топи у Redis sorted sets: ZREVRANGE на читання, DEL + ZADD в одній транзакції на перерахунок'''
+
+    def __init__(self, location: Optional[str] = None, prefix: str = 'posts:trending', **options):
+        import redis
+
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(location or settings.REDIS_URL)
+
+    def _key(self, scope: str) -> str:
+        return f'{self.prefix}:{scope}'
+
+    def replace(self, scopes: Dict[str, Dict[int, float]]) -> None:
+        index_key = self._key('scopes')
+        stale = {scope.decode() for scope in self.client.smembers(index_key)} - set(scopes)
+
+        pipe = self.client.pipeline(transaction=True)
+        for scope in stale:
+            pipe.delete(self._key(scope))
+        pipe.delete(index_key)
+        for scope, scores in scopes.items():
+            key = self._key(scope)
+            pipe.delete(key)
+            if scores:
+                pipe.zadd(key, {int(post_id): float(score) for post_id, score in scores.items()})
+                pipe.sadd(index_key, scope)
+        pipe.execute()
+
+    def top(self, scope: str, limit: int) -> List[int]:
+        return [int(post_id) for post_id in self.client.zrevrange(self._key(scope), 0, limit - 1)]
+
+
+_trending_store = None
+
+
+def get_trending_store() -> BaseTrendingStore:
+    '''Повертає сховище трендів, налаштоване у settings.TRENDING'''
+    global _trending_store
+    if _trending_store is None:
+        backend = settings.TRENDING.get('BACKEND', 'apps.main.services.RedisTrendingStore')
+        _trending_store = import_string(backend)(**settings.TRENDING.get('OPTIONS', {}))
+    return _trending_store
+
+
+class TrendingService:
+    '''
+    Трендові пости: score = (views * VIEW_WEIGHT + comments * COMMENT_WEIGHT + 1) / (age_hours + 2) ** GRAVITY.
+    Рахується періодично по постах за WINDOW_DAYS і зберігається топ-N глобально та по категоріях.
+    '''
+    GLOBAL_SCOPE = 'global'
+
+    @staticmethod
+    def category_scope(category_id: int) -> str:
+        return f'category:{category_id}'
+
+    @staticmethod
+    def compute_scores(views, comments, age_hours) -> np.ndarray:
+        '''Векторизований розрахунок score для масивів однакової довжини'''
+        options = settings.TRENDING
+        activity = (
+            np.asarray(views, dtype=np.float64) * options['VIEW_WEIGHT']
+            + np.asarray(comments, dtype=np.float64) * options['COMMENT_WEIGHT']
+            + 1.0
+        )
+        age = np.maximum(np.asarray(age_hours, dtype=np.float64), 0.0)
+        return activity / np.power(age + 2.0, options['GRAVITY'])
+
+    @staticmethod
+    def rebuild() -> Dict[str, int]:
+        '''Перераховує score і підміняє топи у сховищі'''
+        options = settings.TRENDING
+        now = timezone.now()
+        window_start = now - timedelta(days=options['WINDOW_DAYS'])
+
+        rows = list(
+            Post.objects.filter(status='published', created_at__gte=window_start)
+            .annotate(active_comments=Count('comments', filter=Q(comments__is_active=True)))
+            .values_list('id', 'category_id', 'views_count', 'active_comments', 'created_at')
+        )
+
+        scopes = {TrendingService.GLOBAL_SCOPE: {}}
+        if rows:
+            ids, category_ids, views, comments, created = zip(*rows)
+            ids = np.fromiter(ids, dtype=np.int64, count=len(rows))
+            age_hours = [(now - created_at).total_seconds() / 3600 for created_at in created]
+            scores = TrendingService.compute_scores(views, comments, age_hours)
+            category_ids = np.array([category_id or 0 for category_id in category_ids], dtype=np.int64)
+
+            top_n = options['TOP_N']
+            order = np.argsort(-scores, kind='stable')
+            scopes[TrendingService.GLOBAL_SCOPE] = {
+                int(ids[i]): float(scores[i]) for i in order[:top_n]
+            }
+            for category_id in np.unique(category_ids[category_ids > 0]):
+                members = order[category_ids[order] == category_id][:top_n]
+                scopes[TrendingService.category_scope(int(category_id))] = {
+                    int(ids[i]): float(scores[i]) for i in members
+                }
+
+        get_trending_store().replace(scopes)
+        return {'scored_posts': len(rows), 'scopes': len(scopes)}
+
+    @staticmethod
+    def top_posts(queryset, category_id: Optional[int] = None, limit: int = 10,
+                  exclude_ids=()) -> Optional[list]:
+        '''
+        Пости з топу у порядку score (лише ті, що є в queryset).
+        None — якщо топ ще не пораховано, і в'юшка має перейти на запасний запит.
+        '''
+        scope = TrendingService.category_scope(category_id) if category_id else TrendingService.GLOBAL_SCOPE
+        ids = [post_id for post_id in get_trending_store().top(scope, settings.TRENDING['TOP_N'])
+               if post_id not in exclude_ids]
+        if not ids:
+            return None
+
+        posts = queryset.in_bulk(ids)
+        return [posts[post_id] for post_id in ids if post_id in posts][:limit]
+
+
+class BaseTimelineStore:
+    '''
+    Домашні стрічки: для кожного користувача до MAX_LENGTH пар post_id -> score,
+    де score — created_at поста в мікросекундах (стрічка впорядкована як основна: новіші першими).
+    Стрічка, якої немає (новий користувач, вивітрилась за TTL), вважається непобудованою.
+    '''
+
+    def add(self, user_ids: List[int], entries: Dict[int, int]) -> None:
+        raise NotImplementedError
+
+    def remove(self, user_ids: List[int], post_ids: List[int]) -> None:
+        raise NotImplementedError
+
+    def replace(self, user_id: int, entries: Dict[int, int]) -> None:
+        '''Будує стрічку заново'''
+        raise NotImplementedError
+
+    def is_built(self, user_id: int) -> bool:
+        raise NotImplementedError
+
+    def read(self, user_id: int, before: Optional[int], limit: int) -> Optional[List[Tuple[int, int]]]:
+        '''До limit пар (post_id, score) зі score < before, новіші першими; None — стрічка не побудована'''
+        raise NotImplementedError
+
+
+class InMemoryTimelineStore(BaseTimelineStore):
+    '''Стрічки у пам'яті процесу (для тестів та локальної розробки)'''
+
+    def __init__(self, max_length: Optional[int] = None, **options):
+        self.max_length = max_length or settings.TIMELINES['MAX_LENGTH']
+        self._lock = threading.Lock()
+        self._timelines = {}
+        self._built = set()
+
+    def _trim(self, timeline):
+        for post_id, _ in sorted(timeline.items(), key=lambda item: item[1], reverse=True)[self.max_length:]:
+            del timeline[post_id]
+
+    def add(self, user_ids: List[int], entries: Dict[int, int]) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                timeline = self._timelines.setdefault(int(user_id), {})
+                timeline.update(entries)
+                self._trim(timeline)
+
+    def remove(self, user_ids: List[int], post_ids: List[int]) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                timeline = self._timelines.get(int(user_id), {})
+                for post_id in post_ids:
+                    timeline.pop(int(post_id), None)
+
+    def replace(self, user_id: int, entries: Dict[int, int]) -> None:
+        timeline = dict(entries)
+        self._trim(timeline)
+        with self._lock:
+            self._timelines[int(user_id)] = timeline
+            self._built.add(int(user_id))
+
+    def is_built(self, user_id: int) -> bool:
+        with self._lock:
+            return int(user_id) in self._built
+
+    def read(self, user_id: int, before: Optional[int], limit: int) -> Optional[List[Tuple[int, int]]]:
+        with self._lock:
+            if int(user_id) not in self._built:
+                return None
+            entries = self._timelines.get(int(user_id), {}).items()
+            if before is not None:
+                entries = [(post_id, score) for post_id, score in entries if score < before]
+            return sorted(entries, key=lambda item: item[1], reverse=True)[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._timelines.clear()
+            self._built.clear()
+
+
+class RedisTimelineStore(BaseTimelineStore):
+    '''
+    Стрічки у Redis sorted sets, обрізаних до MAX_LENGTH: ZADD + ZREMRANGEBYRANK на розсилку,
+    ZREVRANGEBYSCORE ... LIMIT на читання (O(log n + розмір сторінки)). Побудована стрічка
+    має службовий елемент 0 зі score 0 — так порожня стрічка відрізняється від відсутньої.
+    Кожен запис продовжує TTL, тож стрічки неактивних користувачів зникають і будуються заново при читанні.
+    '''
+    SENTINEL = 0
+
+    def __init__(self, location: Optional[str] = None, prefix: str = 'timeline', max_length: Optional[int] = None,
+                 ttl: Optional[int] = None, **options):
+        import redis
+
+        self.prefix = prefix
+        self.max_length = max_length or settings.TIMELINES['MAX_LENGTH']
+        self.ttl = ttl or settings.TIMELINES['TTL']
+        self.client = redis.Redis.from_url(location or settings.REDIS_URL)
+
+    def _key(self, user_id: int) -> str:
+        return f'{self.prefix}:{int(user_id)}'
+
+    def _trim(self, pipe, key):
+        # Ранг 0 — службовий елемент, решта понад max_length найновіших відкидається
+        pipe.zremrangebyrank(key, 1, -(self.max_length + 1))
+        pipe.expire(key, self.ttl)
+
+    def add(self, user_ids: List[int], entries: Dict[int, int]) -> None:
+        if not entries:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for user_id in user_ids:
+            key = self._key(user_id)
+            pipe.zadd(key, entries)
+            self._trim(pipe, key)
+        pipe.execute()
+
+    def remove(self, user_ids: List[int], post_ids: List[int]) -> None:
+        if not post_ids:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.zrem(self._key(user_id), *post_ids)
+        pipe.execute()
+
+    def replace(self, user_id: int, entries: Dict[int, int]) -> None:
+        key = self._key(user_id)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.zadd(key, {self.SENTINEL: 0, **entries})
+        self._trim(pipe, key)
+        pipe.execute()
+
+    def is_built(self, user_id: int) -> bool:
+        return self.client.zscore(self._key(user_id), self.SENTINEL) is not None
+
+    def read(self, user_id: int, before: Optional[int], limit: int) -> Optional[List[Tuple[int, int]]]:
+        key = self._key(user_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zscore(key, self.SENTINEL)
+        pipe.zrevrangebyscore(key, '+inf' if before is None else f'({before}', '(0',
+                              start=0, num=limit, withscores=True)
+        pipe.expire(key, self.ttl)
+        sentinel, entries, _ = pipe.execute()
+        if sentinel is None:
+            return None
+        return [(int(post_id), int(score)) for post_id, score in entries]
+
+
+_timeline_store = None
+
+
+def get_timeline_store() -> BaseTimelineStore:
+    '''Повертає сховище домашніх стрічок, налаштоване у settings.TIMELINES'''
+    global _timeline_store
+    if _timeline_store is None:
+        backend = settings.TIMELINES.get('BACKEND', 'apps.main.services.RedisTimelineStore')
+        _timeline_store = import_string(backend)(**settings.TIMELINES.get('OPTIONS', {}))
+    return _timeline_store
+
+
+class TimelineService:
+    '''
+    Домашня стрічка: пости авторів, на яких підписаний користувач.
+    Fan-out on write: опублікований пост задачею Celery додається у стрічки всіх підписників автора.
+    Автори, у яких підписників не менше FANOUT_LIMIT, не розсилаються — їх пости
+    підмішуються при читанні (fan-out on read) запитом по індексу (author, -created_at).
+    '''
+
+    @staticmethod
+    def to_score(created_at) -> int:
+        return (created_at - EPOCH) // timedelta(microseconds=1)
+
+    @staticmethod
+    def from_score(score: int):
+        return EPOCH + timedelta(microseconds=score)
+
+    @staticmethod
+    def fanout_authors():
+        '''Автори, чиї пости розсилаються (менше FANOUT_LIMIT підписників)'''
+        return User.objects.filter(followers_count__lt=settings.TIMELINES['FANOUT_LIMIT'])
+
+    @staticmethod
+    def _follower_batches(author_id: int):
+        batch_size = settings.TIMELINES['BATCH_SIZE']
+        follower_ids = Follow.objects.filter(author_id=author_id).values_list('follower_id', flat=True)
+        batch = []
+        for follower_id in follower_ids.iterator(chunk_size=batch_size):
+            batch.append(follower_id)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def fan_out(post_id: int) -> Dict[str, int]:
+        '''Додає опублікований пост у стрічки підписників автора'''
+        post = Post.objects.filter(
+            pk=post_id, status='published', author__in=TimelineService.fanout_authors()
+        ).values('author_id', 'created_at').first()
+        if post is None:
+            return {'followers': 0}
+
+        entries = {post_id: TimelineService.to_score(post['created_at'])}
+        store = get_timeline_store()
+        followers = 0
+        for batch in TimelineService._follower_batches(post['author_id']):
+            store.add(batch, entries)
+            followers += len(batch)
+        return {'followers': followers}
+
+    @staticmethod
+    def retract(post_id: int, author_id: int) -> Dict[str, int]:
+        '''Прибирає пост (знятий з публікації або видалений) зі стрічок підписників'''
+        store = get_timeline_store()
+        followers = 0
+        for batch in TimelineService._follower_batches(author_id):
+            store.remove(batch, [post_id])
+            followers += len(batch)
+        return {'followers': followers}
+
+    @staticmethod
+    def backfill(follower_id: int, author_id: int) -> int:
+        '''Нова підписка: останні пости автора потрапляють у вже побудовану стрічку'''
+        store = get_timeline_store()
+        if not store.is_built(follower_id) or not TimelineService.fanout_authors().filter(pk=author_id).exists():
+            return 0
+        rows = Post.objects.filter(author_id=author_id, status='published').order_by('-created_at').values_list(
+            'id', 'created_at'
+        )[:settings.TIMELINES['MAX_LENGTH']]
+        entries = {post_id: TimelineService.to_score(created_at) for post_id, created_at in rows}
+        store.add([follower_id], entries)
+        return len(entries)
+
+    @staticmethod
+    def prune(follower_id: int, author_id: int) -> int:
+        '''Відписка: пости автора зникають зі стрічки (у ній лише MAX_LENGTH найновіших)'''
+        post_ids = list(
+            Post.objects.filter(author_id=author_id).order_by('-created_at').values_list(
+                'id', flat=True
+            )[:settings.TIMELINES['MAX_LENGTH']]
+        )
+        get_timeline_store().remove([follower_id], post_ids)
+        return len(post_ids)
+
+    @staticmethod
+    def rebuild(user_id: int) -> int:
+        '''
+        Будує стрічку з БД (перше читання або після TTL). Це єдине місце з вибіркою
+        по всьому списку підписок, і воно обмежене MAX_LENGTH рядками.
+        '''
+        authors = Follow.objects.filter(
+            follower_id=user_id, author__in=TimelineService.fanout_authors()
+        ).values('author_id')
+        rows = Post.objects.filter(author_id__in=authors, status='published').order_by('-created_at').values_list(
+            'id', 'created_at'
+        )[:settings.TIMELINES['MAX_LENGTH']]
+        entries = {post_id: TimelineService.to_score(created_at) for post_id, created_at in rows}
+        get_timeline_store().replace(user_id, entries)
+        return len(entries)
+
+    @staticmethod
+    def read(user, before: Optional[int] = None, limit: int = 20) -> Tuple[List[Tuple[int, int]], bool]:
+        '''
+        Сторінка стрічки: (пари (post_id, score) новіші першими, чи є ще).
+        Читає limit + 1 елементів зі сховища і стільки ж постів кожного "великого" автора, на якого
+        підписаний користувач, тож вартість залежить від розміру сторінки, а не від кількості підписок.
+        '''
+        store = get_timeline_store()
+        entries = store.read(user.pk, before, limit + 1)
+        if entries is None:
+            TimelineService.rebuild(user.pk)
+            entries = store.read(user.pk, before, limit + 1) or []
+
+        # Великих авторів мало: індекс по followers_count і точкові перевірки підписки
+        big_authors = Follow.objects.filter(
+            follower_id=user.pk,
+            author_id__in=User.objects.filter(followers_count__gte=settings.TIMELINES['FANOUT_LIMIT']).values('pk'),
+        ).values('author_id')
+        pulled = Post.objects.filter(author_id__in=big_authors, status='published')
+        if before is not None:
+            pulled = pulled.filter(created_at__lt=TimelineService.from_score(before))
+        pulled = pulled.order_by('-created_at').values_list('id', 'created_at')[:limit + 1]
+
+        merged = dict(entries)
+        merged.update((post_id, TimelineService.to_score(created_at)) for post_id, created_at in pulled)
+        ranked = sorted(merged.items(), key=lambda item: (item[1], item[0]), reverse=True)
+        return ranked[:limit], len(ranked) > limit
+
+
+class PinnedFeedService:
+    '''
+    Стрічка "спершу закріплені" без CASE на кожен рядок: чинних закріплень мало, вони вибираються
+    з відфільтрованої стрічки через індекс (active_until, pinned_at), а основний потік — той самий queryset
+    без цих id, що пагінується звичайною keyset- чи сторінковою пагінацією по частковому індексу.
+    Закріплені пости ставляться на початок першої сторінки (apps.main.pagination.PinnedFirstPagination).
+    '''
+
+    @staticmethod
+    def newest_pins(queryset):
+        '''
+        PINNED_FEED['MAX_PINNED'] найновіших чинних закріплень серед постів queryset, від нових до старих.
+        Ліміт береться вже після фільтрів стрічки (категорія, автор), тож закріплення з інших
+        категорій не витісняють закріплених постів цієї.
+        '''
+        return queryset.filter(
+            pk__in=PinnedPost.objects.effective().values('post_id')
+        ).order_by('-pin_info__pinned_at')[:settings.PINNED_FEED['MAX_PINNED']]
+
+    @staticmethod
+    def pinned(queryset) -> List[Post]:
+        '''Закріплені пости queryset у порядку закріплення (не більше MAX_PINNED)'''
+        return list(reversed(PinnedFeedService.newest_pins(queryset)))
+
+    @staticmethod
+    async def apinned(queryset) -> List[Post]:
+        return list(reversed([post async for post in PinnedFeedService.newest_pins(queryset)]))
+
+    @staticmethod
+    def regular(queryset, pinned: List[Post]):
+        '''Основний потік: queryset без закріплених, що стоять на першій сторінці'''
+        if not pinned:
+            return queryset
+        return queryset.exclude(pk__in=[post.pk for post in pinned])
@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.accounts.models import Follow
+from apps.comments.models import Comment
+from apps.core.cache import ResponseCache
+from apps.core.filters import FullTextSearchFilter
+from apps.subscribe.models import PinnedPost, Subscription
+from .models import Post
+
+# Групи кешу відповідей (див. @cache_response у views.py)
+FEED_CACHE_GROUPS = ('posts:popular', 'posts:recent', 'posts:featured')
+PINNED_CACHE_GROUPS = ('posts:pinned',)
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    '''Зміна поста інвалідує стрічки, в які він може потрапити'''
+    groups = FEED_CACHE_GROUPS
+    if PinnedPost.objects.filter(post_id=instance.pk).exists():
+        groups += PINNED_CACHE_GROUPS
+    ResponseCache.invalidate(*groups)
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_search_results(sender, **kwargs):
+    '''Кешовані ранжовані списки пошуку (FullTextSearchFilter) мають бачити нові й змінені рядки'''
+    ResponseCache.invalidate(FullTextSearchFilter.cache_group(sender))
+
+
+@receiver([post_save, post_delete], sender=PinnedPost)
+def invalidate_pinned_feeds(sender, instance, **kwargs):
+    '''is_pinned/pinned_info є в усіх кешованих стрічках'''
+    ResponseCache.invalidate(*FEED_CACHE_GROUPS, *PINNED_CACHE_GROUPS)
+
+
+@receiver([post_save, post_delete], sender=Subscription)
+def invalidate_subscription_pins(sender, instance, **kwargs):
+    '''Статус підписки визначає, чи діє закріплення її власника'''
+    if PinnedPost.objects.filter(user_id=instance.user_id).exists():
+        ResponseCache.invalidate(*FEED_CACHE_GROUPS, *PINNED_CACHE_GROUPS)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_published_post(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    '''Публікація розсилає пост у стрічки підписників, зняття з публікації — прибирає'''
+    from .tasks import fan_out_post, retract_post
+
+    if raw:
+        return
+    # Збереження без статусу (.only()/.defer(), update_fields) публікацією не є
+    if not created and ('status' in instance.get_deferred_fields()
+                        or (update_fields is not None and 'status' not in update_fields)):
+        return
+    was_published = getattr(instance, 'loaded_status', None) == 'published'
+    is_published = instance.status == 'published'
+    instance.loaded_status = instance.status
+    post_id, author_id = instance.pk, instance.author_id
+    if is_published and not was_published:
+        transaction.on_commit(lambda: fan_out_post.delay(post_id))
+    elif was_published and not is_published:
+        transaction.on_commit(lambda: retract_post.delay(post_id, author_id))
+
+
+@receiver(post_delete, sender=Post)
+def retract_deleted_post(sender, instance, **kwargs):
+    '''Видалений опублікований пост зникає зі стрічок'''
+    from .tasks import retract_post
+
+    if instance.status == 'published':
+        post_id, author_id = instance.pk, instance.author_id
+        transaction.on_commit(lambda: retract_post.delay(post_id, author_id))
+
+
+@receiver(post_save, sender=Follow)
+def backfill_on_follow(sender, instance, created, raw=False, **kwargs):
+    '''Нова підписка доповнює вже побудовану стрічку постами автора'''
+    from .tasks import backfill_home_timeline
+
+    if created and not raw:
+        follower_id, author_id = instance.follower_id, instance.author_id
+        transaction.on_commit(lambda: backfill_home_timeline.delay(follower_id, author_id))
+
+
+@receiver(post_delete, sender=Follow)
+def prune_on_unfollow(sender, instance, **kwargs):
+    '''Відписка прибирає пости автора зі стрічки'''
+    from .tasks import prune_home_timeline
+
+    follower_id, author_id = instance.follower_id, instance.author_id
+    transaction.on_commit(lambda: prune_home_timeline.delay(follower_id, author_id))
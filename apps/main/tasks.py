@@ -0,0 +1,94 @@
+from celery import shared_task
+from django.core.cache import cache
+from .importers import ContentImporter
+from .models import ImportJob
+from .related import RelatedPostsService
+from .services import TimelineService, TrendingService, ViewCounterService, ViewStatsService
+from apps.core.cache import ResponseCache
+
+
+@shared_task
+def flush_post_views():
+    '''Переносить буферизовані перегляди в posts.views_count'''
+    return ViewCounterService.flush()
+
+
+@shared_task
+def flush_view_events():
+    '''Записує події переглядів з черги в журнал post_view_events'''
+    return ViewStatsService.flush_events()
+
+
+@shared_task
+def rollup_post_views():
+    '''Згортає журнал переглядів у денні лічильники post_daily_views'''
+    result = ViewStatsService.rollup()
+    # Поки немає трендів, featured рахується з денних лічильників
+    if result['updated_buckets']:
+        ResponseCache.invalidate('posts:featured')
+    return result
+
+
+@shared_task
+def update_trending_scores():
+    '''Перераховує трендові топи і скидає кеш стрічок, які їх читають'''
+    result = TrendingService.rebuild()
+    ResponseCache.invalidate('posts:popular', 'posts:featured')
+    return result
+
+
+@shared_task
+def run_content_import(job_id):
+    '''Імпортує файл ImportJob; повторний запуск продовжує з останнього записаного шматка'''
+    job = ImportJob.objects.get(pk=job_id)
+    return ContentImporter(job).run()
+
+
+@shared_task
+def fan_out_post(post_id):
+    '''Додає опублікований пост у домашні стрічки підписників автора'''
+    return TimelineService.fan_out(post_id)
+
+
+@shared_task
+def retract_post(post_id, author_id):
+    '''Прибирає знятий з публікації чи видалений пост зі стрічок підписників'''
+    return TimelineService.retract(post_id, author_id)
+
+
+@shared_task
+def backfill_home_timeline(follower_id, author_id):
+    '''Нова підписка: останні пости автора у стрічку підписника'''
+    return TimelineService.backfill(follower_id, author_id)
+
+
+@shared_task
+def prune_home_timeline(follower_id, author_id):
+    '''Відписка: пости автора зі стрічки колишнього підписника'''
+    return TimelineService.prune(follower_id, author_id)
+
+
+# Збірка і оновлення схожих постів пишуть один файл індексу — не запускаються одночасно
+RELATED_POSTS_LOCK = 'related-posts:lock'
+RELATED_POSTS_LOCK_TIMEOUT = 60 * 60 * 6
+
+
+def _with_related_posts_lock(func):
+    if not cache.add(RELATED_POSTS_LOCK, 1, RELATED_POSTS_LOCK_TIMEOUT):
+        return {'skipped': True}
+    try:
+        return func()
+    finally:
+        cache.delete(RELATED_POSTS_LOCK)
+
+
+@shared_task
+def rebuild_related_posts():
+    '''Повна збірка схожих постів (щоночі)'''
+    return _with_related_posts_lock(RelatedPostsService.rebuild)
+
+
+@shared_task
+def update_related_posts():
+    '''Схожі для нових постів і вставка нових у списки старих'''
+    return _with_related_posts_lock(RelatedPostsService.update)
@@ -5,7 +5,7 @@ urlpatterns = [
     #Categories
     path('categories/', views.CategoryListCreateView.as_view(), name='category-list'),
     path('categories/<slug:slug>/', views.CategoryDetailView.as_view(), name='category-detail'),
-    path('categories/<slug:slug>/posts/', views.post_by_category, name='posts-by-category'),
+    path('categories/<slug:category_slug>/posts/', views.post_by_category, name='posts-by-category'),
 
     #Posts
     path('', views.PostListCreateView.as_view(), name='post-list'),
@@ -14,6 +14,15 @@ urlpatterns = [
     path('featured/', views.featured_posts, name='featured-posts'),
     path('pinned/', views.pinned_posts_only, name='pinned-posts-only'),
     path('recent/', views.recent_posts, name='recent-posts'),
+    path('timeline/', views.home_timeline, name='home-timeline'),
+
+    #Import
+    path('imports/', views.ImportJobListCreateView.as_view(), name='import-job-list'),
+    path('imports/<int:pk>/', views.ImportJobDetailView.as_view(), name='import-job-detail'),
+    path('imports/<int:pk>/resume/', views.resume_import_job, name='import-job-resume'),
+
+    path('<slug:slug>/related/', views.related_posts, name='related-posts'),
+    path('<slug:slug>/stats/', views.post_stats, name='post-stats'),
     path('<slug:slug>/', views.PostDetailView.as_view(), name='post-detail'),
 
 ]
\ No newline at end of file
@@ -1,15 +1,29 @@
 from rest_framework.decorators import api_view , permission_classes
 from django.shortcuts import render
 from rest_framework import generics, permissions, status, filters
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
-from .models import Category, Post
-from .serializers import (CategorySerializer, PostListSerializer, PostDetailSerializer, PostCreateSerializer)
+from .models import Category, ImportJob, Post
+from .pagination import PinnedFirstPagination
+from .services import TimelineService, TrendingService, ViewCounterService, ViewStatsService
+from .serializers import (CategorySerializer, PostListSerializer, PostDetailSerializer, PostCreateSerializer,
+                          ImportJobSerializer)
+from .tasks import run_content_import
 from .permissions import IsAuthenticatedOrReadOnly
+from apps.core.filters import FullTextSearchFilter
+from apps.core.asyncviews import AsyncReadMixin, aprefetch_one, async_api_view
+from apps.core.cache import cache_response
+from apps.core.conditional import ConditionalGetMixin, ConditionalListMixin
+from apps.core.fieldsets import SparseFieldsetViewMixin
 from ..comments.permissions import IsAuthorOrReadOnly
 
 @extend_schema_view(
@@ -24,7 +38,7 @@ from ..comments.permissions import IsAuthorOrReadOnly
         tags=['Категорії']
     )
 )
-class CategoryListCreateView(generics.ListCreateAPIView):
+class CategoryListCreateView(SparseFieldsetViewMixin, generics.ListCreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -39,12 +53,20 @@ class CategoryListCreateView(generics.ListCreateAPIView):
     patch=extend_schema(summary="Частково оновити категорію", tags=['Категорії']),
     delete=extend_schema(summary="Видалити категорію", tags=['Категорії'])
 )
-class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CategoryDetailView(ConditionalGetMixin, SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     lookup_field = 'slug'
 
+    def get_validators(self, request, *args, **kwargs):
+        row = self.get_queryset().filter(slug=kwargs[self.lookup_field]).annotate(
+            published_posts=Count('posts', filter=Q(posts__status='published'))
+        ).values('id', 'updated_at', 'published_posts').first()
+        if row is None:
+            return None
+        return (row['id'], row['updated_at'], row['published_posts']), row['updated_at']
+
 
 @extend_schema_view(
     get=extend_schema(
@@ -58,31 +80,37 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
         tags=['Пости']
     )
 )
-class PostListCreateView(generics.ListCreateAPIView):
+class PostListCreateView(ConditionalListMixin, AsyncReadMixin, SparseFieldsetViewMixin, generics.ListCreateAPIView):
     serializer_class = PostListSerializer
+    pagination_class = PinnedFirstPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['category','author','status']
-    search_fields = ['title','content']
     ordering_fields = ['created_at', 'updated_at', 'views_count']
     ordering = ['-created_at']
 
     def get_queryset(self):
-        queryset = Post.objects.select_related('author','category')
-        if not self.request.user.is_authenticated:
-            queryset = queryset.filter(status= 'published')
-        else:
-            queryset = queryset.filter(Q(status= 'published') | Q(author=self.request.user))
+        return Post.objects.for_list().visible_to(self.request.user)
+
+    def get_page_slice(self, queryset, low, high):
+        #Сторінка пагінації: опубліковані і власні чернетки — окремими індексними сканами
+        return queryset.slice_by_union(Post.objects.visible_branches(self.request.user), low, high)
+
+    async def aget_page_slice(self, queryset, low, high):
+        return await queryset.aslice_by_union(Post.objects.visible_branches(self.request.user), low, high)
 
-        return queryset
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return PostCreateSerializer
         return PostListSerializer
 
     def list(self, request , *args, **kwargs):
-        response = super().list(request, *args, **kwargs)
+        return self.add_pinned_count(super().list(request, *args, **kwargs))
+
+    async def alist(self, request, *args, **kwargs):
+        return self.add_pinned_count(await super().alist(request, *args, **kwargs))
 
+    def add_pinned_count(self, response):
         #Статистика закріплених постів
         if hasattr(response, 'data') and 'results' in response.data:
             pinned_count = sum(1 for post in response.data['results'] if post.get('is_pinned', False))
@@ -94,15 +122,15 @@ class PostListCreateView(generics.ListCreateAPIView):
 @extend_schema_view(
     get=extend_schema(
         summary="Деталі поста",
-        description="Повертає повний вміст поста та інкрементує лічильник переглядів.",
+        description="Повертає повний вміст поста та реєструє перегляд (лічильник оновлюється пакетно у фоні).",
         tags=['Пости']
     ),
     put=extend_schema(summary="Оновити пост", tags=['Пости']),
     patch=extend_schema(summary="Частково оновити пост", tags=['Пости']),
     delete=extend_schema(summary="Видалити пост", tags=['Пости'])
 )
-class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Post.objects.select_related('author','category')
+class PostDetailView(ConditionalGetMixin, AsyncReadMixin, SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Post.objects.with_feed_info().defer('search_vector')
     serializer_class = PostDetailSerializer
     permission_classes = [IsAuthorOrReadOnly]
     lookup_field = 'slug'
@@ -112,6 +140,40 @@ class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
             return PostCreateUpdateSerializer
         return PostDetailSerializer
 
+    validator_fields = (
+        'id', 'updated_at', 'views_count', 'comments_count', 'pin_is_active', 'pinned_at',
+        'author__updated_at', 'category__updated_at',
+        'author_id', 'author__subscription__status', 'author__subscription__end_date',
+    )
+
+    def get_validators(self, request, *args, **kwargs):
+        row = self.get_queryset().filter(slug=kwargs[self.lookup_field]).values(*self.validator_fields).first()
+        return self.validators_from_row(request, row)
+
+    async def aget_validators(self, request, *args, **kwargs):
+        row = await self.get_queryset().filter(slug=kwargs[self.lookup_field]).values(*self.validator_fields).afirst()
+        return self.validators_from_row(request, row)
+
+    def validators_from_row(self, request, row):
+        if row is None:
+            return None
+        self.validated_post_id = row['id']
+        last_modified = max(filter(None, (row['updated_at'], row['author__updated_at'], row['category__updated_at'])))
+        author_id = row.pop('author_id')
+        status, end_date = row.pop('author__subscription__status'), row.pop('author__subscription__end_date')
+        # can_pin залежить від користувача, а для автора — ще й від його підписки (зокрема, чи не минув end_date)
+        parts = (*row.values(), request.user.pk)
+        if author_id == request.user.pk:
+            parts += (status, end_date, status == 'active' and end_date is not None and end_date > timezone.now())
+        return parts, last_modified
+
+    def on_not_modified(self, request, *args, **kwargs):
+        # 304 — теж перегляд; лічильник у буфері, тож валідатор не змінюється
+        ViewCounterService.record_view(self.validated_post_id)
+
+    async def aon_not_modified(self, request, *args, **kwargs):
+        await ViewCounterService.arecord_view(self.validated_post_id)
+
     def retrieve(self, request,*args, **kwargs):
         instance = self.get_object()
 
@@ -121,87 +183,101 @@ class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+
+        if request.method == 'GET':
+            await instance.aincrement_views()
+
+        user = request.user
+        if user.is_authenticated and instance.author_id == user.pk:
+            # can_pin читає user.subscription — у async-контексті його треба завантажити заздалегідь
+            await aprefetch_one(user, 'subscription')
+
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
 
 @extend_schema(
     tags=['Пости'],
     summary="Мої пости",
     description="Список усіх постів (опублікованих та чернеток), які належать поточному користувачу."
 )
-class MyPostsView(generics.ListAPIView):
+class MyPostsView(SparseFieldsetViewMixin, generics.ListAPIView):
     serializer_class = PostListSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter, filters.SearchFilter]
+    filter_backends = [filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['category','status']
-    search_fields = ['title','content']
     ordering_fields = ['created_at', 'updated_at', 'views_count']
     ordering = ['-created_at']
 
     def get_queryset(self):
-        return Post.objects.filter(author=self.request.user).select_related('author','category')
+        return Post.objects.filter(author=self.request.user).for_list()
 
 
 @extend_schema(
     tags=['Пости'],
     summary="Пости за категорією",
-    description="Повертає список опублікованих постів для конкретної категорії (за її слагом).",
-    parameters=[OpenApiParameter(name="category_slug", type=str, location=OpenApiParameter.PATH)]
+    description="Повертає опубліковані пости категорії (за її слагом) сторінками: закріплені — першими "
+                "на першій сторінці, далі решта від нових до старих. Пагінація — як у стрічці (?page= або ?cursor=).",
+    parameters=[
+        OpenApiParameter(name="category_slug", type=str, location=OpenApiParameter.PATH),
+        OpenApiParameter(name='page', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False),
+        OpenApiParameter(name='cursor', type=str, location=OpenApiParameter.QUERY, required=False,
+                         description=PinnedFirstPagination.cursor_query_description),
+    ]
 )
-@api_view(['GET'])
+@async_api_view
 @permission_classes([permissions.AllowAny])
-def post_by_category(request, category_slug):
-    category = get_object_or_404(Category, slug=category_slug)
-    posts = Post.objects.with_subscription_info().filter(category=category,status = 'published')
-
-    from django.db.models import Case, When, Value, DateTimeField, BooleanField
-    from django.utils import timezone
-    """
-    Сортує пости: спочатку закріплені (якщо підписка автора активна), 
-    потім решту за датою створення.
-    """
-    posts = posts.annotate(
-        effective_data = Case(
-            When(
-                pin_info__isnull = False,
-                pin_info__user__subscription__status = 'active',
-                pin_info__user__subscription__end_date__gt = timezone.now(),
-                then = 'pin_info__pinned_at'
-            ),
-            default='created_at',
-            output_field=DateTimeField()
-        ),
-        is_pinned_flag = Case(
-            When(
-                pin_info__isnull = False,
-                pin_info__user__subscription__status = 'active',
-                pin_info__user__subscription__end_date__gt = timezone.now(),
-                then = Value(True)
-            ),
-            default = Value(False),
-            output_field=BooleanField()
-        )
-    ).order_by('-is_pinned_flag', 'effective_data', '-created_at')
-
-    serializer = PostListSerializer(posts, many=True, context={'request': request})
+async def post_by_category(request, category_slug):
+    category = await aget_object_or_404(
+        Category.objects.annotate(published_posts_count=Count('posts', filter=Q(posts__status='published'))),
+        slug=category_slug,
+    )
+    posts = PostListSerializer.sparse_queryset(
+        Post.objects.for_list().filter(category=category, status='published').order_by('-created_at'), request
+    )
+    # Спершу закріплені (якщо підписка автора діє), далі решта за датою — сторінками
+    paginator = PinnedFirstPagination()
+    page = await paginator.apaginate_queryset(posts, request)
+    serializer = PostListSerializer(page, many=True, context={'request': request})
 
     return Response({
         'category' : CategorySerializer(category).data,
+        **paginator.get_paginated_data(serializer.data),
         'posts' : serializer.data,
-        'pinned_posts_count' : sum(1 for post in selializer.data if post.get('is pinned', False)),
+        'pinned_posts_count' : len(paginator.pinned),
     })
 
 
 @extend_schema(
     tags=['Пости'],
     summary="Популярні пости",
-    description="Повертає топ-10 постів з найбільшою кількістю переглядів."
+    description="Повертає топ-10 трендових постів (перегляди й коментарі з урахуванням давності). "
+                "Параметр category обмежує топ однією категорією.",
+    parameters=[
+        OpenApiParameter(name='category', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False),
+    ]
 )
+@cache_response('posts:popular')
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
-def popular_posts(request, category_slug):
+def popular_posts(request):
     '''10 самих популярних постів '''
-    posts = Post.objects.with_subscription_info().filter(
-        status = 'published'
-    ).order_by('-views_count')[:10]
+    category_id = request.query_params.get('category')
+    if category_id is not None and not category_id.isdigit():
+        return Response({'error': 'category must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    queryset = PostListSerializer.sparse_queryset(
+        Post.objects.for_list().filter(status = 'published'), request
+    )
+    if category_id:
+        queryset = queryset.filter(category_id = category_id)
+
+    # Топ з Redis; поки Celery його не порахував — сортування по views_count
+    posts = TrendingService.top_posts(queryset, category_id=int(category_id) if category_id else None)
+    if posts is None:
+        posts = queryset.order_by('-views_count', '-id')[:10]
 
     serializer = PostListSerializer(posts, many=True, context={'request': request})
     return Response(serializer.data)
@@ -212,11 +288,12 @@ def popular_posts(request, category_slug):
     summary="Нещодавні пости",
     description="Повертає 10 останніх опублікованих постів, відсортованих за датою створення (спочатку нові)."
 )
+@cache_response('posts:recent')
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
-def recent_posts(request, category_slug):
-    posts = Post.objects.with_subscription_info().filter(
-        status = 'published'
+def recent_posts(request):
+    posts = PostListSerializer.sparse_queryset(
+        Post.objects.for_list().filter(status = 'published'), request
     ).order_by('-created_at')[:10]
 
     serializer = PostListSerializer(
@@ -226,16 +303,101 @@ def recent_posts(request, category_slug):
     )
     return Response(serializer.data)
 
+@extend_schema(
+    tags=['Спеціальні вибірки'],
+    summary="Схожі пости",
+    description="До 8 опублікованих постів, найближчих за змістом (TF-IDF), з перевагою постів тієї ж категорії. "
+                "Списки перераховуються фоновою задачею, тож новий пост отримує схожі протягом кількох хвилин."
+)
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def related_posts(request, slug):
+    '''Схожі пости з related_posts: один запит по індексам slug і (post, rank)'''
+    posts = list(PostListSerializer.sparse_queryset(
+        Post.objects.for_list().filter(status='published'), request
+    ).filter(
+        related_to__post__slug=slug, related_to__post__status='published'
+    ).order_by('related_to__rank'))
+    if not posts and not Post.objects.filter(slug=slug, status='published').exists():
+        raise NotFound()
+
+    serializer = PostListSerializer(posts, many=True, context={'request': request})
+    return Response(serializer.data)
+
+@extend_schema(
+    tags=['Дії з постами'],
+    summary="Статистика переглядів поста",
+    description="Перегляди власного поста по днях (UTC) за останні days днів, включно з сьогоднішнім (за замовчуванням 30, "
+                "максимум 365). Дані оновлюються щогодини, тож останні перегляди можуть ще не бути враховані.",
+    parameters=[
+        OpenApiParameter(name='days', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False),
+    ],
+    responses={200: OpenApiTypes.OBJECT}
+)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def post_stats(request, slug):
+    '''Часовий ряд переглядів з post_daily_views, лише для автора поста'''
+    post = get_object_or_404(Post, slug=slug, author=request.user)
+
+    days = request.query_params.get('days', '30')
+    if not days.isdigit() or not 1 <= int(days) <= 365:
+        return Response({'error': 'days must be an integer between 1 and 365'}, status=status.HTTP_400_BAD_REQUEST)
+
+    series = ViewStatsService.daily_series(post, int(days))
+    return Response({
+        'slug': post.slug,
+        'views_count': post.views_count,
+        'total_views': sum(item['views'] for item in series),
+        'series': series,
+    })
+
+@extend_schema(
+    tags=['Спеціальні вибірки'],
+    summary="Домашня стрічка",
+    description="Опубліковані пости авторів, на яких підписаний користувач, спочатку нові. "
+                "Наступна сторінка — за посиланням next (параметр cursor).",
+    parameters=[
+        OpenApiParameter(name='cursor', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False),
+    ]
+)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def home_timeline(request):
+    '''Стрічка підписок з Redis (fan-out on write) з підмішаними постами великих авторів'''
+    cursor = request.query_params.get('cursor')
+    if cursor is not None and not cursor.isdigit():
+        raise NotFound('Invalid cursor')
+
+    limit = api_settings.PAGE_SIZE
+    entries, has_more = TimelineService.read(request.user, int(cursor) if cursor else None, limit)
+    posts = PostListSerializer.sparse_queryset(
+        Post.objects.for_list().filter(status='published'), request
+    ).in_bulk([post_id for post_id, _ in entries])
+
+    # Порядок стрічки; пости, зняті з публікації до того, як їх прибрала задача, пропускаються
+    serializer = PostListSerializer(
+        [posts[post_id] for post_id, _ in entries if post_id in posts], many=True, context={'request': request}
+    )
+    next_url = None
+    if has_more:
+        next_url = replace_query_param(request.build_absolute_uri(), 'cursor', entries[-1][1])
+    return Response({
+        'next': next_url,
+        'results': serializer.data,
+    })
+
 @extend_schema(
     tags=['Спеціальні вибірки'],
     summary="Тільки закріплені пости",
     description="Повертає список усіх постів, які були закріплені авторами з активною підпискою."
 )
+@cache_response('posts:pinned')
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def pinned_posts_only(request):
     '''Тільки закріпленні пости'''
-    posts = Post.objects.pinned_posts()
+    posts = Post.objects.pinned_posts().for_list()
     serializer = PostListSerializer(posts, many=True, context={'request': request})
     return Response({
         'count': posts.count(),
@@ -244,19 +406,24 @@ def pinned_posts_only(request):
 @extend_schema(
     tags=['Спеціальні вибірки'],
     summary="Рекомендовані пости (Featured)",
-    description="Комплексна вибірка: повертає до 3 закріплених постів та до 6 популярних постів за останній тиждень."
+    description="Комплексна вибірка: повертає до 3 закріплених постів та до 6 трендових постів."
 )
+@cache_response('posts:featured')
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def featured_posts(request):
-    pinned_posts = Post.objects.pinned_posts()[:3]
-    week_ago = timezone.now() - timedelta(days=7)
-    popular_posts = Post.objects.with_subscription_info().filter(
-        status = 'published',
-        created_at__gte = week_ago
-    ).exclude(
-        id__in = [post.id for post in pinned_posts]
-    ).order_by('-views_count')[:6]
+    pinned_posts = Post.objects.pinned_posts().for_list()[:3]
+    pinned_ids = {post.id for post in pinned_posts}
+    popular_posts = TrendingService.top_posts(
+        Post.objects.for_list().filter(status = 'published'),
+        limit = 6,
+        exclude_ids = pinned_ids,
+    )
+    if popular_posts is None:
+        # Поки тренди не пораховані — перегляди за останні 7 днів з денних лічильників
+        popular_ids = ViewStatsService.top_post_ids(days=7, limit=6, exclude_ids=pinned_ids)
+        by_id = Post.objects.for_list().filter(status = 'published').in_bulk(popular_ids)
+        popular_posts = [by_id[post_id] for post_id in popular_ids if post_id in by_id]
 
     pinned_serializer = PostListSerializer(pinned_posts, many=True, context={'request': request})
     popular_serializer = PostListSerializer(popular_posts, many=True, context={'request': request})
@@ -311,7 +478,61 @@ def toogle_post_pin_status(request, slug):
         }, status = status.HTTP_400_BAD_REQUEST)
 
 
+@extend_schema_view(
+    get=extend_schema(
+        summary="Задачі імпорту (Admin)",
+        description="Тільки для адміністраторів: перелік задач масового імпорту з прогресом.",
+        tags=['Імпорт']
+    ),
+    post=extend_schema(
+        summary="Запустити імпорт (Admin)",
+        description="Завантажує файл (JSON, JSON Lines, CSV або WordPress WXR) і ставить імпорт "
+                    "постів і коментарів у чергу Celery. Формат визначається за розширенням, якщо не переданий.",
+        tags=['Імпорт']
+    )
+)
+class ImportJobListCreateView(generics.ListCreateAPIView):
+    queryset = ImportJob.objects.select_related('default_author')
+    serializer_class = ImportJobSerializer
+    permission_classes = [permissions.IsAdminUser]
+    filter_backends = []
 
+    def perform_create(self, serializer):
+        job = serializer.save(created_by=self.request.user)
+        # Файл і задача мають бути в БД до того, як воркер її візьме
+        transaction.on_commit(lambda: run_content_import.delay(job.pk))
 
 
+@extend_schema_view(
+    get=extend_schema(summary="Прогрес імпорту (Admin)", tags=['Імпорт'])
+)
+class ImportJobDetailView(generics.RetrieveAPIView):
+    queryset = ImportJob.objects.select_related('default_author')
+    serializer_class = ImportJobSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+
+@extend_schema(
+    tags=['Імпорт'],
+    summary="Продовжити імпорт (Admin)",
+    description="Повторно ставить у чергу перерваний або невдалий імпорт; він продовжиться з останнього записаного шматка. "
+                "Поки імпорт виконується — 409.",
+    request=None,
+    responses={202: ImportJobSerializer}
+)
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def resume_import_job(request, pk):
+    '''Продовжує перерваний імпорт'''
+    job = get_object_or_404(ImportJob.objects.select_for_update(), pk=pk)
+    if job.status == 'completed':
+        return Response({
+            'error': 'Import is already completed'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if job.status == 'running':
+        return Response({
+            'error': 'Import is already running'
+        }, status=status.HTTP_409_CONFLICT)
 
+    transaction.on_commit(lambda: run_content_import.delay(job.pk))
+    return Response(ImportJobSerializer(job, context={'request': request}).data, status=status.HTTP_202_ACCEPTED)
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.db.models import Sum
+from apps.core.admin import EstimatedCountAdminMixin
 from .models import Payment, PaymentAttempt, Refund, Webhook
 
 
@@ -24,7 +25,7 @@ class RefundInline(admin.TabularInline):
 
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = (
         'id', 'user_link', 'amount_display', 'status_display',
         'payment_method', 'subscription_link', 'created_at'
@@ -243,7 +244,7 @@ class RefundAdmin(admin.ModelAdmin):
 
 
 @admin.register(Webhook)
-class WebhookEventAdmin(admin.ModelAdmin):
+class WebhookEventAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = (
         'id', 'provider', 'event_type', 'status_display',
         'error_message_short', 'created_at'
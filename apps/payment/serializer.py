@@ -1,9 +1,11 @@
 from rest_framework import serializers
 from decimal import Decimal
 from .models import Payment, PaymentAttempt, Refund, Webhook
+from apps.core.fieldsets import SparseFieldsetMixin
+from apps.core.loaders import BatchRelationsMixin
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(SparseFieldsetMixin, BatchRelationsMixin, serializers.ModelSerializer):
     """Серіалізатор для платежей"""
     user_info = serializers.SerializerMethodField()
     subscription_info = serializers.SerializerMethodField()
@@ -22,6 +24,13 @@ class PaymentSerializer(serializers.ModelSerializer):
         read_only_fields = [
             'id', 'user', 'status', 'created_at', 'updated_at', 'processed_at'
         ]
+        sparse_field_sources = {
+            'user_info': ('user',),
+            'subscription_info': ('subscription__plan',),
+            'is_successful': ('status',),
+            'is_pending': ('status',),
+            'can_be_refunded': ('status',),
+        }
 
     def get_user_info(self, obj):
         """Повертає інфу про користувача"""
@@ -89,7 +98,7 @@ class PaymentCreateSerializer(serializers.Serializer):
         return attrs
 
 
-class PaymentAttemptSerializer(serializers.ModelSerializer):
+class PaymentAttemptSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Серіалізатор для спроб платежа"""
 
     class Meta:
@@ -101,7 +110,7 @@ class PaymentAttemptSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class RefundSerializer(serializers.ModelSerializer):
+class RefundSerializer(SparseFieldsetMixin, BatchRelationsMixin, serializers.ModelSerializer):
     """Серіалізатор для повернень"""
     payment_info = serializers.SerializerMethodField()
     created_by_info = serializers.SerializerMethodField()
@@ -117,6 +126,11 @@ class RefundSerializer(serializers.ModelSerializer):
         read_only_fields = [
             'id', 'status', 'created_by', 'created_at', 'processed_at'
         ]
+        sparse_field_sources = {
+            'payment_info': ('payment__user',),
+            'created_by_info': ('created_by',),
+            'is_partial': ('amount', 'payment'),
+        }
 
     def get_payment_info(self, obj):
         """Повертає інфу про повернення"""
@@ -182,7 +196,7 @@ class RefundCreateSerializer(serializers.ModelSerializer):
         return value
 
 
-class WebhookEventSerializer(serializers.ModelSerializer):
+class WebhookEventSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Серіалізатор для webhook"""
 
     class Meta:
@@ -1,5 +1,6 @@
 import stripe
 import json
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
@@ -8,7 +9,7 @@ from django.utils.decorators import method_decorator
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from django.db import transaction
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
@@ -25,6 +26,8 @@ from .serializer import (
 )
 from .services import StripeService, PaymentService, WebhookService
 from apps.subscribe.models import SubscriptionPlan
+from apps.core.asyncviews import async_api_view
+from apps.core.fieldsets import SparseFieldsetViewMixin
 
 
 # --- Перегляд платежів ---
@@ -35,7 +38,7 @@ from apps.subscribe.models import SubscriptionPlan
         tags=['Платежі']
     )
 )
-class PaymentListView(generics.ListAPIView):
+class PaymentListView(SparseFieldsetViewMixin, generics.ListAPIView):
     """Список платежів користувача"""
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -53,7 +56,7 @@ class PaymentListView(generics.ListAPIView):
         tags=['Платежі']
     )
 )
-class PaymentDetailView(generics.RetrieveAPIView):
+class PaymentDetailView(SparseFieldsetViewMixin, generics.RetrieveAPIView):
     """Детальна інформація про платіж"""
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -126,26 +129,31 @@ def create_checkout_session(request):
     description="Отримує актуальний статус платежу. Якщо платіж у стані очікування, виконується запит до Stripe для синхронізації.",
     responses={200: PaymentStatusSerializer}
 )
-@api_view(['GET'])
+@async_api_view
 @permission_classes([permissions.IsAuthenticated])
-def payment_status(request, payment_id):
+async def payment_status(request, payment_id):
     """Перевіряє статус платежу"""
     try:
-        payment = get_object_or_404(
-            Payment,
+        payment = await aget_object_or_404(
+            Payment.objects.select_related('subscription'),
             id=payment_id,
             user=request.user
         )
 
         # Якщо є session_id, перевіряємо статус у Stripe
         if payment.stripe_session_id and payment.status in ['pending', 'processing']:
-            session_info = StripeService.retrieve_session(payment.stripe_session_id)
+            # HTTP-запит до Stripe — в окремому потоці, event loop тим часом обслуговує інші запити
+            session_info = await sync_to_async(StripeService.retrieve_session, thread_sensitive=False)(
+                payment.stripe_session_id
+            )
 
             if session_info:
                 if session_info['status'] == 'complete':
-                    PaymentService.process_successful_payment(payment)
+                    await sync_to_async(transaction.atomic(PaymentService.process_successful_payment))(payment)
                 elif session_info['status'] == 'failed':
-                    PaymentService.process_failed_payment(payment, "Сесія перервана")
+                    await sync_to_async(transaction.atomic(PaymentService.process_failed_payment))(
+                        payment, "Сесія перервана"
+                    )
 
         response_data = {
             'payment_id': payment.id,
@@ -264,7 +272,7 @@ def retry_payment(request, payment_id):
 )
 # --- Повернення коштів (Refunds) ---
 
-class RefundListView(generics.ListAPIView):
+class RefundListView(SparseFieldsetViewMixin, generics.ListAPIView):
     """Список повернень для адміністраторів"""
     serializer_class = RefundSerializer
     permission_classes = [permissions.IsAdminUser]
@@ -280,7 +288,7 @@ class RefundListView(generics.ListAPIView):
         tags=['Повернення коштів (Refunds)']
     )
 )
-class RefundDetailView(generics.RetrieveAPIView):
+class RefundDetailView(SparseFieldsetViewMixin, generics.RetrieveAPIView):
     """Детальна інформація про повернення"""
     serializer_class = RefundSerializer
     permission_classes = [permissions.IsAdminUser]
@@ -452,7 +460,7 @@ def user_payment_history(request):
         user=request.user
     ).select_related('subscription', 'subscription__plan').order_by('-created_at')
 
-    serializer = PaymentSerializer(payments, many=True)
+    serializer = PaymentSerializer(payments, many=True, context={'request': request})
     return Response({
         'count': payments.count(),
         'results': serializer.data
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class SubscribeConfig(AppConfig):
     name = 'apps.subscribe'
+
+    def ready(self):
+        from . import signals  # noqa: F401
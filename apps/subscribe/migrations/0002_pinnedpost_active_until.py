@@ -0,0 +1,35 @@
+# Generated by Django 5.2.11 on 2026-10-17 07:42
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_active_until(apps, schema_editor):
+    PinnedPost = apps.get_model('subscribe', 'PinnedPost')
+    Subscription = apps.get_model('subscribe', 'Subscription')
+    PinnedPost.objects.update(active_until=Subquery(
+        Subscription.objects.filter(user_id=OuterRef('user_id'), status='active').values('end_date')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_post_search_vector'),
+        ('subscribe', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pinnedpost',
+            name='active_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='pinnedpost',
+            index=models.Index(fields=['active_until', 'pinned_at'], name='pinned_post_active__4e44da_idx'),
+        ),
+        migrations.RunPython(backfill_active_until, migrations.RunPython.noop),
+    ]
@@ -108,6 +108,22 @@ class Subscription(models.Model):
         self.end_date = self.start_date + timedelta(days=self.plan.duration_days)
         self.save()
 
+class PinnedPostQuerySet(models.QuerySet):
+    def effective(self):
+        '''Закріплення, що діють зараз (індекс active_until замість join на підписку)'''
+        return self.filter(active_until__gt=timezone.now())
+
+    def effective_post_ids(self):
+        return list(self.effective().order_by('pinned_at').values_list('post_id', flat=True))
+
+    def sync_for_subscription(self, subscription, deleted=False):
+        '''Переносить стан підписки в індекс закріплень її власника'''
+        active = not deleted and subscription.status == 'active'
+        return self.filter(user_id=subscription.user_id).update(
+            active_until=subscription.end_date if active else None
+        )
+
+
 class PinnedPost(models.Model):
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL,
@@ -120,6 +136,10 @@ class PinnedPost(models.Model):
         related_name='pin_info',
     )
     pinned_at = models.DateTimeField(auto_now_add=True)
+    # Денормалізований кінець дії закріплення: end_date активної підписки або NULL
+    active_until = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = PinnedPostQuerySet.as_manager()
 
     class Meta:
         db_table = 'pinned_posts'
@@ -128,10 +148,15 @@ class PinnedPost(models.Model):
         ordering = ['-pinned_at']
         indexes = [
             models.Index(fields=['pinned_at']),
+            models.Index(fields=['active_until', 'pinned_at']),
         ]
     def __str__(self):
         return f"{self.user.username} pinned {self.post.title}"
 
+    @property
+    def is_effective(self):
+        return self.active_until is not None and self.active_until > timezone.now()
+
     def save(self, *args, **kwargs):
         '''Переоприділяє збереження для перевірки підписки'''
 
@@ -143,6 +168,7 @@ class PinnedPost(models.Model):
         if self.post.author != self.user:
             raise ValueError('User can only pin their own post')
 
+        self.active_until = self.user.subscription.end_date
         super().save(*args, **kwargs)
 
 class SubscriptionHistory(models.Model):
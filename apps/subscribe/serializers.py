@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.utils import timezone
+from apps.core.loaders import BatchRelationsMixin
 from .models import SubscriptionPlan, Subscription, PinnedPost, SubscriptionHistory
 
 class SubscriptionPlanSerializer(serializers.ModelSerializer):
@@ -19,7 +20,7 @@ class SubscriptionPlanSerializer(serializers.ModelSerializer):
 
         return data
 
-class SubscriptionSerializer(serializers.ModelSerializer):
+class SubscriptionSerializer(BatchRelationsMixin, serializers.ModelSerializer):
     plan_info = SubscriptionPlanSerializer(read_only=True, source='plan')
     user_info = serializers.SerializerMethodField()
     is_active = serializers.ReadOnlyField()
@@ -31,6 +32,7 @@ class SubscriptionSerializer(serializers.ModelSerializer):
             'id', 'user', 'user_info', 'plan', 'plan_info','status', 'start_date','end_date','auto_renew', 'is_active', 'days_remaining', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id','user', 'status', 'start_date', 'end_date' ,'created_at', 'updated_at']
+        sparse_field_sources = {'user_info': ('user',)}
 
     def get_user_info(self, obj):
         """Інфо про користувача"""
@@ -70,12 +72,13 @@ class SubscriptionCreateSerializer(serializers.ModelSerializer):
 
         return super().create(validated_data)
 
-class PinnedPostSerializer(serializers.ModelSerializer):
+class PinnedPostSerializer(BatchRelationsMixin, serializers.ModelSerializer):
     post_info = serializers.SerializerMethodField()
     class Meta:
         model = PinnedPost
         fields =['id', 'post', 'post_info', 'pinned_at']
         read_only_fields = ['id','pinned_at']
+        sparse_field_sources = {'post_info': ('post',)}
     def get_post_info(self, obj):
         '''Повертає інформацію про пост'''
         return {
@@ -133,7 +136,7 @@ class UserSubscriptionStatusSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         '''Формує відповідь з інформацією про підписку'''
         user = instance
-        has_subscription = hasattr(user, 'subcription')
+        has_subscription = hasattr(user, 'subscription')
         subscription = user.subscription if has_subscription else None
         is_active = subscription.is_active if subscription else False
         pinned_post = getattr(user, 'pinned_post', None) if is_active else None
@@ -1,4 +1,4 @@
-from django.db.models.signals import post_save ,pre_delete
+from django.db.models.signals import post_save ,pre_delete, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from . models import Subscription, PinnedPost, SubscriptionHistory
@@ -28,7 +28,7 @@ def subscription_delete(sender, instance, **kwargs):
     '''Обробник видалення підписки'''
     # Удаляєм закріпленний пост
     try:
-        instance.user.pinned_posts.delete()
+        instance.user.pinned_post.delete()
     except PinnedPost.DoesNotExist:
         pass
 
@@ -64,4 +64,14 @@ def pinned_post_pre_delete(sender, instance, **kwargs):
                 'post_id': instance.post.id,
                 'post_title': instance.post.title,
             }
-        )
\ No newline at end of file
+        )
+
+@receiver(post_save,sender=Subscription)
+def sync_pin_index_on_save(sender, instance, **kwargs):
+    '''Оновлює індекс активних закріплень при зміні підписки'''
+    PinnedPost.objects.sync_for_subscription(instance)
+
+@receiver(post_delete,sender=Subscription)
+def sync_pin_index_on_delete(sender, instance, **kwargs):
+    '''Знімає закріплення з індексу при видаленні підписки'''
+    PinnedPost.objects.sync_for_subscription(instance, deleted=True)
@@ -9,13 +9,14 @@ def check_expired_subscriptions():
     expired_subscriptions = Subscription.objects.filter(
         status = 'active',
         end_date__lt = now,
-    )
+    ).select_related('user', 'plan')
 
     expired_count = 0
     pinned_posts_removed = 0
 
     for subscription in expired_subscriptions:
-        subscription.delete()
+        # post_save підписки знімає закріплення з індексу active_until
+        subscription.expire()
         expired_count += 1
 
         #Видаляєм закріпленний пост
@@ -31,9 +32,14 @@ def check_expired_subscriptions():
             action = 'expired',
             description = 'Pinned post expired',
         )
+
+    # Страховка: в індексі не лишається протухлих закріплень
+    stale_pins_cleared = PinnedPost.objects.filter(active_until__lte = now).update(active_until = None)
+
     return {
         'expired_subscriptions' : expired_count,
         'pinned_posts_removed' : pinned_posts_removed,
+        'stale_pins_cleared' : stale_pins_cleared,
     }
 
 @shared_task
@@ -9,13 +9,13 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
-from datetime import timezone
 from .models import Subscription, SubscriptionPlan, SubscriptionHistory, PinnedPost
 from .serializers import (SubscriptionPlanSerializer, SubscriptionSerializer,
                           SubscriptionCreateSerializer, PinnedPostSerializer,
                           SubscriptionHistorySerializer, UserSubscriptionStatusSerializer,
                           PinPostSerializer, UnpinPostSerializer)
 from apps.main.models import Post
+from apps.core.asyncviews import aprefetch_one, async_api_view
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 
@@ -146,11 +146,15 @@ class PinnedPostView(generics.RetrieveUpdateDestroyAPIView):
     summary="Статус підписки",
     description="Повертає інформацію про те, чи активна підписка у користувача та чи може він закріплювати пости."
 )
-@api_view(['GET'])
+@async_api_view
 @permission_classes([permissions.IsAuthenticated])
-def subscription_status(request):
+async def subscription_status(request):
     '''Вертає статус підписки'''
-    serializer = UserSubscriptionStatusSerializer(request.user)
+    user = request.user
+    # Серіалізатор читає підписку з планом і закріплений пост — завантажуєм їх async-запитами
+    await aprefetch_one(user, 'subscription', 'plan')
+    await aprefetch_one(user, 'pinned_post', 'post')
+    serializer = UserSubscriptionStatusSerializer(user)
     return Response(serializer.data)
 
 
@@ -276,23 +280,17 @@ def cancel_subscription(request):
 @permission_classes([permissions.AllowAny])
 def pinned_post_list(request):
     '''Повертає список всіх закріпленних постів'''
-    pinned_posts = (PinnedPost.objects.select_related
-            ('post', 'post__author', 'post__category', 'user__subscription'
-    ).filter(
-        user__subscription__status = 'active',
-        user__subscription__end_date__gt = timezone.now(),
-        post__status ='published'
-    ).order_by('pinned_at'))
+    # Індекс active_until замість join на підписку; анотації — без запитів на кожен пост
+    pinned_posts = Post.objects.pinned_posts().for_list()
 
     # Формуєм відповідь з інфою про пост
     posts_data = []
-    for pinned_posts in pinned_posts:
-        post = pinned_post.post
+    for post in pinned_posts:
         posts_data.append({
             'id' : post.id,
             'title' : post.title,
             'slug' : post.slug,
-            'content' : post.content[:200] + '...' if len(post.content) > 200 else post.content,
+            'content' : post.excerpt,
             'image' : post.image.url if post.image else None,
             'category' : post.category.name if post.category else None,
             'author' : {
@@ -301,9 +299,9 @@ def pinned_post_list(request):
                'full_name' : post.author.full_name,
         },
             'views_count' : post.views_count,
-            'comments_count' : post.comments_count,
+            'comments_count' : post.comment_count,
             'created_at' : post.created_at,
-            'pinned_at' : pinned_posts.pinned_at,
+            'pinned_at' : post.pinned_at,
             'is_pinned' : True,
         })
     return Response({
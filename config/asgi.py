@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Режим сервера визначає точка входу, а не оточення: settings за ним вибирають CONN_MAX_AGE
+os.environ['SERVER_MODE'] = 'asgi'
 
 application = get_asgi_application()
@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import task_postrun, task_prerun
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
@@ -9,6 +10,22 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 app.autodiscover_tasks()
 
+
+@task_prerun.connect
+@task_postrun.connect
+def close_old_db_connections(sender=None, **kwargs):
+    '''
+    Як request_started/request_finished у Django: закриває з'єднання старші за CONN_MAX_AGE або
+    зламані, решта переходить до наступної задачі (CELERY_DB_REUSE_MAX). Eager-задачі виконуються
+    всередині запиту чи тесту і його з'єднання не чіпають
+    '''
+    if sender is None or sender.request.is_eager:
+        return
+    from django.db import close_old_connections
+
+    close_old_connections()
+
+
 @app.task(bind=True)
 def debug_task(self):
     print('Request: {0!r}'.format(self.request))
\ No newline at end of file
@@ -0,0 +1,27 @@
+"""
+Gunicorn config: gunicorn -c config/gunicorn.conf.py
+
+SERVER_MODE=asgi (за замовчуванням) — uvicorn-воркери і config.asgi: async-в'юшки
+(стрічка, пост, коментарі, статус підписки/платежу) не блокують воркер, поки чекають
+на БД чи Stripe. SERVER_MODE=wsgi — класичні синхронні воркери і config.wsgi.
+Під ASGI з'єднання з БД не переживають запит; DB_POOL=True дає пул psycopg замість нового
+з'єднання на кожен запит (див. DATABASES у config/settings.py).
+"""
+import multiprocessing
+import os
+
+# Вибирає лише точку входу; config.asgi / config.wsgi самі повідомляють settings свій режим
+SERVER_MODE = os.environ.get('SERVER_MODE', 'asgi').lower()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 4)))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'config.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+elif SERVER_MODE == 'wsgi':
+    wsgi_app = 'config.wsgi:application'
+    worker_class = 'sync'
+else:
+    raise RuntimeError(f'Unknown SERVER_MODE {SERVER_MODE!r}, expected asgi or wsgi')
@@ -12,7 +12,8 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 from pathlib import Path
 import os
-from decouple import config
+from decouple import Csv, config
+from celery.schedules import crontab
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -39,6 +40,7 @@ DJANGO_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 THIRD_PARTY_APPS = [
     'rest_framework',
@@ -49,6 +51,7 @@ THIRD_PARTY_APPS = [
     'drf_spectacular',
 ]
 LOCAL_APPS = [
+    'apps.core',
     'apps.accounts',
     'apps.main',
     'apps.comments',
@@ -65,8 +68,11 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Останнім: для безпечних запитів сам викликає в'юшку (REQUEST_TRANSACTIONS)
+    'apps.core.middleware.RequestTransactionMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -92,16 +98,73 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# З'єднання (apps/core/postgresql — бекенд Django з лічильниками connection_stats()):
+# постійні з перевіркою перед повторним використанням або пул psycopg 3 (DB_POOL=True, psycopg_pool).
+# Під ASGI синхронний код запиту виконується в окремому потоці, і постійне з'єднання не переживає запит,
+# тож там з'єднання або закриваються після запиту, або беруться з пулу.
+# SERVER_MODE ставлять config/asgi.py і config/wsgi.py; wsgi — для manage.py і Celery
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+SERVER_MODE = config('SERVER_MODE', default='wsgi').lower()
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'apps.core.postgresql',
         'NAME': config('POSTGRES_DB', default='newssite'),
         'USER': config('POSTGRES_USER', default='newsuser'),
         'PASSWORD': config('POSTGRES_PASSWORD'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432', cast=int),
         'ATOMIC_REQUESTS': True,
+        'CONN_MAX_AGE': 0 if DB_POOL or SERVER_MODE == 'asgi' else config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+if DB_POOL:
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            # Скільки секунд запит чекає на вільне з'єднання, перш ніж отримати помилку
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+            'max_idle': 300,
+            'max_lifetime': 1800,
+        },
+    }
+
+# Репліки PostgreSQL для читання (необов'язково): DB_REPLICA_HOSTS=replica1,replica2.
+# Той самий користувач і база, що й primary; читання лише для в'юшок з DATABASE_ROUTING['REPLICA_VIEWS']
+for index, host in enumerate(config('DB_REPLICA_HOSTS', default='', cast=Csv()), start=1):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'ATOMIC_REQUESTS': False,
+        'TEST': {'MIRROR': 'default'},
     }
+
+# Транзакція запиту (apps/core/transactions.py). POST/PUT/PATCH/DELETE — атомарні (ATOMIC_REQUESTS).
+# Безпечні методи: 'autocommit' — без BEGIN/COMMIT, 'read_only' — READ ONLY, READ COMMITTED (запис у GET —
+# помилка, ціною ще одного запиту на SET TRANSACTION), 'atomic' — як небезпечні.
+# Окремі в'юшки перевизначають політику декоратором @request_transaction
+REQUEST_TRANSACTIONS = {
+    'SAFE_METHODS': config('SAFE_METHODS_TRANSACTION', default='autocommit'),
+}
+
+DATABASE_ROUTERS = ['apps.core.routers.PrimaryReplicaRouter']
+
+DATABASE_ROUTING = {
+    'REPLICAS': [alias for alias in DATABASES if alias != 'default'],
+    # Безпечні запити до цих в'юшок (за url name) читають з репліки: стрічки постів, категорії, коментарі.
+    # Платежі, webhook Stripe, профіль і всі записи — завжди primary
+    'REPLICA_VIEWS': [
+        'post-list', 'popular-posts', 'recent-posts', 'featured-posts', 'pinned-posts-only',
+        'posts-by-category', 'related-posts', 'category-list', 'category-detail',
+        'comment-list', 'post-comments', 'comments-replies',
+    ],
+    # Скільки секунд після запису читання користувача йдуть на primary (read-your-writes)
+    'STICKY_SECONDS': 15,
+    # Моделі, які завжди читаються з primary (аутентифікація щойно зареєстрованого користувача)
+    'PRIMARY_MODELS': ['accounts.user'],
 }
 
 
@@ -141,14 +204,17 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.core.authentication.JWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'apps.core.pagination.KeysetPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -156,11 +222,12 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # orjson з відкатом на стандартний json (див. apps/core/renderers.py)
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'apps.core.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'apps.core.parsers.FastJSONParser',
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.FormParser',
     ],
@@ -205,6 +272,153 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_ACCEPT_CONTENT = ['json']
+# Celery не закриває з'єднання з БД після кожної задачі: CONN_MAX_AGE і перевірку стану
+# застосовує config/celery.py, як Django для запитів
+CELERY_DB_REUSE_MAX = config('CELERY_DB_REUSE_MAX', default=1000, cast=int)
+# Обробка зображень — окремий воркер, щоб Pillow не затримував підписки й платежі
+CELERY_TASK_ROUTES = {
+    'apps.core.tasks.generate_image_renditions': {'queue': 'images'},
+    # Збірка схожих постів тримає в пам'яті TF-IDF матрицю всього корпусу — теж окремий воркер
+    'apps.main.tasks.rebuild_related_posts': {'queue': 'related'},
+    'apps.main.tasks.update_related_posts': {'queue': 'related'},
+}
+
+REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/1')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': 'newsapi',
+    }
+}
+
+# Пагінація API і списки адмінки: вище THRESHOLD рядків (за оцінкою планувальника PostgreSQL)
+# count береться з reltuples / EXPLAIN замість COUNT(*) і позначається як приблизний
+COUNT_ESTIMATES = {
+    'THRESHOLD': 10000,
+}
+
+# Стрічка "спершу закріплені": на першу сторінку додаються не більше MAX_PINNED найновіших
+# чинних закріплень серед постів, що проходять фільтри стрічки (понад page_size);
+# решта закріплених постів іде основним потоком
+PINNED_FEED = {
+    'MAX_PINNED': 5,
+}
+
+# Кеш відрендерених відповідей (popular/recent/featured/pinned), інвалідується сигналами
+RESPONSE_CACHE = {
+    'TIMEOUT': 300,
+}
+
+# Буфер переглядів постів (скидається в БД задачею flush_post_views)
+VIEW_COUNTER = {
+    'BACKEND': 'apps.main.services.RedisViewBuffer',
+    'OPTIONS': {
+        'location': REDIS_URL,
+    },
+    'BATCH_SIZE': 1000,
+}
+
+# Події переглядів для статистики в часі: черга -> журнал post_view_events (flush_view_events)
+# -> денні лічильники post_daily_views (rollup_post_views)
+VIEW_EVENTS = {
+    'BACKEND': 'apps.main.services.RedisViewEventLog',
+    'OPTIONS': {
+        'location': REDIS_URL,
+    },
+    # Подій на один INSERT у журнал і на одну транзакцію згортання
+    'BATCH_SIZE': 5000,
+    'ROLLUP_BATCH_SIZE': 50000,
+    # Скільки днів журнал зберігає вже згорнуті події
+    'RETENTION_DAYS': 30,
+}
+
+# Трендові пости: score = (views * VIEW_WEIGHT + comments * COMMENT_WEIGHT + 1) / (age_hours + 2) ** GRAVITY
+TRENDING = {
+    'BACKEND': 'apps.main.services.RedisTrendingStore',
+    'OPTIONS': {
+        'location': REDIS_URL,
+    },
+    'WINDOW_DAYS': 14,
+    'TOP_N': 100,
+    'VIEW_WEIGHT': 1.0,
+    'COMMENT_WEIGHT': 5.0,
+    'GRAVITY': 1.5,
+}
+
+# Домашні стрічки підписок (fan-out on write, див. apps.main.services.TimelineService)
+TIMELINES = {
+    'BACKEND': 'apps.main.services.RedisTimelineStore',
+    'OPTIONS': {
+        'location': REDIS_URL,
+    },
+    # Скільки найновіших постів тримає стрічка кожного користувача
+    'MAX_LENGTH': 800,
+    # Стрічки неактивних користувачів зникають і будуються заново при читанні
+    'TTL': 60 * 60 * 24 * 14,
+    # Пости авторів з такою кількістю підписників не розсилаються, а підмішуються при читанні
+    'FANOUT_LIMIT': 10000,
+    # Скільки стрічок оновлюється одним pipeline
+    'BATCH_SIZE': 1000,
+}
+
+# Схожі пости (apps/main/related.py): повна збірка щоночі, між нею — лише нові пости
+RELATED_POSTS = {
+    # Вектори і idf для інкрементальних оновлень; потрібен лише воркеру черги related
+    'INDEX_PATH': config('RELATED_POSTS_INDEX', default=str(BASE_DIR / 'var' / 'related_posts.npz')),
+    'TOP_K': 8,
+    # Подібність постів з однієї категорії множиться на (1 + CATEGORY_BOOST)
+    'CATEGORY_BOOST': 0.25,
+    'MIN_SCORE': 0.05,
+    # Розмір простору хешованих термів
+    'N_FEATURES': 2 ** 20,
+    # Скільки найвагоміших термів лишається у векторі поста
+    'MAX_TERMS': 64,
+    'MIN_DF': 2,
+    # Терміни з більшої частки постів відкидаються як службові
+    'MAX_DF': 0.2,
+    'TITLE_WEIGHT': 3,
+    # Постів на одне читання з БД і на один блок добутку матриць
+    'BATCH_SIZE': 2000,
+    'BLOCK_SIZE': 1000,
+}
+
+# Зменшені варіанти зображень: генеруються задачею generate_image_renditions (черга images)
+# або manage.py generate_renditions; crop — обрізати до точного розміру, інакше вписати без збільшення
+IMAGE_RENDITIONS = {
+    'FORMATS': ('webp', 'jpeg'),
+    'QUALITY': 80,
+    # Процеси для manage.py generate_renditions
+    'PROCESSES': 2,
+    'FIELDS': {
+        'main.Post.image': {
+            'thumb': {'width': 480, 'height': 270, 'crop': True},
+            'large': {'width': 1280, 'height': 1280},
+        },
+        'accounts.User.avatar': {
+            'thumb': {'width': 96, 'height': 96, 'crop': True},
+            'large': {'width': 400, 'height': 400, 'crop': True},
+        },
+    },
+}
+
+# Масовий імпорт контенту (python manage.py import_content, POST /api/v1/posts/imports/)
+CONTENT_IMPORT = {
+    'CHUNK_SIZE': 1000,
+    # Скільки останніх помилок записів зберігати в ImportJob.errors
+    'MAX_ERRORS': 100,
+}
+
+# Повнотекстовий пошук (CONFIG має збігатися з конфігом у GeneratedField search_vector)
+# Запит, повторений CACHE_MIN_HITS разів за CACHE_TIMEOUT, кешує повний ранжований список id
+# (якщо збігів не більше CACHE_MAX_IDS); збереження постів і коментарів інвалідує кеш
+FULL_TEXT_SEARCH = {
+    'CONFIG': 'simple',
+    'CACHE_TIMEOUT': 300,
+    'CACHE_MIN_HITS': 2,
+    'CACHE_MAX_IDS': 10000,
+}
 
 # Celery Beat
 CELERY_BEAT_SCHEDULE = {
@@ -228,6 +442,30 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'apps.payment.tasks.retry_failed_webhook_events',
          'schedule': 3600.0,  # hour
      },
+     'flush-post-views': {
+         'task': 'apps.main.tasks.flush_post_views',
+         'schedule': 60.0,  # minute
+     },
+     'flush-view-events': {
+         'task': 'apps.main.tasks.flush_view_events',
+         'schedule': 60.0,  # minute
+     },
+     'rollup-post-views': {
+         'task': 'apps.main.tasks.rollup_post_views',
+         'schedule': 3600.0,  # hour
+     },
+     'update-trending-scores': {
+         'task': 'apps.main.tasks.update_trending_scores',
+         'schedule': 300.0,  # 5 minutes
+     },
+     'update-related-posts': {
+         'task': 'apps.main.tasks.update_related_posts',
+         'schedule': 900.0,  # 15 minutes
+     },
+     'rebuild-related-posts': {
+         'task': 'apps.main.tasks.rebuild_related_posts',
+         'schedule': crontab(hour=3, minute=0),  # nightly
+     },
  }
 
 CORS_ALLOWED_ORIGINS = [
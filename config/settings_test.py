@@ -2,4 +2,55 @@ from .settings import *
 
 # Все інше береться з .env автоматично
 EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
-CELERY_TASK_ALWAYS_EAGER = True
\ No newline at end of file
+CELERY_TASK_ALWAYS_EAGER = True
+
+# Друга локальна база замість репліки: тести маршрутизації бачать, звідки прочитані дані.
+# Маршрутизація вимкнена, поки тест не задасть DATABASE_ROUTING['REPLICAS']
+DATABASES = {
+    'default': DATABASES['default'],
+    'replica': {
+        **DATABASES['default'],
+        'ATOMIC_REQUESTS': False,
+        'TEST': {'NAME': f"test_{DATABASES['default']['NAME']}_replica"},
+    },
+}
+
+DATABASE_ROUTING = {
+    **DATABASE_ROUTING,
+    'REPLICAS': [],
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+VIEW_COUNTER = {
+    'BACKEND': 'apps.main.services.InMemoryViewBuffer',
+    'BATCH_SIZE': 1000,
+}
+
+VIEW_EVENTS = {
+    **VIEW_EVENTS,
+    'BACKEND': 'apps.main.services.InMemoryViewEventLog',
+    'OPTIONS': {},
+}
+
+TRENDING = {
+    **TRENDING,
+    'BACKEND': 'apps.main.services.InMemoryTrendingStore',
+    'OPTIONS': {},
+}
+
+TIMELINES = {
+    **TIMELINES,
+    'BACKEND': 'apps.main.services.InMemoryTimelineStore',
+    'OPTIONS': {},
+}
+
+RELATED_POSTS = {
+    **RELATED_POSTS,
+    'MIN_DF': 1,
+    'MAX_DF': 1.0,
+}
@@ -12,5 +12,7 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Режим сервера визначає точка входу, а не оточення: settings за ним вибирають CONN_MAX_AGE
+os.environ['SERVER_MODE'] = 'wsgi'
 
 application = get_wsgi_application()
@@ -6,6 +6,45 @@ from apps.subscribe.models import SubscriptionPlan, Subscription
 from django.utils import timezone
 from datetime import timedelta
 
+@pytest.fixture(autouse=True)
+def view_buffer():
+    from apps.main.services import get_view_buffer
+    buffer = get_view_buffer()
+    buffer.drain()
+    yield buffer
+    buffer.drain()
+
+@pytest.fixture(autouse=True)
+def view_event_log():
+    from apps.main.services import get_view_event_log
+    log = get_view_event_log()
+    log.drain(10 ** 9)
+    yield log
+    log.drain(10 ** 9)
+
+@pytest.fixture(autouse=True)
+def trending_store():
+    from apps.main.services import get_trending_store
+    store = get_trending_store()
+    store.replace({})
+    yield store
+    store.replace({})
+
+@pytest.fixture(autouse=True)
+def timeline_store():
+    from apps.main.services import get_timeline_store
+    store = get_timeline_store()
+    store.clear()
+    yield store
+    store.clear()
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+    cache.clear()
+    yield
+    cache.clear()
+
 @pytest.fixture
 def api_client():
     return APIClient()
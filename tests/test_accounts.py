@@ -70,6 +70,15 @@ class TestProfile:
         response = api_client.get(url)
         assert response.status_code == 401
 
+    def test_profile_not_modified(self, auth_client, user):
+        url = reverse('profile')
+        etag = auth_client.get(url)['ETag']
+        assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        user.bio = 'Updated bio'
+        user.save()
+        assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
 @pytest.mark.django_db
 class TestChangePassword:
     def test_change_password_success(self, auth_client):
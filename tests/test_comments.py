@@ -41,10 +41,56 @@ class TestComments:
         comment.refresh_from_db()
         assert comment.is_active == False
 
-    # def test_get_post_comments(self, api_client, post, user):
-    #     Comment.objects.create(post=post, author=user, content='Comment 1')
-    #     Comment.objects.create(post=post, author=user, content='Comment 2')
-    #     url = reverse('post-comments', kwargs={'post_id': post.id})
-    #     response = api_client.get(url)
-    #     assert response.status_code == 200
-    #     assert len(response.data['comments']) == 2
\ No newline at end of file
+    def test_get_post_comments(self, api_client, post, user):
+        Comment.objects.create(post=post, author=user, content='Comment 1')
+        Comment.objects.create(post=post, author=user, content='Comment 2')
+        url = reverse('post-comments', kwargs={'post_id': post.id})
+        response = api_client.get(url)
+        assert response.status_code == 200
+        assert len(response.data['comments']) == 2
+
+    def test_post_comments_tree(self, api_client, post, user):
+        parent = Comment.objects.create(post=post, author=user, content='Parent')
+        Comment.objects.create(post=post, author=user, parent=parent, content='Reply 1')
+        Comment.objects.create(post=post, author=user, parent=parent, content='Reply 2')
+        Comment.objects.create(post=post, author=user, parent=parent, content='Hidden', is_active=False)
+
+        response = api_client.get(reverse('post-comments', kwargs={'post_id': post.id}))
+        assert response.status_code == 200
+        assert response.data['comments_count'] == 3
+        [comment] = response.data['comments']
+        assert comment['replies_count'] == 2
+        assert [reply['content'] for reply in comment['replies']] == ['Reply 1', 'Reply 2']
+        assert all(reply['replies_count'] == 0 for reply in comment['replies'])
+
+    def test_search_comments(self, api_client, post, user):
+        Comment.objects.create(post=post, author=user, content='Great article about databases')
+        Comment.objects.create(post=post, author=user, content='Nice')
+        url = reverse('comment-list')
+        response = api_client.get(url, {'search': 'databases'})
+        assert response.status_code == 200
+        assert [c['content'] for c in response.data['results']] == ['Great article about databases']
+
+    def test_repeated_search_sees_new_comments(self, api_client, post, user, django_capture_on_commit_callbacks):
+        Comment.objects.create(post=post, author=user, content='Indexes explained')
+        url = reverse('comment-list')
+        for _ in range(3):
+            api_client.get(url, {'search': 'indexes'})
+        with django_capture_on_commit_callbacks(execute=True):
+            Comment.objects.create(post=post, author=user, content='More on indexes')
+        response = api_client.get(url, {'search': 'indexes'})
+        assert response.data['count'] == 2
+
+    def test_sparse_fields(self, api_client, post, user):
+        parent = Comment.objects.create(post=post, author=user, content='Parent')
+        Comment.objects.create(post=post, author=user, parent=parent, content='Reply')
+
+        response = api_client.get(reverse('comment-list'), {'fields': 'id,is_reply'})
+        assert response.status_code == 200
+        assert all(set(c) == {'id', 'is_reply'} for c in response.data['results'])
+
+        url = reverse('comment-detail', kwargs={'pk': parent.id})
+        response = api_client.get(url, {'omit': 'author_info'})
+        assert response.status_code == 200
+        assert 'author_info' not in response.data
+        assert [reply['content'] for reply in response.data['replies']] == ['Reply']
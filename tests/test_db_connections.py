@@ -0,0 +1,119 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings as django_settings
+from django.db import connections
+
+from apps.core.postgresql.base import DatabaseWrapper
+from apps.core.postgresql.metrics import connection_acquired, connection_stats
+
+
+@pytest.fixture
+def fresh_connection(db):
+    # Окреме з'єднання з тестовою базою: з'єднання тесту тримає транзакцію і закривати його не можна
+    connection = connections.create_connection('default')
+    yield connection
+    connection.close()
+
+
+class TestConnectionMetrics:
+
+    def test_new_connection_is_counted(self, fresh_connection):
+        events = []
+
+        def on_acquired(sender, alias, seconds, pooled, **kwargs):
+            events.append((alias, seconds, pooled))
+
+        before = connection_stats().get('default', {'acquired': 0, 'created': 0, 'in_use': 0})
+        connection_acquired.connect(on_acquired)
+        try:
+            fresh_connection.ensure_connection()
+        finally:
+            connection_acquired.disconnect(on_acquired)
+
+        stats = connection_stats()['default']
+        assert stats['acquired'] == before['acquired'] + 1
+        assert stats['created'] == before['created'] + 1
+        assert stats['in_use'] == before['in_use'] + 1
+        assert stats['pool'] is None
+        [(alias, seconds, pooled)] = events
+        assert alias == 'default' and seconds > 0 and pooled is False
+
+        fresh_connection.close()
+        assert connection_stats()['default']['in_use'] == before['in_use']
+
+    def test_persistent_connection_is_reused(self, fresh_connection):
+        assert fresh_connection.settings_dict['CONN_MAX_AGE'] > 0
+        assert fresh_connection.settings_dict['CONN_HEALTH_CHECKS']
+        fresh_connection.ensure_connection()
+        acquired = connection_stats()['default']['acquired']
+
+        fresh_connection.close_if_unusable_or_obsolete()
+        fresh_connection.ensure_connection()
+        assert connection_stats()['default']['acquired'] == acquired
+
+    def test_pooled_connection_is_reused(self, db):
+        settings_dict = connections['default'].settings_dict
+        wrapper = DatabaseWrapper({
+            **settings_dict,
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {**settings_dict.get('OPTIONS', {}), 'pool': {'min_size': 1, 'max_size': 1, 'timeout': 5}},
+        }, 'default')
+        # Той самий аліас, що й у з'єднання тесту: django.contrib.postgres читає OID типів через connections[alias].
+        # Пул з'єднання тесту не зачіпає — без OPTIONS['pool'] воно пулу не бачить
+        assert connections['default'].pool is None
+        events = []
+
+        def on_acquired(sender, alias, seconds, pooled, **kwargs):
+            events.append((alias, pooled))
+
+        connection_acquired.connect(on_acquired)
+        try:
+            for _ in range(2):
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    assert cursor.fetchone() == (1,)
+                wrapper.close()
+            stats = wrapper.pool.get_stats()
+        finally:
+            connection_acquired.disconnect(on_acquired)
+            wrapper.close_pool()
+
+        assert events == [('default', True), ('default', True)]
+        # Обидва запити обслужило одне з'єднання пулу
+        assert stats['connections_num'] == 1
+        assert stats['requests_num'] == 2
+
+    def test_pool_inherited_from_parent_process_is_dropped(self, settings):
+        wrapper = DatabaseWrapper({**connections['default'].settings_dict}, 'forked')
+        inherited = object()
+        DatabaseWrapper._connection_pools['forked'] = inherited
+        DatabaseWrapper._pool_pids['forked'] = os.getpid() + 1
+        try:
+            # Пул батьківського процесу не використовується і не закривається з дочірнього
+            assert wrapper.pool is None
+            assert 'forked' not in DatabaseWrapper._connection_pools
+        finally:
+            DatabaseWrapper._connection_pools.pop('forked', None)
+            DatabaseWrapper._pool_pids.pop('forked', None)
+
+
+class TestServerMode:
+
+    @pytest.mark.parametrize('entry_point, persistent', [('config.asgi', False), ('config.wsgi', True)])
+    def test_entry_point_sets_connection_lifetime(self, entry_point, persistent):
+        # Без SERVER_MODE в оточенні (uvicorn/daphne напряму, а не через gunicorn.conf.py)
+        env = {key: value for key, value in os.environ.items() if key not in ('SERVER_MODE', 'DB_POOL')}
+        env['DJANGO_SETTINGS_MODULE'] = 'config.settings'
+        code = (
+            f'import {entry_point}; from django.conf import settings; '
+            "print(settings.SERVER_MODE, settings.DATABASES['default']['CONN_MAX_AGE'])"
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code], env=env, cwd=django_settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        assert output[0] == entry_point.split('.')[-1]
+        assert (int(output[1]) > 0) is persistent
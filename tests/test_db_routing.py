@@ -0,0 +1,78 @@
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.comments.models import Comment
+from apps.core.routers import PrimaryReplicaRouter, RequestRouting, _request_routing, is_sticky
+from apps.main.models import Post
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASE_ROUTING = {**settings.DATABASE_ROUTING, 'REPLICAS': ['replica']}
+    return connections['replica']
+
+
+@pytest.fixture
+def jwt_client(api_client, user):
+    # Липкість визначається за JWT із заголовка, тож force_authenticate тут не підходить
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return api_client
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+class TestReplicaRouting:
+    '''Репліка — окрема порожня тестова база: записане в primary на ній не видно'''
+
+    def test_lists_read_from_replica(self, api_client, post, replica):
+        with CaptureQueriesContext(replica) as ctx:
+            response = api_client.get(reverse('post-list'))
+        assert response.status_code == 200
+        assert response.data['count'] == 0
+        assert ctx.captured_queries
+
+        # Async-в'юшка: запити в потоках sync_to_async теж ідуть на репліку
+        assert api_client.get(reverse('post-comments', kwargs={'post_id': post.id})).status_code == 404
+
+    def test_without_replicas_everything_reads_primary(self, api_client, post):
+        assert api_client.get(reverse('post-list')).data['count'] == 1
+
+    def test_other_views_stay_on_primary(self, jwt_client, post, replica):
+        with CaptureQueriesContext(replica) as ctx:
+            assert jwt_client.get(reverse('post-detail', kwargs={'slug': post.slug})).status_code == 200
+            assert jwt_client.get(reverse('payment-history')).status_code == 200
+            assert jwt_client.get(reverse('profile')).status_code == 200
+        assert not ctx.captured_queries
+
+    def test_authentication_reads_primary(self, jwt_client, replica):
+        # Користувача на репліці немає, але токен приймається
+        assert jwt_client.get(reverse('post-list')).status_code == 200
+
+    def test_read_your_writes(self, api_client, jwt_client, user, post, replica):
+        response = jwt_client.post(reverse('comment-list'), {'post': post.id, 'content': 'Fresh'})
+        assert response.status_code == 201
+        assert Comment.objects.using('default').filter(content='Fresh').exists()
+        assert is_sticky(user.pk)
+
+        # Автор одразу бачить свій коментар з primary, анонім читає з репліки
+        assert jwt_client.get(reverse('comment-list')).data['count'] == 1
+        anonymous = type(api_client)()
+        assert anonymous.get(reverse('comment-list')).data['count'] == 0
+
+        cache.clear()
+        assert jwt_client.get(reverse('comment-list')).data['count'] == 0
+
+    def test_router_outside_requests(self, replica):
+        router = PrimaryReplicaRouter()
+        # Celery, команди: без маршрутизації запиту — primary
+        assert router.db_for_read(Post) is None
+
+        token = _request_routing.set(RequestRouting())
+        try:
+            _request_routing.get().read_alias = 'replica'
+            assert router.db_for_read(Post) == 'replica'
+            assert router.db_for_write(Post) == 'default'
+        finally:
+            _request_routing.reset(token)
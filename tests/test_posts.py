@@ -1,6 +1,16 @@
+import json
+import re
 import pytest
+from io import StringIO
 from django.urls import reverse
-from apps.main.models import Post
+from django.db import connection
+from django.core.cache import cache
+from django.test.utils import CaptureQueriesContext
+from datetime import timedelta
+from django.utils import timezone
+from apps.main.models import Category, Post
+from apps.main.tasks import flush_post_views, flush_view_events, rollup_post_views, update_trending_scores
+from apps.main.services import TrendingService, ViewCounterService, ViewStatsService
 
 @pytest.mark.django_db
 class TestPostList:
@@ -67,6 +77,7 @@ class TestPostDetail:
     def test_views_increment(self, api_client, post):
         url = reverse('post-detail', kwargs={'slug': post.slug})
         api_client.get(url)
+        flush_post_views()
         post.refresh_from_db()
         assert post.views_count == 1
 
@@ -79,4 +90,1536 @@ class TestPostDetail:
         api_client.force_authenticate(user=user2)
         url = reverse('post-detail', kwargs={'slug': post.slug})
         response = api_client.delete(url)
-        assert response.status_code == 403
\ No newline at end of file
+        assert response.status_code == 403
+
+@pytest.mark.django_db
+class TestViewCounter:
+    def test_retrieve_does_not_write(self, api_client, post, view_buffer):
+        url = reverse('post-detail', kwargs={'slug': post.slug})
+        with CaptureQueriesContext(connection) as ctx:
+            api_client.get(url)
+        assert not any(q['sql'].startswith(('UPDATE', 'INSERT')) for q in ctx.captured_queries)
+        post.refresh_from_db()
+        assert post.views_count == 0
+        assert view_buffer.pending(post.id) == 1
+
+    def test_flush_aggregates_views(self, api_client, post, user, category):
+        other = Post.objects.create(title='Other', content='...', author=user, category=category)
+        for _ in range(3):
+            api_client.get(reverse('post-detail', kwargs={'slug': post.slug}))
+        api_client.get(reverse('post-detail', kwargs={'slug': other.slug}))
+
+        result = flush_post_views()
+
+        assert result == {'flushed_posts': 2, 'flushed_views': 4}
+        post.refresh_from_db()
+        other.refresh_from_db()
+        assert post.views_count == 3
+        assert other.views_count == 1
+        assert flush_post_views() == {'flushed_posts': 0, 'flushed_views': 0}
+
+    def test_async_detail_records_views_off_the_event_loop(self, api_client, post, monkeypatch):
+        import asyncio
+        calls = []
+
+        def record_view(post_id):
+            try:
+                asyncio.get_running_loop()
+                calls.append('event loop')
+            except RuntimeError:
+                calls.append('thread')
+        monkeypatch.setattr(ViewCounterService, 'record_view', staticmethod(record_view))
+
+        url = reverse('post-detail', kwargs={'slug': post.slug})
+        etag = api_client.get(url)['ETag']
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert calls == ['thread', 'thread']
+
+    def test_redis_backends_share_one_pipeline(self, monkeypatch):
+        import redis.client
+        from apps.main import services
+        location = 'redis://localhost:6379/15'
+        monkeypatch.setattr(services, '_view_buffer', services.RedisViewBuffer(location=location))
+        monkeypatch.setattr(services, '_view_event_log', services.RedisViewEventLog(location=location))
+        executed = []
+        # Команда поза pipeline пішла б у Redis окремо (і впала б без сервера)
+        monkeypatch.setattr(redis.client.Pipeline, 'execute', lambda pipe, raise_on_error=True: executed.append(
+            [args[0] for args, _ in pipe.command_stack]
+        ))
+
+        ViewCounterService.record_view(7)
+        assert executed == [['HINCRBY', 'RPUSH']]
+
+    def test_flush_restores_deltas_on_error(self, post, view_buffer, monkeypatch):
+        view_buffer.record(post.id, 5)
+
+        def broken_update(*args, **kwargs):
+            raise RuntimeError('db is down')
+        monkeypatch.setattr('django.db.models.query.QuerySet.update', broken_update)
+
+        with pytest.raises(RuntimeError):
+            flush_post_views()
+        assert view_buffer.pending(post.id) == 5
+
+
+@pytest.mark.django_db
+class TestTrending:
+    def make_post(self, user, category, title, views=0, age_days=0):
+        post = Post.objects.create(title=title, content='...', author=user, category=category, status='published')
+        Post.objects.filter(pk=post.pk).update(
+            views_count=views,
+            created_at=post.created_at - timedelta(days=age_days),
+        )
+        return post
+
+    def test_scores_decay_with_age(self):
+        scores = TrendingService.compute_scores([100, 100, 10], [0, 0, 0], [1, 48, 1])
+        assert scores[0] > scores[1]
+        assert scores[2] > scores[1]
+
+    def test_fresh_posts_outrank_old_viral(self, api_client, user, category):
+        old = self.make_post(user, category, 'Old viral', views=500, age_days=10)
+        fresh = self.make_post(user, category, 'Fresh', views=50)
+        expired = self.make_post(user, category, 'Ancient', views=10000, age_days=60)
+
+        result = update_trending_scores()
+        assert result['scored_posts'] == 2
+
+        ids = [item['id'] for item in api_client.get(reverse('popular-posts')).data]
+        assert ids == [fresh.id, old.id]
+        assert expired.id not in ids
+
+    def test_category_scope(self, api_client, user, category):
+        other_category = Category.objects.create(name='Other', slug='other')
+        in_category = self.make_post(user, category, 'In category', views=5)
+        self.make_post(user, other_category, 'Elsewhere', views=50)
+        update_trending_scores()
+
+        response = api_client.get(reverse('popular-posts'), {'category': category.id})
+        assert [item['id'] for item in response.data] == [in_category.id]
+        assert api_client.get(reverse('popular-posts'), {'category': 'x'}).status_code == 400
+
+    def test_fallback_before_first_rebuild(self, api_client, user, category):
+        low = self.make_post(user, category, 'Low', views=1)
+        high = self.make_post(user, category, 'High', views=10, age_days=30)
+        ids = [item['id'] for item in api_client.get(reverse('popular-posts')).data]
+        assert ids == [high.id, low.id]
+
+    def test_featured_reads_trending(self, api_client, user, category, active_subscription):
+        from apps.subscribe.models import PinnedPost
+        pinned = self.make_post(user, category, 'Pinned', views=1000)
+        trending = self.make_post(user, category, 'Trending', views=10)
+        PinnedPost.objects.create(user=user, post=pinned)
+        update_trending_scores()
+
+        response = api_client.get(reverse('featured-posts'))
+        assert [item['id'] for item in response.data['pinned_posts']] == [pinned.id]
+        assert [item['id'] for item in response.data['popular_posts']] == [trending.id]
+
+    def test_unpublished_posts_are_skipped(self, api_client, user, category):
+        post = self.make_post(user, category, 'Soon hidden', views=10)
+        update_trending_scores()
+        Post.objects.filter(pk=post.pk).update(status='draft')
+        cache.clear()
+        assert api_client.get(reverse('popular-posts')).data == []
+
+
+@pytest.mark.django_db
+class TestViewStats:
+    def log_views(self, view_event_log, post, days_ago, count):
+        timestamp = int((timezone.now() - timedelta(days=days_ago)).timestamp())
+        for _ in range(count):
+            view_event_log.append(post.id, timestamp)
+
+    def test_aggregate_by_post_and_day(self):
+        day = 86400
+        post_ids, days, counts = ViewStatsService.aggregate(
+            [1, 2, 1, 1, 2], [day * 3, day * 3 + 10, day * 3 + 500, day * 4, day * 3]
+        )
+        assert list(zip(post_ids.tolist(), days.tolist(), counts.tolist())) == [(1, 3, 2), (1, 4, 1), (2, 3, 2)]
+
+    def test_views_reach_daily_buckets(self, api_client, post, view_event_log):
+        from apps.main.models import PostDailyViews, PostViewEvent
+        with CaptureQueriesContext(connection) as ctx:
+            api_client.get(reverse('post-detail', kwargs={'slug': post.slug}))
+        assert not any(q['sql'].startswith('INSERT') for q in ctx.captured_queries)
+
+        self.log_views(view_event_log, post, 2, 3)
+        assert flush_view_events() == {'flushed_events': 4}
+        assert PostViewEvent.objects.count() == 4
+
+        result = rollup_post_views()
+        assert result['rolled_up_events'] == 4
+        today = timezone.now().date()
+        assert dict(PostDailyViews.objects.values_list('day', 'views')) == {today: 1, today - timedelta(days=2): 3}
+
+        # Повторне згортання не рахує ті самі події вдруге, нові додаються до лічильника
+        assert rollup_post_views()['rolled_up_events'] == 0
+        self.log_views(view_event_log, post, 0, 2)
+        flush_view_events()
+        rollup_post_views()
+        assert PostDailyViews.objects.get(post=post, day=today).views == 3
+
+    def test_rollup_in_batches_skips_deleted_posts(self, post, user, category, view_event_log):
+        from apps.main.models import PostDailyViews
+        removed = Post.objects.create(title='Removed', content='...', author=user, category=category, status='published')
+        self.log_views(view_event_log, post, 0, 5)
+        self.log_views(view_event_log, removed, 0, 2)
+        flush_view_events()
+        removed.delete()
+
+        result = ViewStatsService.rollup(batch_size=2)
+        assert result['rolled_up_events'] == 7
+        assert list(PostDailyViews.objects.values_list('post_id', 'views')) == [(post.id, 5)]
+
+    def test_flush_restores_events_on_error(self, post, view_event_log, monkeypatch):
+        self.log_views(view_event_log, post, 0, 2)
+
+        def broken_bulk_create(*args, **kwargs):
+            raise RuntimeError('db is down')
+        monkeypatch.setattr('django.db.models.query.QuerySet.bulk_create', broken_bulk_create)
+
+        with pytest.raises(RuntimeError):
+            flush_view_events()
+        assert len(view_event_log.drain(10)) == 2
+
+    def test_purge_keeps_events_not_rolled_up(self, post, view_event_log, settings):
+        from apps.main.models import PostViewEvent
+        settings.VIEW_EVENTS = {**settings.VIEW_EVENTS, 'RETENTION_DAYS': 30}
+        self.log_views(view_event_log, post, 40, 2)
+        self.log_views(view_event_log, post, 1, 1)
+        flush_view_events()
+        assert ViewStatsService.purge() == 0
+
+        assert rollup_post_views()['purged_events'] == 2
+        assert PostViewEvent.objects.count() == 1
+
+    def test_stats_series(self, auth_client, post, view_event_log):
+        self.log_views(view_event_log, post, 0, 4)
+        self.log_views(view_event_log, post, 2, 1)
+        self.log_views(view_event_log, post, 10, 7)
+        flush_view_events()
+        rollup_post_views()
+
+        url = reverse('post-stats', kwargs={'slug': post.slug})
+        with CaptureQueriesContext(connection) as ctx:
+            response = auth_client.get(url, {'days': 3})
+        assert response.status_code == 200
+        assert not any('post_view_events' in q['sql'] for q in ctx.captured_queries)
+        assert [item['views'] for item in response.data['series']] == [1, 0, 4]
+        assert response.json()['series'][-1]['day'] == timezone.now().date().isoformat()
+        assert response.data['total_views'] == 5
+
+        assert len(auth_client.get(url).data['series']) == 30
+        assert auth_client.get(url, {'days': 0}).status_code == 400
+        assert auth_client.get(url, {'days': 'week'}).status_code == 400
+
+    def test_stats_only_for_author(self, api_client, post, user2):
+        url = reverse('post-stats', kwargs={'slug': post.slug})
+        assert api_client.get(url).status_code == 401
+        api_client.force_authenticate(user=user2)
+        assert api_client.get(url).status_code == 404
+
+    def test_featured_fallback_uses_recent_views(self, api_client, user, category, view_event_log):
+        old_hit = Post.objects.create(title='Old hit', content='...', author=user, category=category, status='published')
+        Post.objects.filter(pk=old_hit.pk).update(views_count=1000)
+        Post.objects.filter(pk=old_hit.pk).update(created_at=old_hit.created_at - timedelta(days=60))
+        recent = Post.objects.create(title='Read this week', content='...', author=user, category=category, status='published')
+        self.log_views(view_event_log, old_hit, 2, 5)
+        self.log_views(view_event_log, recent, 1, 1)
+        self.log_views(view_event_log, recent, 20, 50)
+        flush_view_events()
+        rollup_post_views()
+
+        response = api_client.get(reverse('featured-posts'))
+        assert [item['id'] for item in response.data['popular_posts']] == [old_hit.id, recent.id]
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    def test_post_detail_not_modified(self, api_client, post, view_buffer):
+        url = reverse('post-detail', kwargs={'slug': post.slug})
+        response = api_client.get(url)
+        assert response.status_code == 200
+        etag = response['ETag']
+        assert response['Last-Modified']
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        # Лише валідатор, без вибірки content
+        selects = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        assert len(selects) == 1
+        assert '"content"' not in selects[0]
+        # Перегляд зараховано, але валідатор не змінився
+        assert view_buffer.pending(post.id) == 2
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    def test_post_detail_changes_after_update(self, api_client, post, user):
+        url = reverse('post-detail', kwargs={'slug': post.slug})
+        etag = api_client.get(url)['ETag']
+
+        post.title = 'Changed'
+        post.save()
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+        etag = api_client.get(url)['ETag']
+        flush_post_views()
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_post_detail_etag_follows_author_subscription(self, api_client, post, user, active_subscription):
+        url = reverse('post-detail', kwargs={'slug': post.slug})
+        api_client.force_authenticate(user=user)
+        response = api_client.get(url)
+        assert response.data['can_pin'] is True
+
+        active_subscription.expire()
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == 200
+        assert response.data['can_pin'] is False
+
+    def test_post_detail_if_modified_since(self, api_client, post):
+        url = reverse('post-detail', kwargs={'slug': post.slug})
+        last_modified = api_client.get(url)['Last-Modified']
+        assert api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+    def test_post_list_etag(self, api_client, post, user, category, django_capture_on_commit_callbacks):
+        from apps.comments.models import Comment
+        url = reverse('post-list')
+        etag = api_client.get(url)['ETag']
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        # Інші параметри фільтра — інший валідатор
+        assert api_client.get(url, {'category': category.id}, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Comment.objects.create(post=post, author=user, content='New comment')
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+        etag = api_client.get(url)['ETag']
+        Post.objects.create(title='Another', content='...', author=user, category=category)
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_post_list_validator_reads_only_the_page(self, api_client, post):
+        url = reverse('post-list')
+        etag = api_client.get(url, {'cursor': ''})['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(url, {'cursor': ''}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        posts_queries = [q['sql'] for q in ctx.captured_queries if '"posts"' in q['sql']]
+        # Лише закріплені і сама сторінка, без COUNT/MAX/SUM по всій стрічці
+        assert len(posts_queries) == 2
+        for sql in posts_queries:
+            assert 'LIMIT' in sql
+            assert not re.search(r'\b(COUNT|MAX|SUM)\((\*\) AS "__count" FROM "posts"|"posts"\.)', sql)
+
+    def test_post_list_etag_follows_views(self, api_client, post):
+        url = reverse('post-list')
+        etag = api_client.get(url)['ETag']
+        Post.objects.filter(pk=post.pk).update(views_count=100)
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_post_list_etag_depends_on_user(self, api_client, post, user):
+        url = reverse('post-list')
+        etag = api_client.get(url)['ETag']
+        api_client.force_authenticate(user=user)
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_category_detail(self, api_client, category, user):
+        url = reverse('category-detail', kwargs={'slug': category.slug})
+        etag = api_client.get(url)['ETag']
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        Post.objects.create(title='In category', content='...', author=user, category=category)
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_missing_post_is_404(self, api_client):
+        url = reverse('post-detail', kwargs={'slug': 'missing'})
+        assert api_client.get(url, HTTP_IF_NONE_MATCH='"abc"').status_code == 404
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    def test_list_fields(self, api_client, post):
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(reverse('post-list'), {'fields': 'id,title,slug,created_at'})
+        assert response.status_code == 200
+        assert set(response.data['results'][0]) == {'id', 'title', 'slug', 'created_at'}
+        # Ні content, ні join-ів на автора і категорію
+        page_query = [q['sql'] for q in ctx.captured_queries if '"posts"."title"' in q['sql']][-1]
+        assert '"posts"."content"' not in page_query
+        assert '"categories"' not in page_query
+
+    def test_list_omit(self, api_client, post):
+        response = api_client.get(reverse('post-list'), {'omit': 'content,pinned_info'})
+        item = response.data['results'][0]
+        assert 'content' not in item and 'pinned_info' not in item
+        assert item['author'] == str(post.author)
+        assert item['category'] == post.category.name
+
+    def test_detail_skips_method_fields(self, api_client, post, monkeypatch):
+        from apps.main.serializers import PostDetailSerializer
+
+        def fail(*args, **kwargs):
+            raise AssertionError('must not be called')
+        monkeypatch.setattr(PostDetailSerializer, 'get_can_pin', fail)
+        monkeypatch.setattr(PostDetailSerializer, 'get_author_info', fail)
+
+        url = reverse('post-detail', kwargs={'slug': post.slug})
+        response = api_client.get(url, {'fields': 'id,title,category_info'})
+        assert response.status_code == 200
+        assert response.data == {
+            'id': post.id,
+            'title': post.title,
+            'category_info': {'id': post.category.id, 'name': post.category.name, 'slug': post.category.slug},
+        }
+
+    def test_full_response_unchanged(self, api_client, post):
+        full = api_client.get(reverse('post-list')).data['results'][0]
+        assert 'content' in full and 'pinned_info' in full
+
+    def test_function_views(self, api_client, post):
+        response = api_client.get(reverse('recent-posts'), {'fields': 'id,slug'})
+        assert response.data == [{'id': post.id, 'slug': post.slug}]
+
+
+@pytest.mark.django_db
+class TestExcerpt:
+    def test_excerpt_on_save(self, user, category):
+        post = Post.objects.create(title='Long', content='x' * 500, author=user, category=category)
+        assert post.excerpt == 'x' * 200 + '...'
+
+        post.content = 'short'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        assert post.excerpt == 'short'
+
+    def test_list_reads_excerpt(self, api_client, user, category):
+        Post.objects.create(title='Long', content='y' * 5000, author=user, category=category)
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(reverse('post-list'))
+        assert response.data['results'][0]['content'] == 'y' * 200 + '...'
+        page_query = [q['sql'] for q in ctx.captured_queries if '"posts"."excerpt"' in q['sql']][-1]
+        assert '"posts"."content"' not in page_query
+        assert '"posts"."search_vector"' not in page_query
+
+    def test_detail_has_full_content(self, api_client, user, category):
+        post = Post.objects.create(title='Long', content='z' * 500, author=user, category=category)
+        response = api_client.get(reverse('post-detail', kwargs={'slug': post.slug}))
+        assert response.data['content'] == 'z' * 500
+
+    def test_backfill_command(self, user, category):
+        from django.core.management import call_command
+        long_post = Post.objects.create(title='Long', content='a' * 300, author=user, category=category)
+        short_post = Post.objects.create(title='Short', content='b' * 10, author=user, category=category)
+        Post.objects.update(excerpt='')
+
+        call_command('backfill_post_excerpts', batch_size=1, stdout=StringIO())
+
+        long_post.refresh_from_db()
+        short_post.refresh_from_db()
+        assert long_post.excerpt == Post.make_excerpt(long_post.content)
+        assert short_post.excerpt == 'b' * 10
+
+
+def render_both(serializer_class, instances, request):
+    '''JSON швидкого шляху і стандартного ModelSerializer.to_representation'''
+    from rest_framework import serializers
+    from rest_framework.renderers import JSONRenderer
+
+    fast = serializer_class(instances, many=True, context={'request': request}).data
+    child = serializer_class(context={'request': request})
+    slow = [serializers.ModelSerializer.to_representation(child, instance) for instance in instances]
+    return JSONRenderer().render(fast), JSONRenderer().render(slow)
+
+
+@pytest.mark.django_db
+class TestCompiledSerializers:
+    @pytest.fixture
+    def feed(self, user, user2, category, active_subscription):
+        from apps.comments.models import Comment
+        from apps.subscribe.models import PinnedPost
+
+        pinned = Post.objects.create(title='Pinned', content='p' * 300, author=user, category=category, image='posts/a.jpg')
+        PinnedPost.objects.create(user=user, post=pinned)
+        no_category = Post.objects.create(title='No category', content='short', author=user2)
+        draft = Post.objects.create(title='Draft', content='d', author=user, category=category, status='draft')
+        Comment.objects.create(post=no_category, author=user2, content='c')
+        return [pinned, no_category, draft]
+
+    def make_request(self, params=None):
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+        return Request(APIRequestFactory().get('/api/v1/posts/', params or {}))
+
+    @pytest.mark.parametrize('params', [{}, {'fields': 'id,title,author,image'}, {'omit': 'pinned_info'}])
+    def test_post_list_equivalence(self, feed, params):
+        from apps.main.serializers import PostListSerializer
+        request = self.make_request(params)
+        posts = list(PostListSerializer.sparse_queryset(Post.objects.for_list(), request))
+        fast, slow = render_both(PostListSerializer, posts, request)
+        assert fast == slow
+
+    def test_active_timezone(self, feed):
+        from django.utils import timezone
+        from apps.main.serializers import PostListSerializer
+        request = self.make_request()
+        with timezone.override('Europe/Kyiv'):
+            fast, slow = render_both(PostListSerializer, list(Post.objects.for_list()), request)
+        assert fast == slow
+        assert b'+0' in fast
+
+    def test_without_annotations(self, feed):
+        from apps.main.serializers import PostListSerializer
+        request = self.make_request()
+        fast, slow = render_both(PostListSerializer, list(Post.objects.all()), request)
+        assert fast == slow
+
+    def test_comment_equivalence(self, feed, user):
+        from apps.comments.models import Comment
+        from apps.comments.serializers import CommentSerializer
+        user.avatar = 'avatars/me.png'
+        user.save()
+        Comment.objects.create(post=feed[0], author=user, content='with avatar', parent=Comment.objects.first())
+        request = self.make_request()
+        fast, slow = render_both(CommentSerializer, list(Comment.objects.select_related('author')), request)
+        assert fast == slow
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    @pytest.fixture
+    def many_posts(self, user, category):
+        return [
+            Post.objects.create(title=f'Post {i}', content='...', author=user, category=category, views_count=i % 3)
+            for i in range(45)
+        ]
+
+    def walk(self, client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            assert 'count' not in response.data
+            ids.extend(post['id'] for post in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_page_number_mode_is_default(self, api_client, many_posts):
+        response = api_client.get(reverse('post-list'))
+        assert response.data['count'] == 45
+
+    def test_walk_forward_by_created_at(self, api_client, many_posts):
+        ids = self.walk(api_client, reverse('post-list') + '?cursor=')
+        expected = list(Post.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        assert ids == expected
+
+    def test_walk_with_ordering_filter_and_ties(self, api_client, many_posts):
+        ids = self.walk(api_client, reverse('post-list') + '?cursor=&ordering=views_count')
+        expected = list(Post.objects.order_by('views_count', 'id').values_list('id', flat=True))
+        assert ids == expected
+
+    def test_previous_returns_same_page(self, api_client, many_posts):
+        first = api_client.get(reverse('post-list') + '?cursor=')
+        second = api_client.get(first.data['next'])
+        assert first.data['previous'] is None
+        back = api_client.get(second.data['previous'])
+        assert [p['id'] for p in back.data['results']] == [p['id'] for p in first.data['results']]
+
+    def test_cursor_from_other_ordering_rejected(self, api_client, many_posts):
+        first = api_client.get(reverse('post-list') + '?cursor=')
+        response = api_client.get(first.data['next'] + '&ordering=views_count')
+        assert response.status_code == 404
+
+    def test_invalid_cursor(self, api_client, many_posts):
+        response = api_client.get(reverse('post-list') + '?cursor=garbage')
+        assert response.status_code == 404
+
+    def test_own_drafts_merged_into_feed(self, api_client, user, user2, category, many_posts):
+        from django.db.models import Q
+        for i in range(30):
+            Post.objects.create(title=f'Draft {i}', content='...', author=user2 if i % 3 else user,
+                                category=category, status='draft')
+        api_client.force_authenticate(user=user2)
+        expected = list(
+            Post.objects.filter(Q(status='published') | Q(author=user2))
+            .order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+        assert self.walk(api_client, reverse('post-list') + '?cursor=') == expected
+
+        last = api_client.get(reverse('post-list') + '?cursor=')
+        while last.data['next']:
+            last = api_client.get(last.data['next'])
+        start = expected.index(last.data['results'][0]['id'])
+        back = api_client.get(last.data['previous'])
+        assert [p['id'] for p in back.data['results']] == expected[start - 20:start]
+
+        page = api_client.get(reverse('post-list'), {'page': 2})
+        assert page.data['count'] == len(expected)
+        assert [p['id'] for p in page.data['results']] == expected[20:40]
+
+
+@pytest.mark.django_db
+class TestPinnedFirstFeed:
+    @pytest.fixture
+    def feed(self, user, category, active_subscription):
+        from apps.subscribe.models import PinnedPost
+        posts = [
+            Post.objects.create(title=f'Feed post {i}', content='...', author=user, category=category)
+            for i in range(25)
+        ]
+        # Закріплено найстаріший: за датою він був би останнім
+        PinnedPost.objects.create(user=user, post=posts[0])
+        return posts
+
+    def ids(self, response):
+        return [post['id'] for post in response.data['results']]
+
+    def test_pinned_first_only_on_first_page(self, api_client, feed):
+        first = api_client.get(reverse('post-list'))
+        second = api_client.get(reverse('post-list'), {'page': 2})
+        regular = [post.id for post in reversed(feed[1:])]
+
+        assert self.ids(first) == [feed[0].id, *regular[:20]]
+        assert self.ids(second) == regular[20:]
+        assert first.data['count'] == second.data['count'] == 25
+
+    def test_cursor_walk_returns_each_post_once(self, api_client, feed):
+        url, ids = reverse('post-list') + '?cursor=', []
+        while url:
+            response = api_client.get(url)
+            ids.extend(self.ids(response))
+            url = response.data['next']
+        assert ids == [feed[0].id, *(post.id for post in reversed(feed[1:]))]
+
+    def test_explicit_ordering_ignores_pins(self, api_client, feed):
+        response = api_client.get(reverse('post-list'), {'ordering': '-created_at'})
+        assert feed[0].id not in self.ids(response)
+        assert self.ids(response)[0] == feed[-1].id
+
+    def test_filtered_out_pin_not_shown(self, api_client, feed, user2, category):
+        other = Category.objects.create(name='Other', slug='other')
+        Post.objects.create(title='Elsewhere', content='...', author=user2, category=other)
+        response = api_client.get(reverse('post-list'), {'category': other.id})
+        assert feed[0].id not in self.ids(response)
+        assert response.data['count'] == 1
+
+    def test_pinned_block_capped(self, api_client, feed, user2, category, active_subscription, settings):
+        from apps.subscribe.models import PinnedPost, Subscription
+        settings.PINNED_FEED = {'MAX_PINNED': 1}
+        Subscription.objects.create(
+            user=user2, plan=active_subscription.plan, status='active',
+            start_date=active_subscription.start_date, end_date=active_subscription.end_date,
+        )
+        other = Post.objects.create(title='Other pin', content='...', author=user2, category=category)
+        PinnedPost.objects.create(user=user2, post=other)
+
+        response = api_client.get(reverse('post-list'))
+        # Лише найновіше закріплення; старіше стоїть у потоці за датою
+        assert len(response.data['results']) == 21
+        assert response.data['count'] == 26
+        walk = self.ids(response) + self.ids(api_client.get(reverse('post-list'), {'page': 2}))
+        assert walk == [other.id, *(post.id for post in reversed(feed))]
+
+    def test_cap_applies_within_category(self, api_client, feed, category, active_subscription, settings):
+        from apps.accounts.models import User
+        from apps.subscribe.models import PinnedPost, Subscription
+        settings.PINNED_FEED = {'MAX_PINNED': 1}
+        other = Category.objects.create(name='Other', slug='other')
+        for i in range(2):
+            author = User.objects.create_user(username=f'pinner{i}', email=f'pinner{i}@test.com', password='x')
+            Subscription.objects.create(
+                user=author, plan=active_subscription.plan, status='active',
+                start_date=active_subscription.start_date, end_date=active_subscription.end_date,
+            )
+            pinned = Post.objects.create(title=f'Other pin {i}', content='...', author=author, category=other)
+            PinnedPost.objects.create(user=author, post=pinned)
+
+        # Новіші закріплення інших категорій не витісняють закріплення цієї
+        by_filter = api_client.get(reverse('post-list'), {'category': category.id})
+        assert self.ids(by_filter)[0] == feed[0].id
+        assert by_filter.data['count'] == 25
+        by_page = api_client.get(reverse('posts-by-category', kwargs={'category_slug': category.slug}))
+        assert by_page.data['posts'][0]['id'] == feed[0].id
+
+    def test_category_page_paginated(self, api_client, feed, category):
+        url = reverse('posts-by-category', kwargs={'category_slug': category.slug})
+        first = api_client.get(url)
+        second = api_client.get(first.data['next'])
+
+        assert [post['id'] for post in first.data['posts']] == [feed[0].id, *(post.id for post in reversed(feed[5:]))]
+        assert first.data['count'] == 25
+        assert first.data['pinned_posts_count'] == 1
+        assert [post['id'] for post in second.data['posts']] == [post.id for post in reversed(feed[1:5])]
+        assert second.data['pinned_posts_count'] == 0
+
+
+@pytest.mark.django_db
+class TestEstimatedCounts:
+    @pytest.fixture
+    def many_posts(self, user, category):
+        posts = Post.objects.bulk_create([
+            Post(title=f'Post {i}', slug=f'post-{i}', content='...', author=user, category=category)
+            for i in range(45)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE posts')
+        return posts
+
+    @pytest.fixture
+    def estimated(self, settings):
+        settings.COUNT_ESTIMATES = {'THRESHOLD': 1}
+
+    def _counts(self, ctx):
+        # Агрегати по всій вибірці постів: COUNT(*) Paginator.count, COUNT/MAX/SUM валідаторів
+        return [q['sql'] for q in ctx.captured_queries if re.search(r'\b(COUNT|MAX|SUM)\((\*\) AS "__count" FROM "posts"|"posts"\.)', q['sql'])]
+
+    def test_exact_below_threshold(self, api_client, many_posts):
+        response = api_client.get(reverse('post-list'))
+        assert response.data['count'] == 45
+        assert response.data['count_estimated'] is False
+
+    def test_planner_estimate(self, many_posts):
+        from apps.core.pagination import estimate_count, planner_estimate
+        # Без фільтрів — reltuples, з фільтром — EXPLAIN
+        assert planner_estimate(Post.objects.all()) == 45
+        assert planner_estimate(Post.objects.filter(status='published')) > 0
+        assert estimate_count(Post.objects.filter(status='draft'), threshold=1000) == (0, False)
+
+    def test_estimate_ignores_feed_annotations(self, api_client, many_posts, estimated):
+        response = api_client.get(reverse('post-list'))
+        assert response.data['count_estimated'] is True
+        # Оцінка з відфільтрованих рядків, а не з JOIN-ів with_feed_info
+        assert 21 <= response.data['count'] <= 90
+
+    @pytest.mark.parametrize('url_name', ['post-list', 'my-posts'])
+    def test_estimated_pages(self, auth_client, many_posts, estimated, url_name):
+        url, ids = reverse(url_name), []
+        with CaptureQueriesContext(connection) as ctx:
+            first = auth_client.get(url)
+        assert first.data['count_estimated'] is True
+        assert first.data['count'] >= 21
+        assert not self._counts(ctx)
+
+        response = first
+        while True:
+            ids += [post['id'] for post in response.data['results']]
+            if not response.data['next']:
+                break
+            response = auth_client.get(response.data['next'])
+        # Остання сторінка знає точну кількість
+        assert response.data == {**response.data, 'count': 45, 'count_estimated': False}
+        assert sorted(ids) == sorted(post.id for post in many_posts)
+
+        assert auth_client.get(url, {'page': 10}).status_code == 404
+
+    def test_admin_changelist(self, client, many_posts, estimated):
+        from apps.accounts.models import User
+        client.force_login(User.objects.create_superuser(username='admin', email='admin@test.com', password='x'))
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse('admin:main_post_changelist'))
+        assert response.status_code == 200
+        assert b'Approximate count' in response.content
+        assert not self._counts(ctx)
+
+
+@pytest.mark.django_db
+class TestFullTextSearch:
+    def test_search_matches_words(self, api_client, user, category):
+        Post.objects.create(title='Django release notes', content='...', author=user, category=category)
+        Post.objects.create(title='Cooking', content='Nothing relevant', author=user, category=category)
+        response = api_client.get(reverse('post-list'), {'search': 'release'})
+        assert [p['title'] for p in response.data['results']] == ['Django release notes']
+
+    def test_title_ranks_above_content(self, api_client, user, category):
+        Post.objects.create(title='Weather today', content='Mentions python once', author=user, category=category)
+        Post.objects.create(title='Python tips', content='Short text', author=user, category=category)
+        response = api_client.get(reverse('post-list'), {'search': 'python'})
+        assert [p['title'] for p in response.data['results']] == ['Python tips', 'Weather today']
+
+    def test_search_vector_follows_updates(self, api_client, post):
+        post.title = 'Renamed headline'
+        post.save()
+        response = api_client.get(reverse('post-list'), {'search': 'headline'})
+        assert response.data['count'] == 1
+
+    def test_search_with_cursor_falls_back_to_pages(self, api_client, user, category):
+        for i in range(25):
+            Post.objects.create(title=f'Cursor search {i}', content='...', author=user, category=category)
+        url = reverse('post-list')
+        first = api_client.get(url, {'search': 'cursor', 'cursor': ''})
+        assert first.status_code == 200
+        assert first.data['count'] == 25
+        assert 'cursor=' not in first.data['next']
+
+        second = api_client.get(first.data['next'])
+        ids = [p['id'] for p in first.data['results'] + second.data['results']]
+        assert sorted(ids) == sorted(Post.objects.values_list('id', flat=True))
+
+    def test_repeated_search_sees_new_posts(self, api_client, user, category, django_capture_on_commit_callbacks):
+        Post.objects.create(title='Repeated term', content='...', author=user, category=category)
+        url = reverse('post-list')
+        for _ in range(3):
+            api_client.get(url, {'search': 'repeated'})
+        with django_capture_on_commit_callbacks(execute=True):
+            Post.objects.create(title='Repeated term again', content='...', author=user, category=category)
+        response = api_client.get(url, {'search': 'repeated'})
+        assert response.data['count'] == 2
+        assert len(response.data['results']) == 2
+
+    def test_popular_search_served_from_ranked_ids(self, api_client, user, category):
+        for i in range(25):
+            Post.objects.create(title=f'Popular term {i}', content='...', author=user, category=category)
+        Post.objects.create(title='Popular term popular term', content='...', author=user, category=category)
+        url = reverse('post-list')
+        live = api_client.get(url, {'search': 'popular'})
+        api_client.get(url, {'search': 'popular'})
+
+        with CaptureQueriesContext(connection) as ctx:
+            first = api_client.get(url, {'search': 'popular'})
+            second = api_client.get(url, {'search': 'popular', 'page': 2})
+        assert not any('ts_rank' in q['sql'] for q in ctx.captured_queries)
+        # Список id не обрізаний: count точний, порядок — як у живого ранжування
+        assert first.data['count'] == second.data['count'] == 26
+        assert [p['id'] for p in first.data['results']] == [p['id'] for p in live.data['results']]
+        assert len(second.data['results']) == 6
+
+    def test_cached_search_follows_deletes(self, api_client, user, category, django_capture_on_commit_callbacks):
+        posts = [
+            Post.objects.create(title=f'Cached term {i}', content='...', author=user, category=category)
+            for i in range(3)
+        ]
+        url = reverse('post-list')
+        for _ in range(3):
+            api_client.get(url, {'search': 'cached'})
+        with django_capture_on_commit_callbacks(execute=True):
+            posts[0].delete()
+        response = api_client.get(url, {'search': 'cached'})
+        assert response.data['count'] == 2
+        assert posts[0].id not in [p['id'] for p in response.data['results']]
+
+
+@pytest.mark.django_db
+class TestFeedQueries:
+    def make_posts(self, user, category, count):
+        from apps.comments.models import Comment
+        posts = [
+            Post.objects.create(title=f'Feed {user.username} {i}', content='...', author=user, category=category)
+            for i in range(count)
+        ]
+        for post in posts:
+            Comment.objects.create(post=post, author=user, content='active')
+            Comment.objects.create(post=post, author=user, content='hidden', is_active=False)
+        return posts
+
+    def count_queries(self, client, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        assert response.status_code == 200
+        return len(ctx.captured_queries)
+
+    @pytest.mark.parametrize('url_name,kwargs', [
+        ('post-list', {}),
+        ('popular-posts', {}),
+        ('recent-posts', {}),
+        ('pinned-posts-only', {}),
+        ('featured-posts', {}),
+        ('posts-by-category', {'category_slug': 'test-category'}),
+    ])
+    def test_query_count_independent_of_page_size(self, api_client, user, user2, category, active_subscription, url_name, kwargs):
+        from apps.subscribe.models import PinnedPost
+        url = reverse(url_name, kwargs=kwargs)
+        posts = self.make_posts(user, category, 2)
+        PinnedPost.objects.create(user=user, post=posts[0])
+        small = self.count_queries(api_client, url)
+
+        self.make_posts(user2, category, 15)
+        assert self.count_queries(api_client, url) == small
+
+    def test_annotations_in_payload(self, api_client, user, category, active_subscription):
+        from apps.subscribe.models import PinnedPost
+        pinned, regular = self.make_posts(user, category, 2)
+        PinnedPost.objects.create(user=user, post=pinned)
+
+        response = api_client.get(reverse('post-list'))
+        by_id = {p['id']: p for p in response.data['results']}
+        assert by_id[pinned.id]['comments_count'] == 1
+        assert by_id[pinned.id]['is_pinned'] is True
+        assert by_id[pinned.id]['pinned_info']['pinned_by']['username'] == user.username
+        assert by_id[regular.id]['is_pinned'] is False
+        assert by_id[regular.id]['pinned_info'] == {'is_pinned': False}
+        assert response.data['pinned_posts_count'] == 1
+
+    def test_expired_subscription_unpins(self, api_client, user, category, active_subscription):
+        from apps.subscribe.models import PinnedPost
+        post, = self.make_posts(user, category, 1)
+        PinnedPost.objects.create(user=user, post=post)
+        active_subscription.expire()
+
+        response = api_client.get(reverse('post-list'))
+        assert response.data['results'][0]['is_pinned'] is False
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFeedQueryPlans:
+    '''
+    Знімки планів EXPLAIN для запитів стрічок на засіяній базі: як читається таблиця posts.
+    Регресія (скан усієї таблиці, сортування всіх опублікованих постів) ламає знімок.
+    Без транзакції тесту, бо VACUUM (карта видимості для index-only scan) в транзакції не працює.
+    '''
+    @pytest.fixture
+    def seeded(self, user, user2):
+        categories = Category.objects.bulk_create(
+            Category(name=f'Plan {i}', slug=f'plan-{i}', description='...') for i in range(20)
+        )
+        now = timezone.now()
+        Post.objects.bulk_create(
+            Post(
+                title=f'Plan {i}', slug=f'plan-{i}', content='Текст новини ' * 60, excerpt='Текст новини',
+                author=user if i % 10 == 0 else user2, category=categories[i % 20],
+                status='draft' if i % 20 == 0 else 'published', views_count=i * 7919 % 10007,
+                created_at=now - timedelta(minutes=i),
+            )
+            for i in range(6000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM ANALYZE posts')
+            cursor.execute('ANALYZE pinned_posts')
+        return categories
+
+    @staticmethod
+    def posts_access(sql):
+        '''Знімок плану: (вузол, індекс) для сканів posts і вузли сортування, у порядку обходу'''
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+            plan = cursor.fetchone()[0]
+        plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]['Plan']
+
+        access = []
+        nodes = [plan]
+        while nodes:
+            node = nodes.pop(0)
+            if node.get('Relation Name') == 'posts' or node['Node Type'].endswith('Sort'):
+                access.append((node['Node Type'], node.get('Index Name')))
+            nodes.extend(node.get('Plans', []))
+        return access
+
+    @staticmethod
+    def assert_pinned_by_pk(access):
+        # Закріплені — кілька рядків по pk, без скану стрічки
+        assert access and all(node != 'Seq Scan' and index in (None, 'posts_pkey') for node, index in access)
+
+    def plans(self, client, url, params=None):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url, params)
+        assert response.status_code == 200
+        return [
+            self.posts_access(q['sql']) for q in ctx.captured_queries
+            if q['sql'].startswith(('SELECT', '(SELECT')) and '"posts"' in q['sql']
+        ]
+
+    def test_anonymous_feed(self, api_client, seeded):
+        # ETag рахується зі сторінки: крім неї — лише закріплені, вибрані по pk з індексу закріплень
+        pinned, page = self.plans(api_client, reverse('post-list'), {'cursor': ''})
+        self.assert_pinned_by_pk(pinned)
+        assert page == [('Index Scan', 'posts_published_feed_idx')]
+
+    def test_authenticated_feed_union(self, api_client, user, seeded):
+        api_client.force_authenticate(user=user)
+        pinned, keys, rows = self.plans(api_client, reverse('post-list'), {'cursor': ''})
+        self.assert_pinned_by_pk(pinned)
+        # Дві впорядковані гілки зливаються без сортування
+        assert keys == [
+            ('Index Only Scan', 'posts_published_feed_idx'),
+            ('Index Scan', 'posts_author_created_idx'),
+        ]
+        assert rows == [('Index Scan', 'posts_pkey')]
+
+    def test_category_feed(self, api_client, seeded):
+        pinned, page = self.plans(api_client, reverse('post-list'), {'category': seeded[3].id, 'cursor': ''})
+        self.assert_pinned_by_pk(pinned)
+        assert page == [('Index Scan', 'posts_published_category_idx')]
+
+    def test_popular_fallback(self, api_client, seeded):
+        page, = self.plans(api_client, reverse('popular-posts'))
+        assert page == [('Index Scan', 'posts_published_views_idx')]
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+    def test_second_request_is_served_from_cache(self, api_client, post):
+        url = reverse('recent-posts')
+        assert api_client.get(url)['X-Cache'] == 'MISS'
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(url)
+        assert response['X-Cache'] == 'HIT'
+        assert not any(q['sql'].startswith('SELECT') for q in ctx.captured_queries)
+        assert response.json()[0]['id'] == post.id
+
+    def test_post_save_invalidates_feeds(self, api_client, post, django_capture_on_commit_callbacks):
+        url = reverse('recent-posts')
+        api_client.get(url)
+        with django_capture_on_commit_callbacks(execute=True):
+            post.title = 'Updated title'
+            post.save()
+        response = api_client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()[0]['title'] == 'Updated title'
+
+    def test_pin_and_subscription_changes_invalidate_pinned(self, api_client, user, post, active_subscription, django_capture_on_commit_callbacks):
+        from apps.subscribe.models import PinnedPost
+        url = reverse('pinned-posts-only')
+        assert api_client.get(url).json()['count'] == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            PinnedPost.objects.create(user=user, post=post)
+        assert api_client.get(url).json()['count'] == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            active_subscription.cancel()
+        assert api_client.get(url).json()['count'] == 0
+
+
+WXR_SAMPLE = '''<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"
+    xmlns:content="http://purl.org/rss/1.0/modules/content/"
+    xmlns:dc="http://purl.org/dc/elements/1.1/"
+    xmlns:wp="http://wordpress.org/export/1.2/">
+<channel>
+    <title>Archive</title>
+    <wp:author><wp:author_login>olduser</wp:author_login><wp:author_email>test@test.com</wp:author_email></wp:author>
+    <item>
+        <title>Hello archive</title>
+        <dc:creator>olduser</dc:creator>
+        <content:encoded><![CDATA[<p>Old text</p>]]></content:encoded>
+        <category domain="category" nicename="history"><![CDATA[History]]></category>
+        <wp:post_id>10</wp:post_id>
+        <wp:post_date_gmt>2015-03-01 10:00:00</wp:post_date_gmt>
+        <wp:post_name>hello-archive</wp:post_name>
+        <wp:status>publish</wp:status>
+        <wp:post_type>post</wp:post_type>
+        <wp:comment>
+            <wp:comment_id>2</wp:comment_id>
+            <wp:comment_author>testuser2</wp:comment_author>
+            <wp:comment_content>Reply</wp:comment_content>
+            <wp:comment_approved>1</wp:comment_approved>
+            <wp:comment_parent>1</wp:comment_parent>
+        </wp:comment>
+        <wp:comment>
+            <wp:comment_id>1</wp:comment_id>
+            <wp:comment_author>testuser2</wp:comment_author>
+            <wp:comment_content>First</wp:comment_content>
+            <wp:comment_approved>1</wp:comment_approved>
+            <wp:comment_parent>0</wp:comment_parent>
+        </wp:comment>
+        <wp:comment>
+            <wp:comment_id>3</wp:comment_id>
+            <wp:comment_author>bot</wp:comment_author>
+            <wp:comment_content>Buy now</wp:comment_content>
+            <wp:comment_approved>spam</wp:comment_approved>
+        </wp:comment>
+    </item>
+    <item>
+        <title>About</title>
+        <wp:post_id>11</wp:post_id>
+        <wp:post_type>page</wp:post_type>
+    </item>
+</channel>
+</rss>
+'''
+
+
+@pytest.mark.django_db
+class TestContentImport:
+    def _job(self, tmp_path, name, content, **kwargs):
+        from apps.main.models import ImportJob
+        path = tmp_path / name
+        path.write_text(content, encoding='utf-8')
+        return ImportJob.objects.create(source=str(path), format=ImportJob.detect_format(name), **kwargs)
+
+    def test_json_import(self, tmp_path, user, user2, post):
+        import json
+        from apps.comments.models import Comment
+        from apps.main.importers import ContentImporter
+        records = [
+            {'type': 'post', 'id': 'a', 'title': 'Test Post', 'content': 'x' * 300,
+             'author': 'testuser2', 'category': 'Archive', 'created_at': '2012-05-01T08:00:00Z'},
+            {'type': 'post', 'id': 'b', 'title': 'Test Post', 'content': 'short', 'author': 'ghost'},
+            {'type': 'comment', 'id': 'c2', 'post': 'a', 'parent': 'c1', 'author': 'testuser', 'content': 'reply'},
+            {'type': 'comment', 'id': 'c1', 'post': 'a', 'author': 'testuser', 'content': 'root'},
+            {'type': 'comment', 'id': 'c3', 'post': 'missing', 'author': 'testuser', 'content': '?'},
+        ]
+        job = self._job(tmp_path, 'archive.json', json.dumps(records), default_author=user)
+
+        result = ContentImporter(job, chunk_size=2).run()
+
+        assert result['posts_created'] == 2
+        assert result['comments_created'] == 2
+        assert result['skipped'] == 1
+        job.refresh_from_db()
+        assert job.status == 'completed'
+        assert job.processed_records == 5
+
+        first = Post.objects.get(author=user2)
+        # slug Test Post уже зайнятий постом з фікстури
+        assert {first.slug, Post.objects.exclude(pk__in=[first.pk, post.pk]).get().slug} == {'test-post-2', 'test-post-3'}
+        assert first.excerpt == 'x' * 200 + '...'
+        assert first.category.name == 'Archive'
+        assert first.created_at.year == 2012
+        assert Post.objects.filter(title='Test Post', author=user, content='short').exists()
+
+        reply = Comment.objects.get(content='reply')
+        assert reply.parent == Comment.objects.get(content='root')
+
+    def test_wxr_import(self, tmp_path, user, user2):
+        from apps.comments.models import Comment
+        from apps.main.importers import ContentImporter
+        job = self._job(tmp_path, 'export.xml', WXR_SAMPLE)
+
+        ContentImporter(job).run()
+
+        post = Post.objects.get(slug='hello-archive')
+        assert post.author == user  # olduser зіставлено за email
+        assert post.status == 'published'
+        assert post.category.slug == 'history'
+        assert post.created_at.year == 2015
+        assert Post.objects.count() == 1
+        assert Comment.objects.count() == 2
+        assert Comment.objects.get(content='Reply').parent.content == 'First'
+
+    def test_resume_after_interruption(self, tmp_path, user):
+        from apps.main.importers import ContentImporter
+        lines = [f'{{"id": "{i}", "title": "Post {i}", "content": "c", "author": "testuser"}}' for i in range(5)]
+        broken = lines[:4] + ['{broken'] + lines[4:]
+        job = self._job(tmp_path, 'archive.jsonl', '\n'.join(broken))
+
+        with pytest.raises(ValueError):
+            ContentImporter(job, chunk_size=2).run()
+        job.refresh_from_db()
+        assert job.status == 'failed'
+        assert job.processed_records == 4
+        assert Post.objects.count() == 4
+
+        (tmp_path / 'archive.jsonl').write_text('\n'.join(lines), encoding='utf-8')
+        ContentImporter(job, chunk_size=2).run()
+        job.refresh_from_db()
+        assert job.status == 'completed'
+        assert job.posts_created == 5
+        assert Post.objects.count() == 5
+
+    def test_running_job_not_started_twice(self, api_client, tmp_path, user, django_capture_on_commit_callbacks):
+        from apps.main.importers import ContentImporter
+        job = self._job(tmp_path, 'archive.jsonl', '{"id": "1", "title": "Post", "content": "c"}', status='running')
+
+        with pytest.raises(ValueError, match='виконується'):
+            ContentImporter(job).run()
+        user.is_staff = True
+        user.save()
+        api_client.force_authenticate(user=user)
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = api_client.post(reverse('import-job-resume', kwargs={'pk': job.pk}))
+        assert response.status_code == 409
+        assert callbacks == []
+        assert not Post.objects.filter(title='Post').exists()
+
+    def test_csv_command(self, tmp_path, user):
+        from django.core.management import call_command
+        path = tmp_path / 'archive.csv'
+        path.write_text('id,title,content,author,status\n1,From CSV,Body,testuser,draft\n', encoding='utf-8')
+        out = StringIO()
+
+        call_command('import_content', str(path), stdout=out)
+
+        assert Post.objects.get(title='From CSV').status == 'draft'
+        assert 'Готово: 1 постів' in out.getvalue()
+
+    def test_api_admin_only(self, api_client, user, settings, tmp_path, django_capture_on_commit_callbacks):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        settings.MEDIA_ROOT = tmp_path
+        url = reverse('import-job-list')
+        upload = lambda: SimpleUploadedFile('archive.jsonl', b'{"id": 1, "title": "Uploaded", "content": "c"}\n')
+
+        api_client.force_authenticate(user=user)
+        assert api_client.post(url, {'file': upload()}, format='multipart').status_code == 403
+
+        user.is_staff = True
+        user.save()
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post(url, {'file': upload(), 'default_author': 'testuser'}, format='multipart')
+        assert response.status_code == 201
+        assert response.data['format'] == 'jsonl'
+
+        detail = api_client.get(reverse('import-job-detail', kwargs={'pk': response.data['id']}))
+        assert detail.data['status'] == 'completed'
+        assert detail.data['posts_created'] == 1
+        assert Post.objects.get(title='Uploaded').author == user
+
+
+@pytest.mark.django_db
+class TestImageRenditions:
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        return tmp_path
+
+    def _photo(self, name='photo.jpg', size=(2000, 1000)):
+        from io import BytesIO
+        from PIL import Image
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        exif = Image.Exif()
+        exif[0x0112] = 6  # повернуто на 90°
+        exif[0x010F] = 'Camera'
+        output = BytesIO()
+        Image.new('RGB', size, 'red').save(output, 'JPEG', exif=exif.tobytes())
+        return SimpleUploadedFile(name, output.getvalue(), content_type='image/jpeg')
+
+    def test_renditions_generated_after_commit(self, api_client, post, media_root, django_capture_on_commit_callbacks):
+        from PIL import Image
+        post.image = self._photo()
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            post.save()
+        # До генерації віддається оригінал
+        response = api_client.get(reverse('post-list'))
+        assert response.data['results'][0]['image'].endswith(post.image.name)
+
+        for callback in callbacks:
+            callback()
+        post.refresh_from_db()
+        variants = post.image_renditions['variants']
+        assert post.image_renditions['source'] == post.image.name
+        assert (variants['thumb']['width'], variants['thumb']['height']) == (480, 270)
+        # EXIF-орієнтація застосована, самі метадані прибрані
+        assert (variants['large']['width'], variants['large']['height']) == (640, 1280)
+        with Image.open(media_root / variants['large']['files']['jpeg']) as large:
+            assert not large.getexif()
+
+        response = api_client.get(reverse('post-list'))
+        assert response.data['results'][0]['image'].endswith('thumb.webp')
+        detail = api_client.get(reverse('post-detail', kwargs={'slug': post.slug}))
+        assert detail.data['image'].endswith('large.webp')
+        assert detail.data['image_renditions']['thumb']['jpeg'].endswith('thumb.jpeg')
+
+    def test_replaced_image_regenerates(self, post, media_root, django_capture_on_commit_callbacks):
+        post.image = self._photo()
+        with django_capture_on_commit_callbacks(execute=True):
+            post.save()
+        post.refresh_from_db()
+        old_thumb = post.image_renditions['variants']['thumb']['files']['webp']
+
+        post.image = self._photo('second.jpg')
+        with django_capture_on_commit_callbacks(execute=True):
+            post.save()
+        post.refresh_from_db()
+        assert post.image_renditions['source'] == post.image.name
+        assert not (media_root / old_thumb).exists()
+
+        post.image = ''
+        with django_capture_on_commit_callbacks(execute=True):
+            post.save()
+        post.refresh_from_db()
+        assert post.image_renditions == {}
+
+    def test_unrelated_save_does_not_schedule(self, post, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks() as callbacks:
+            post.title = 'Renamed'
+            post.save()
+        assert not any(getattr(c, '__qualname__', '').startswith('_schedule_renditions') for c in callbacks)
+        post.refresh_from_db()
+        assert post.image_renditions == {}
+
+    def test_avatar_and_backfill_command(self, auth_client, user, media_root):
+        from django.core.management import call_command
+        from apps.accounts.models import User
+        # Аватар з'явився в обхід сигналу (напр., до появи пайплайна)
+        user.avatar.save('me.jpg', self._photo('me.jpg', size=(800, 800)), save=False)
+        User.objects.filter(pk=user.pk).update(avatar=user.avatar.name)
+
+        call_command('generate_renditions', processes=1, stdout=StringIO())
+
+        user.refresh_from_db()
+        assert user.avatar_renditions['variants']['thumb']['width'] == 96
+        response = auth_client.get(reverse('profile'))
+        assert response.data['avatar'].endswith('large.webp')
+
+
+@pytest.mark.django_db
+class TestAsyncReadEndpoints:
+    def _bearer(self, user):
+        from rest_framework_simplejwt.tokens import RefreshToken
+        return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def test_read_views_are_coroutines(self, post):
+        import asyncio
+        from django.urls import resolve
+        for url in (
+            reverse('post-list'),
+            reverse('post-detail', kwargs={'slug': post.slug}),
+            reverse('posts-by-category', kwargs={'category_slug': post.category.slug}),
+            reverse('post-comments', kwargs={'post_id': post.id}),
+            reverse('subscription-status'),
+            reverse('payment-status', kwargs={'payment_id': 1}),
+        ):
+            assert asyncio.iscoroutinefunction(resolve(url).func), url
+
+    def test_jwt_authentication(self, api_client, user, post, category):
+        Post.objects.create(title='Draft', content='x', author=user, category=category, status='draft')
+
+        response = api_client.get(reverse('post-list'), **self._bearer(user))
+        assert response.status_code == 200
+        assert response.data['count'] == 2
+
+        response = api_client.get(reverse('post-list'), HTTP_AUTHORIZATION='Bearer broken')
+        assert response.status_code == 401
+
+    def test_asgi_handler(self, user, post, category):
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncClient
+        draft = Post.objects.create(title='Draft', content='x', author=user, category=category, status='draft')
+        client = AsyncClient()
+        headers = {'Authorization': self._bearer(user)['HTTP_AUTHORIZATION']}
+
+        response = async_to_sync(client.get)(reverse('post-list'), {'cursor': ''}, headers=headers)
+        assert response.status_code == 200
+        assert {item['slug'] for item in response.json()['results']} == {post.slug, draft.slug}
+
+        response = async_to_sync(client.get)(reverse('post-detail', kwargs={'slug': post.slug}), headers=headers)
+        assert response.status_code == 200
+        assert response.json()['can_pin'] is False
+
+    def test_detail_can_pin_with_subscription(self, api_client, user, post, active_subscription):
+        response = api_client.get(reverse('post-detail', kwargs={'slug': post.slug}), **self._bearer(user))
+        assert response.status_code == 200
+        assert response.data['can_pin'] is True
+
+    def test_invalid_page(self, api_client, post):
+        response = api_client.get(reverse('post-list'), {'page': 5})
+        assert response.status_code == 404
+
+    def test_writes_stay_atomic(self, auth_client, category):
+        response = auth_client.post(reverse('post-list'), {
+            'title': 'Atomic', 'content': 'Body', 'category': category.id, 'status': 'published',
+        })
+        assert response.status_code == 201
+        assert Post.objects.filter(title='Atomic').exists()
+
+    def test_posts_by_category(self, api_client, post, user, category):
+        Post.objects.create(title='Draft', content='x', author=user, category=category, status='draft')
+        response = api_client.get(reverse('posts-by-category', kwargs={'category_slug': category.slug}))
+        assert response.status_code == 200
+        assert response.data['category']['posts_count'] == 1
+        assert [item['slug'] for item in response.data['posts']] == [post.slug]
+
+    def test_payment_status_checks_stripe(self, auth_client, user, active_subscription):
+        from unittest import mock
+        from apps.payment.models import Payment
+        payment = Payment.objects.create(
+            user=user, subscription=active_subscription, amount=12, status='pending',
+            stripe_session_id='cs_test_1',
+        )
+        with mock.patch('apps.payment.views.StripeService.retrieve_session',
+                        return_value={'status': 'unpaid'}) as retrieve:
+            response = auth_client.get(reverse('payment-status', kwargs={'payment_id': payment.id}))
+        assert response.status_code == 200
+        assert response.data['status'] == 'pending'
+        retrieve.assert_called_once_with('cs_test_1')
+
+
+@pytest.mark.django_db
+class TestHomeTimeline:
+    url = reverse('home-timeline')
+
+    def _publish(self, author, category, capture, title, status='published'):
+        with capture(execute=True):
+            return Post.objects.create(title=title, content='x', author=author, category=category, status=status)
+
+    def _follow(self, client, author, capture):
+        with capture(execute=True):
+            return client.post(reverse('user-follow', kwargs={'pk': author.pk}))
+
+    def _ids(self, response):
+        return [item['id'] for item in response.data['results']]
+
+    def test_follow_endpoint(self, auth_client, user, user2, django_capture_on_commit_callbacks):
+        response = self._follow(auth_client, user2, django_capture_on_commit_callbacks)
+        assert response.status_code == 201
+        assert self._follow(auth_client, user2, django_capture_on_commit_callbacks).status_code == 200
+        user2.refresh_from_db()
+        assert user2.followers_count == 1
+        assert list(user.following.all()) == [user2]
+
+        assert auth_client.post(reverse('user-follow', kwargs={'pk': user.pk})).status_code == 400
+        assert auth_client.post(reverse('user-follow', kwargs={'pk': 999999})).status_code == 404
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert auth_client.delete(reverse('user-follow', kwargs={'pk': user2.pk})).status_code == 200
+        user2.refresh_from_db()
+        assert user2.followers_count == 0
+
+    def test_requires_authentication(self, api_client):
+        assert api_client.get(self.url).status_code == 401
+
+    def test_publish_fans_out(self, auth_client, user, user2, category, timeline_store, django_capture_on_commit_callbacks):
+        self._follow(auth_client, user2, django_capture_on_commit_callbacks)
+        assert auth_client.get(self.url).data['results'] == []
+
+        first = self._publish(user2, category, django_capture_on_commit_callbacks, 'First')
+        draft = self._publish(user2, category, django_capture_on_commit_callbacks, 'Draft', status='draft')
+        second = self._publish(user2, category, django_capture_on_commit_callbacks, 'Second')
+        # Власні пости і пости не підписаних авторів у стрічку не потрапляють
+        self._publish(user, category, django_capture_on_commit_callbacks, 'Mine')
+        assert [post_id for post_id, _ in timeline_store.read(user.pk, None, 10)] == [second.id, first.id]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            draft.status = 'published'
+            draft.save()
+        # Стрічка впорядкована, як і решта стрічок, за created_at
+        with CaptureQueriesContext(connection) as ctx:
+            response = auth_client.get(self.url)
+        assert self._ids(response) == [second.id, draft.id, first.id]
+        assert len(ctx.captured_queries) <= 6
+
+        with django_capture_on_commit_callbacks(execute=True):
+            second.status = 'draft'
+            second.save()
+        with django_capture_on_commit_callbacks(execute=True):
+            first.delete()
+        assert self._ids(auth_client.get(self.url)) == [draft.id]
+
+    def test_saves_without_status_do_not_fan_out(self, user, category, monkeypatch, django_capture_on_commit_callbacks):
+        from apps.main import tasks
+        post = self._publish(user, category, django_capture_on_commit_callbacks, 'Published')
+        calls = []
+        monkeypatch.setattr(tasks.fan_out_post, 'delay', calls.append)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            partial = Post.objects.only('pk', 'title').get(pk=post.pk)
+            partial.title = 'Renamed'
+            partial.save()
+            post.save(update_fields=['views_count'])
+        assert calls == []
+
+    def test_follow_backfills_and_unfollow_prunes(self, auth_client, user, user2, category, django_capture_on_commit_callbacks):
+        old = self._publish(user2, category, django_capture_on_commit_callbacks, 'Old')
+        # Стрічка будується при першому читанні, далі підписка доповнює її
+        assert auth_client.get(self.url).data['results'] == []
+        self._follow(auth_client, user2, django_capture_on_commit_callbacks)
+        assert self._ids(auth_client.get(self.url)) == [old.id]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            auth_client.delete(reverse('user-follow', kwargs={'pk': user2.pk}))
+        assert auth_client.get(self.url).data['results'] == []
+
+    def test_rebuild_when_missing(self, auth_client, user, user2, category, timeline_store, django_capture_on_commit_callbacks):
+        self._follow(auth_client, user2, django_capture_on_commit_callbacks)
+        post = self._publish(user2, category, django_capture_on_commit_callbacks, 'Post')
+        timeline_store.clear()
+        assert self._ids(auth_client.get(self.url)) == [post.id]
+        assert timeline_store.is_built(user.pk)
+
+    def test_big_authors_merged_on_read(self, auth_client, user, user2, category, settings, timeline_store, django_capture_on_commit_callbacks):
+        from apps.accounts.models import Follow, User
+        settings.TIMELINES = {**settings.TIMELINES, 'FANOUT_LIMIT': 2}
+        star = User.objects.create_user(username='star', email='star@test.com', password='testpass123')
+        fan = User.objects.create_user(username='fan', email='fan@test.com', password='testpass123')
+        self._follow(auth_client, user2, django_capture_on_commit_callbacks)
+        self._follow(auth_client, star, django_capture_on_commit_callbacks)
+        with django_capture_on_commit_callbacks(execute=True):
+            Follow.objects.create(follower=fan, author=star)
+        assert auth_client.get(self.url).data['results'] == []
+
+        posts = [
+            self._publish(author, category, django_capture_on_commit_callbacks, f'Post {i}')
+            for i, author in enumerate([user2, star, user2, star, star])
+        ]
+        # Пости автора з FANOUT_LIMIT підписниками не розсилаються
+        assert {post_id for post_id, _ in timeline_store.read(user.pk, None, 10)} == {posts[0].id, posts[2].id}
+
+        expected = [post.id for post in reversed(posts)]
+        assert self._ids(auth_client.get(self.url)) == expected
+
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'PAGE_SIZE': 2}
+        seen, url = [], self.url
+        while url:
+            response = auth_client.get(url)
+            assert len(response.data['results']) <= 2
+            seen += self._ids(response)
+            url = response.data['next']
+        assert seen == expected
+
+    def test_invalid_cursor(self, auth_client):
+        assert auth_client.get(self.url, {'cursor': 'abc'}).status_code == 404
+
+
+@pytest.mark.django_db
+class TestRelatedPosts:
+    @pytest.fixture(autouse=True)
+    def related_settings(self, settings, tmp_path):
+        settings.RELATED_POSTS = {**settings.RELATED_POSTS, 'INDEX_PATH': str(tmp_path / 'related.npz'), 'TOP_K': 2}
+
+    def _post(self, user, category, title, content, status='published'):
+        # slugify не транслітерує кирилицю
+        return Post.objects.create(
+            title=title, slug=f'post-{Post.objects.count()}', content=content, author=user, category=category,
+            status=status,
+        )
+
+    def _related(self, client, post):
+        response = client.get(reverse('related-posts', kwargs={'slug': post.slug}))
+        assert response.status_code == 200
+        return [item['id'] for item in response.data]
+
+    def test_tfidf_vectors(self):
+        import numpy as np
+        from apps.main.related import count_terms, inverse_document_frequency, tfidf_vectors
+        counts = count_terms(
+            [('Футбол', 'матч гол футбол'), ('Футбол', 'матч тренер'), ('Вибори', 'парламент голосування')],
+            2 ** 20, 3,
+        )
+        vectors = tfidf_vectors(counts, inverse_document_frequency(counts, 1, 1.0), max_terms=2)
+        assert np.diff(vectors.indptr).max() <= 2
+        np.testing.assert_allclose(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel(), 1, rtol=1e-5)
+        similarities = (vectors @ vectors.T).toarray()
+        assert similarities[0, 1] > 0.5
+        assert similarities[0, 2] == 0
+
+    def test_rebuild_and_endpoint(self, api_client, user, category):
+        from apps.main.tasks import rebuild_related_posts
+        other = Category.objects.create(name='Politics', description='...')
+        match = self._post(user, category, 'Матч збірної', 'Збірна виграла матч, гол забив нападник збірної')
+        rematch = self._post(user, category, 'Збірна і матч', 'Нападник збірної забив гол у матчі')
+        elsewhere = self._post(user, other, 'Збірна та гол', 'Збірна, гол, нападник, матч')
+        draft = self._post(user, category, 'Матч збірної (чернетка)', 'Збірна матч гол нападник', status='draft')
+        self._post(user, other, 'Парламент', 'Депутати голосували за бюджет')
+
+        assert self._related(api_client, match) == []
+        assert rebuild_related_posts.delay().get() == {'posts': 4}
+
+        # Та сама категорія випереджає так само схожий пост з іншої; чернетки не індексуються
+        with CaptureQueriesContext(connection) as ctx:
+            related = self._related(api_client, match)
+        assert related == [rematch.id, elsewhere.id]
+        assert len([q for q in ctx.captured_queries if q['sql'].startswith('SELECT')]) == 1
+        assert draft.id not in self._related(api_client, elsewhere)
+
+        assert api_client.get(reverse('related-posts', kwargs={'slug': 'missing'})).status_code == 404
+        assert api_client.get(reverse('related-posts', kwargs={'slug': draft.slug})).status_code == 404
+
+    def test_incremental_update(self, api_client, user, category):
+        from apps.main.models import RelatedPost
+        from apps.main.tasks import update_related_posts
+        first = self._post(user, category, 'Космос', 'Ракета вийшла на орбіту, супутник відділився')
+        self._post(user, category, 'Погода', 'Завтра дощ і вітер')
+        # Без індексу оновлення робить повну збірку
+        assert update_related_posts.delay().get() == {'posts': 2}
+        assert self._related(api_client, first) == []
+
+        second = self._post(user, category, 'Ще ракета', 'Друга ракета вивела супутник на орбіту')
+        assert update_related_posts.delay().get() == {'posts': 1, 'updated': 1}
+        assert self._related(api_client, second) == [first.id]
+        assert self._related(api_client, first) == [second.id]
+
+        assert update_related_posts.delay().get() == {'posts': 0, 'updated': 0}
+        second.delete()
+        assert not RelatedPost.objects.filter(post_id=first.id).exists()
@@ -0,0 +1,101 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.db.models import Prefetch
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.accounts.models import User
+from apps.comments.models import Comment
+from apps.comments.serializers import CommentDetailSerializer, CommentSerializer
+from apps.comments.views import with_replies_count
+from apps.core.loaders import RelationLoader
+from apps.payment.models import Payment
+
+
+def queries(ctx):
+    return [q['sql'] for q in ctx.captured_queries if not q['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))]
+
+
+def make_comments(post, count, **kwargs):
+    users = [
+        User.objects.create_user(username=f'reader{i}', email=f'reader{i}@example.com', password='pass12345')
+        for i in range(count)
+    ]
+    return [Comment.objects.create(post=post, author=author, content=f'Comment {i}', **kwargs)
+            for i, author in enumerate(users)]
+
+
+def serialize(serializer_class, queryset, context=None):
+    # replies_count — з анотації, як у в'юшках
+    queryset = with_replies_count(queryset)
+    with CaptureQueriesContext(connection) as ctx:
+        data = serializer_class(queryset, many=True, context=context or {}).data
+    return data, queries(ctx)
+
+
+@pytest.mark.django_db
+class TestRelationLoader:
+
+    def test_query_count_independent_of_page_size(self, post):
+        comments = make_comments(post, 8)
+        # Без select_related: автори добираються одним запитом на сторінку
+        _, small = serialize(CommentSerializer, Comment.objects.filter(pk__in=[c.pk for c in comments[:2]]))
+        data, large = serialize(CommentSerializer, Comment.objects.order_by('id'))
+        assert len(small) == len(large) == 2
+        assert [row['author_info']['username'] for row in data] == [f'reader{i}' for i in range(8)]
+
+    def test_nested_replies_batched(self, post):
+        parents = make_comments(post, 3)
+        for parent in parents:
+            Comment.objects.create(post=post, author=parents[-1].author, parent=parent, content='Reply')
+            Comment.objects.create(post=post, author=post.author, parent=parent, content='Reply')
+        comments = Comment.objects.filter(parent=None).order_by('id').prefetch_related(
+            Prefetch('replies', queryset=with_replies_count(Comment.objects.order_by('id')), to_attr='active_replies')
+        )
+        data, sql = serialize(CommentDetailSerializer, comments)
+        # Коментарі, відповіді, автори коментарів, автори відповідей
+        assert len(sql) == 4
+        assert [reply['author_info']['username'] for reply in data[0]['replies']] == ['reader2', post.author.username]
+
+    def test_request_memoizes_and_primes_user(self, user, post):
+        make_comments(post, 3)
+        Comment.objects.create(post=post, author=user, content='Mine')
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=user)
+        request = Request(request)
+        request.user
+        context = {'request': request}
+
+        _, first = serialize(CommentSerializer, Comment.objects.all(), context)
+        _, second = serialize(CommentSerializer, Comment.objects.all(), context)
+        assert len(first) == 2
+        # Автори вже завантажені в цьому запиті
+        assert len(second) == 1
+        assert RelationLoader.for_context(context).load_many(User, 'id', [user.pk]) == {user.pk: user}
+
+    def test_reverse_one_to_one(self, user, user2, active_subscription):
+        users = list(User.objects.filter(pk__in=[user.pk, user2.pk]))
+        loader = RelationLoader()
+        with CaptureQueriesContext(connection) as ctx:
+            loader.prefetch(users, 'subscription__plan')
+            by_id = {u.pk: u for u in users}
+            assert by_id[user.pk].subscription.plan.pk == active_subscription.plan_id
+            assert not hasattr(by_id[user2.pk], 'subscription')
+        assert len(queries(ctx)) == 2
+
+    def test_payment_history_constant_queries(self, auth_client, user):
+        def history_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = auth_client.get(reverse('payment-history'))
+            assert response.status_code == 200
+            return len(queries(ctx))
+
+        Payment.objects.create(user=user, amount=Decimal('5.00'))
+        one = history_queries()
+        for _ in range(5):
+            Payment.objects.create(user=user, amount=Decimal('5.00'))
+        assert history_queries() == one
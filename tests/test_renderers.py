@@ -0,0 +1,70 @@
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from io import BytesIO
+
+from apps.core import renderers
+from apps.core.parsers import FastJSONParser
+from apps.core.renderers import FastJSONRenderer
+
+
+PAYLOADS = [
+    {'amount': Decimal('12.50'), 'total': Decimal('0')},
+    {'created_at': datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc), 'day': date(2026, 1, 2)},
+    {'naive': datetime(2026, 1, 2, 3, 4, 5), 'delta': timedelta(hours=1, seconds=5)},
+    {'id': uuid.UUID('12345678-1234-5678-1234-567812345678'), 'label': gettext_lazy('Published')},
+    {'text': 'Новина — «лапки»   і  ', 'emoji': '🚀'},
+    {1: 'int key', 'nested': [{'a': None, 'b': True, 'c': 1.5}], 'tuple': (1, 2)},
+    [{'big': 2 ** 70}],
+    [],
+]
+
+
+class TestFastJSONRenderer:
+    @pytest.mark.parametrize('data', PAYLOADS)
+    def test_matches_stdlib(self, data):
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_indent_falls_back(self):
+        data = {'a': [1, 2]}
+        rendered = FastJSONRenderer().render(data, 'application/json; indent=4')
+        assert rendered == JSONRenderer().render(data, 'application/json; indent=4')
+
+    def test_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(renderers, 'orjson', None)
+        data = {'amount': Decimal('1.10')}
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+class TestFastJSONParser:
+    def test_parse(self):
+        body = '{"title": "Новина", "tags": [1, 2.5, null]}'.encode('utf-8')
+        assert FastJSONParser().parse(BytesIO(body)) == JSONParser().parse(BytesIO(body))
+
+    def test_invalid(self):
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"a": NaN}'))
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{broken'))
+
+    def test_other_encoding(self):
+        body = '{"title": "Новина"}'.encode('utf-16')
+        assert FastJSONParser().parse(BytesIO(body), parser_context={'encoding': 'utf-16'}) == {'title': 'Новина'}
+
+
+@pytest.mark.django_db
+def test_api_uses_fast_renderer(auth_client, category):
+    response = auth_client.post(reverse('post-list'), {
+        'title': 'Через orjson', 'content': 'Текст', 'category': category.id, 'status': 'published',
+    }, format='json')
+    assert response.status_code == 201
+    response = auth_client.get(reverse('post-list'))
+    assert isinstance(response.accepted_renderer, FastJSONRenderer)
+    assert response.json()['results'][0]['title'] == 'Через orjson'
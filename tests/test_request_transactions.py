@@ -0,0 +1,85 @@
+import pytest
+from django.db import InternalError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+
+from apps.core.middleware import RequestTransactionMiddleware
+from apps.core.transactions import request_transaction
+from apps.main.models import Category
+
+
+def writing_view(request):
+    Category.objects.create(name='Written in GET', slug='written-in-get')
+    return HttpResponse('ok')
+
+
+def state_view(request):
+    state = {'autocommit': connection.get_autocommit(), 'in_atomic_block': connection.in_atomic_block}
+    return state
+
+
+@pytest.fixture
+def middleware():
+    return RequestTransactionMiddleware(lambda request: HttpResponse())
+
+
+def run(middleware, view, method='get'):
+    request = getattr(RequestFactory(), method)('/')
+    return middleware.process_view(request, view, (), {})
+
+
+# Транзакції запиту видно лише поза транзакцією тесту
+@pytest.mark.django_db(transaction=True)
+class TestRequestTransactions:
+
+    def test_read_only_rejects_writes_in_get(self, middleware, settings):
+        settings.REQUEST_TRANSACTIONS = {'SAFE_METHODS': 'read_only'}
+        with pytest.raises(InternalError, match='read-only transaction'):
+            run(middleware, writing_view)
+        assert not Category.objects.filter(slug='written-in-get').exists()
+
+    def test_read_only_transaction_settings(self, middleware, settings):
+        settings.REQUEST_TRANSACTIONS = {'SAFE_METHODS': 'read_only'}
+
+        def view(request):
+            with connection.cursor() as cursor:
+                cursor.execute('SHOW transaction_read_only')
+                read_only = cursor.fetchone()[0]
+                cursor.execute('SHOW transaction_isolation')
+                return read_only, cursor.fetchone()[0]
+
+        assert run(middleware, view) == ('on', 'read committed')
+
+    def test_autocommit_runs_without_transaction(self, middleware, settings):
+        settings.REQUEST_TRANSACTIONS = {'SAFE_METHODS': 'autocommit'}
+        assert run(middleware, state_view) == {'autocommit': True, 'in_atomic_block': False}
+
+    def test_unsafe_methods_keep_atomic_requests(self, middleware, settings):
+        settings.REQUEST_TRANSACTIONS = {'SAFE_METHODS': 'read_only'}
+        # В'юшку загорне в транзакцію ATOMIC_REQUESTS обробник Django
+        assert run(middleware, writing_view, method='post') is None
+
+    def test_view_override(self, middleware, settings):
+        settings.REQUEST_TRANSACTIONS = {'SAFE_METHODS': 'read_only'}
+
+        @request_transaction('atomic')
+        def atomic_view(request):
+            return writing_view(request)
+
+        @request_transaction('autocommit')
+        def autocommit_view(request):
+            return state_view(request)
+
+        assert run(middleware, atomic_view) is None
+        assert run(middleware, autocommit_view)['autocommit'] is True
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            request_transaction('serializable')
+
+    def test_api_reads_under_read_only(self, api_client, post, settings):
+        settings.REQUEST_TRANSACTIONS = {'SAFE_METHODS': 'read_only'}
+        assert api_client.get(reverse('category-list')).status_code == 200
+        assert api_client.get(reverse('popular-posts')).status_code == 200
+        assert api_client.get(reverse('post-detail', kwargs={'slug': post.slug})).status_code == 200
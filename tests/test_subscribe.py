@@ -16,10 +16,10 @@ class TestSubscription:
         assert response.status_code == 200
         assert response.data['has_subscription'] == False
 
-    # def test_subscription_status_active(self, auth_client, active_subscription):
-    #     url = reverse('subscription-status')
-    #     response = auth_client.get(url)
-    #     assert response.data['is_active'] == True
+    def test_subscription_status_active(self, auth_client, active_subscription):
+        url = reverse('subscription-status')
+        response = auth_client.get(url)
+        assert response.data['is_active'] == True
 
     def test_cancel_subscription(self, auth_client, active_subscription):
         url = reverse('cancel-subscription')
@@ -53,4 +53,54 @@ class TestPinnedPost:
         url = reverse('unpin-post')
         response = auth_client.post(url)
         assert response.status_code == 200
-        assert not PinnedPost.objects.filter(post=post).exists()
\ No newline at end of file
+        assert not PinnedPost.objects.filter(post=post).exists()
+
+@pytest.mark.django_db
+class TestPinIndex:
+    def test_pin_sets_active_until(self, user, post, active_subscription):
+        pin = PinnedPost.objects.create(user=user, post=post)
+        assert pin.active_until == active_subscription.end_date
+        assert list(PinnedPost.objects.effective_post_ids()) == [post.id]
+
+    def test_cancel_clears_index(self, user, post, active_subscription):
+        pin = PinnedPost.objects.create(user=user, post=post)
+        active_subscription.cancel()
+        pin.refresh_from_db()
+        assert pin.active_until is None
+        assert not pin.is_effective
+
+    def test_reactivate_restores_index(self, user, post, active_subscription):
+        pin = PinnedPost.objects.create(user=user, post=post)
+        active_subscription.cancel()
+        active_subscription.activate()
+        pin.refresh_from_db()
+        assert pin.active_until == active_subscription.end_date
+
+    def test_expiry_task_expires_subscription(self, user, post, active_subscription):
+        from datetime import timedelta
+        from django.utils import timezone
+        from apps.subscribe.tasks import check_expired_subscriptions
+
+        PinnedPost.objects.create(user=user, post=post)
+        type(active_subscription).objects.filter(pk=active_subscription.pk).update(
+            end_date=timezone.now() - timedelta(days=1)
+        )
+
+        result = check_expired_subscriptions()
+        assert result['expired_subscriptions'] == 1
+        assert result['pinned_posts_removed'] == 1
+        active_subscription.refresh_from_db()
+        assert active_subscription.status == 'expired'
+        assert not PinnedPost.objects.filter(post=post).exists()
+
+    def test_pinned_feed_uses_index(self, api_client, user, post, active_subscription):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        PinnedPost.objects.create(user=user, post=post)
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(reverse('pinned-posts-only'))
+        assert response.status_code == 200
+        assert [item['id'] for item in response.data['results']] == [post.id]
+        # Підписка більше не join-иться у стрічці закріплених
+        assert not any('"subscriptions"' in q['sql'] for q in ctx.captured_queries)